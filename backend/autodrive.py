@@ -0,0 +1,677 @@
+import os
+import socket
+import uuid
+import asyncio
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+from sqlalchemy import and_, or_
+
+from database import SessionLocal, run_db
+from llm_client import LLMUnavailableError
+import models
+import services
+import scoring_engine
+import similarity
+import repository
+import prescorer
+
+# --- AUTODRIVE WORKER CONFIG ---
+# Number of runs executed concurrently; pairs within a run are bounded
+# separately by SCORING_CONCURRENCY in scoring_engine.
+AUTODRIVE_WORKERS = int(os.getenv("AUTODRIVE_WORKERS", 2))
+# Subscribers fall back to polling the DB at this interval, so a socket
+# on one uvicorn worker can follow a run executing on another.
+AUTODRIVE_POLL_SECONDS = float(os.getenv("AUTODRIVE_POLL_SECONDS", 1.0))
+# Cascade defaults (overridable per run): only the top-K candidates per job
+# and/or those above the similarity threshold are deep-scored by the LLM.
+# 0 / unset disables the corresponding filter.
+AUTODRIVE_CASCADE_TOP_K = int(os.getenv("AUTODRIVE_CASCADE_TOP_K", 0))
+AUTODRIVE_CASCADE_THRESHOLD = float(os.getenv("AUTODRIVE_CASCADE_THRESHOLD", 0) or 0)
+# How pairs are scored (overridable per run):
+#   "llm"       - every pair goes to the LLM (default)
+#   "rules"     - fast mode: local rule-based prescorer only, no LLM calls
+#   "prefilter" - pairs scoring below AUTODRIVE_PREFILTER_MIN_SCORE on the
+#                 rules are rejected locally; the rest go to the LLM
+SCORING_MODES = ("llm", "rules", "prefilter")
+AUTODRIVE_SCORING_MODE = os.getenv("AUTODRIVE_SCORING_MODE", "llm")
+AUTODRIVE_PREFILTER_MIN_SCORE = int(os.getenv("AUTODRIVE_PREFILTER_MIN_SCORE", 40))
+# Batched prompting (overridable per run): LLM-bound pairs of the same job
+# are scored several resumes per call (see services.analyze_candidates_batch).
+AUTODRIVE_BATCH_PROMPTING = os.getenv("AUTODRIVE_BATCH_PROMPTING", "false").lower() == "true"
+# Pairs the LLM could not serve (quota exhausted, breaker open) are neither
+# scored nor checkpointed: they are retried after a back-off, this many
+# rounds, before the run fails so /resume can pick them up later.
+AUTODRIVE_UNAVAILABLE_RETRIES = int(os.getenv("AUTODRIVE_UNAVAILABLE_RETRIES", 3))
+AUTODRIVE_UNAVAILABLE_BACKOFF_SECONDS = float(os.getenv("AUTODRIVE_UNAVAILABLE_BACKOFF_SECONDS", 30))
+
+# A running run's owner refreshes its heartbeat at this interval; once the
+# heartbeat is older than AUTODRIVE_HEARTBEAT_TIMEOUT_SECONDS the owner is
+# presumed dead and another process may claim the run.
+AUTODRIVE_HEARTBEAT_SECONDS = float(os.getenv("AUTODRIVE_HEARTBEAT_SECONDS", 15))
+AUTODRIVE_HEARTBEAT_TIMEOUT_SECONDS = float(os.getenv("AUTODRIVE_HEARTBEAT_TIMEOUT_SECONDS", 120))
+
+FINISHED_STATUSES = ("done", "error")
+
+# Identifies this process as the owner of the runs it claims
+WORKER_ID = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+# run_id -> one Event per subscriber, set whenever new results are checkpointed
+_run_events: Dict[int, Set[asyncio.Event]] = {}
+
+
+def _notify(run_id: int):
+    for event in _run_events.get(run_id, ()):
+        event.set()
+
+
+# --- 1. RUN LIFECYCLE ---
+
+def _setting(config: dict, key: str, default):
+    # Explicit zeros (e.g. cascade disabled for a rescore) must not fall back
+    value = config.get(key)
+    return default if value is None else value
+
+
+# Per-run overrides accepted by the start endpoints
+RUN_CONFIG_KEYS = (
+    "cascade_top_k", "cascade_threshold", "scoring_mode", "prefilter_min_score", "batch_prompting",
+)
+
+
+def run_config(options) -> dict:
+    """
+    Overrides from a start request (a dict or a request model) for
+    create_run; keys left out or None fall back to the env defaults.
+    """
+    if isinstance(options, dict):
+        return {key: options.get(key) for key in RUN_CONFIG_KEYS}
+    return {key: getattr(options, key, None) for key in RUN_CONFIG_KEYS}
+
+
+def create_run(
+    db, job_ids: List[int], candidate_ids: List[int], config: Optional[dict] = None
+) -> models.AutoDriveRun:
+    config = config or {}
+    mode = _setting(config, "scoring_mode", AUTODRIVE_SCORING_MODE)
+    if mode not in SCORING_MODES:
+        raise ValueError(f"scoring_mode must be one of {', '.join(SCORING_MODES)}")
+
+    run = models.AutoDriveRun(
+        job_ids=list(job_ids),
+        candidate_ids=list(candidate_ids),
+        config={
+            "cascade_top_k": int(_setting(config, "cascade_top_k", AUTODRIVE_CASCADE_TOP_K)),
+            "cascade_threshold": float(
+                _setting(config, "cascade_threshold", AUTODRIVE_CASCADE_THRESHOLD)
+            ),
+            "scoring_mode": mode,
+            "prefilter_min_score": int(
+                _setting(config, "prefilter_min_score", AUTODRIVE_PREFILTER_MIN_SCORE)
+            ),
+            "batch_prompting": bool(
+                _setting(config, "batch_prompting", AUTODRIVE_BATCH_PROMPTING)
+            ),
+        },
+        status="queued",
+        total_pairs=len(set(job_ids)) * len(set(candidate_ids)),
+        completed_pairs=0,
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+async def enqueue(run_id: int):
+    await _queue.put(run_id)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _claimable():
+    # Queued runs, and running runs whose owner stopped sending heartbeats
+    expired = _utcnow() - timedelta(seconds=AUTODRIVE_HEARTBEAT_TIMEOUT_SECONDS)
+    run = models.AutoDriveRun
+    return or_(
+        run.status == "queued",
+        and_(
+            run.status == "running",
+            or_(run.heartbeat_at.is_(None), run.heartbeat_at < expired),
+        ),
+    )
+
+
+def _unfinished_runs(db) -> List[int]:
+    rows = (
+        db.query(models.AutoDriveRun.id)
+        .filter(_claimable())
+        .order_by(models.AutoDriveRun.id)
+        .all()
+    )
+    return [run_id for (run_id,) in rows]
+
+
+def _claim_run(db, run_id: int) -> bool:
+    """
+    Atomically take a claimable run for this process (commits). Only one
+    of several processes racing for the same run gets True.
+    """
+    claimed = (
+        db.query(models.AutoDriveRun)
+        .filter(models.AutoDriveRun.id == run_id, _claimable())
+        .update(
+            {"status": "running", "owner": WORKER_ID, "heartbeat_at": _utcnow()},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def _heartbeat(db, run_id: int) -> bool:
+    """Refresh the heartbeat of a run this process owns (commits); False once it lost the run."""
+    alive = (
+        db.query(models.AutoDriveRun)
+        .filter(
+            models.AutoDriveRun.id == run_id,
+            models.AutoDriveRun.owner == WORKER_ID,
+            models.AutoDriveRun.status == "running",
+        )
+        .update({"heartbeat_at": _utcnow()}, synchronize_session=False)
+    )
+    db.commit()
+    return alive == 1
+
+
+async def _keep_alive(run_id: int):
+    # Own short-lived sessions: the run's session belongs to its writer thread
+    while True:
+        await asyncio.sleep(AUTODRIVE_HEARTBEAT_SECONDS)
+        try:
+            if not await run_db(_heartbeat, run_id):
+                print(f"[AUTODRIVE] Run {run_id}: claim lost to another worker")
+                return
+        except Exception as e:
+            print(f"[AUTODRIVE] Run {run_id}: heartbeat error: {e}")
+
+
+async def start_workers():
+    """
+    Start the worker pool and requeue runs interrupted by a restart: queued
+    runs and running runs whose heartbeat expired. Every process may queue
+    the same run; only the one whose claim succeeds executes it.
+    """
+    global _queue
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue()
+
+    for i in range(AUTODRIVE_WORKERS):
+        _workers.append(asyncio.create_task(_worker(i)))
+
+    pending = await run_db(_unfinished_runs)
+    for run_id in pending:
+        print(f"[AUTODRIVE] Resuming run {run_id}")
+        await _queue.put(run_id)
+
+
+async def _worker(worker_no: int):
+    while True:
+        run_id = await _queue.get()
+        try:
+            await execute_run(run_id)
+        except Exception as e:
+            print(f"[AUTODRIVE] worker {worker_no}: run {run_id} crashed: {e}")
+        finally:
+            _queue.task_done()
+
+
+# --- 2. RUN EXECUTION ---
+
+def _error_result(err) -> dict:
+    return {
+        "score": 0,
+        "status": "Error",
+        "reasoning": f"AI Processing Error: {err}",
+        "experience_score": 0,
+        "skills_score": 0,
+        "role_alignment_score": 0,
+        "stability_flag": "OK",
+        "skills_found": [],
+        "missing_skills": [],
+    }
+
+
+def _not_evaluated_result() -> dict:
+    return {
+        "score": None,
+        "status": "Not evaluated",
+        "reasoning": "Below the semantic shortlist cut-off; not sent to deep scoring.",
+        "experience_score": None,
+        "skills_score": None,
+        "role_alignment_score": None,
+        "stability_flag": None,
+        "skills_found": [],
+        "missing_skills": [],
+    }
+
+
+def shortlist(semantic_scores, top_k: int = 0, threshold: float = 0.0) -> Optional[set]:
+    """
+    Stage 1 of the cascade. Returns the (job_idx, cand_idx) cells to deep-score:
+    each job's top-K by similarity, plus any cell at/above `threshold`.
+    None means no filter is configured (score everything).
+    """
+    if not top_k and not threshold:
+        return None
+
+    keep = set()
+    if top_k:
+        for j, best in enumerate(similarity.top_k(semantic_scores, top_k)):
+            keep.update((j, c) for c, _ in best)
+    if threshold:
+        rows, cols = (semantic_scores >= threshold).nonzero()
+        keep.update(zip(rows.tolist(), cols.tolist()))
+    return keep
+
+
+def _result_message(pair: dict, ai: dict) -> dict:
+    return {
+        "type": "result",
+        "job_key": pair["job_key"],
+        "candidate": {
+            "candidate_id": pair["candidate_id"],
+            "candidate_name": pair["candidate_name"],
+            "semantic_score": round(float(pair["semantic"] or 0.0), 3),
+            "deep_score": ai.get("score", 0),
+            "status": ai.get("status", "Reject"),
+            "stability_flag": ai.get("stability_flag", "OK"),
+            "experience_score": ai.get("experience_score", 0),
+            "skills_score": ai.get("skills_score", 0),
+            "role_alignment_score": ai.get("role_alignment_score", 0),
+            "skills_found": ai.get("skills_found", []),
+            "missing_skills": ai.get("missing_skills", []),
+            "reasoning": ai.get("reasoning", ""),
+        },
+    }
+
+
+async def _score_units(run_id: int, units, score_fn, writer) -> Tuple[list, float]:
+    """
+    Score units and buffer their Application rows + checkpoints in the writer.
+    Units that failed with LLMUnavailableError write nothing (no 0-score row
+    over an earlier good one, no checkpoint); they are returned with the
+    largest retry_after seen, for the caller to retry.
+    """
+    unavailable, retry_after = [], 0.0
+    async for unit, results, err in scoring_engine.score_pairs(units, score_fn):
+        if isinstance(err, LLMUnavailableError):
+            unavailable.append(unit)
+            retry_after = max(retry_after, err.retry_after)
+            continue
+
+        for pair in unit:
+            job_id, cand_id = pair["job_id"], pair["candidate_id"]
+            ai = None if err is not None else results.get(cand_id)
+
+            if ai is None:
+                print(f"[AUTODRIVE] AI error for cand {cand_id}, job {job_id}: {err}")
+                ai = _error_result(err or "no result returned")
+
+            checkpoint = models.AutoDriveResult(
+                run_id=run_id,
+                job_id=job_id,
+                candidate_id=cand_id,
+                message=_result_message(pair, ai),
+            )
+            # Buffered until a batch is due; only then does add() flush
+            flushed = await _db(
+                writer.add, job_id, cand_id, ai, extra=checkpoint, jd_hash=pair["jd_hash"]
+            )
+            if flushed:
+                _notify(run_id)
+    return unavailable, retry_after
+
+
+async def _db(fn, *args, **kwargs):
+    # A run's sync session does blocking I/O, so it is driven from a worker
+    # thread. Calls are awaited one at a time: never two threads at once.
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+def _start_run(db, run_id: int):
+    """
+    Claim a run (commits) and load its inputs; None if there is nothing to
+    do: finished, gone, or executed by another live worker.
+    """
+    if not _claim_run(db, run_id):
+        return None
+    run = db.query(models.AutoDriveRun).filter(models.AutoDriveRun.id == run_id).first()
+
+    jobs = db.query(models.Job).filter(models.Job.id.in_(run.job_ids)).all()
+    candidates = (
+        db.query(models.Candidate)
+        .filter(models.Candidate.id.in_(run.candidate_ids))
+        .all()
+    )
+    done_pairs = set(
+        db.query(models.AutoDriveResult.job_id, models.AutoDriveResult.candidate_id)
+        .filter(models.AutoDriveResult.run_id == run_id)
+        .all()
+    )
+    return run, dict(run.config or {}), jobs, candidates, done_pairs
+
+
+def _finish_run(db, run_id: int, error: Optional[str] = None):
+    """
+    Set the final status of a run this process owns (commits). A failed
+    run's pending writes are discarded.
+    """
+    if error is not None:
+        db.rollback()
+    run = (
+        db.query(models.AutoDriveRun)
+        .filter(models.AutoDriveRun.id == run_id, models.AutoDriveRun.owner == WORKER_ID)
+        .first()
+    )
+    if run:
+        run.status = "done" if error is None else "error"
+        if error is not None:
+            run.error_message = error
+        db.commit()
+
+
+async def execute_run(run_id: int):
+    """
+    Score every job × candidate pair of a run that has no checkpoint yet.
+    Finished pairs write their Application row and AutoDriveResult
+    checkpoint in the same (batched) commit, so a restarted run skips them.
+    Session work runs in a worker thread; the event loop only awaits it.
+    """
+    db = SessionLocal()
+    keep_alive = None
+    try:
+        started = await _db(_start_run, db, run_id)
+        if started is None:
+            return
+        run, config, jobs, candidates, done_pairs = started
+        keep_alive = asyncio.create_task(_keep_alive(run_id))
+        _notify(run_id)
+
+        print(f"[AUTODRIVE] Run {run_id}: {len(jobs)} jobs, {len(candidates)} candidates, "
+              f"{len(done_pairs)} pairs already checkpointed")
+
+        # Job embeddings (batched, reused from Qdrant when current)
+        try:
+            job_vec_map = await scoring_engine.run_blocking(
+                services.get_job_embeddings, [(j.id, j.title, j.description) for j in jobs]
+            )
+        except Exception as e:
+            print(f"[AUTODRIVE] Job embedding error: {e}")
+            job_vec_map = {}
+        job_vectors = [job_vec_map.get(job.id, []) for job in jobs]
+
+        # Candidate embeddings in batches (off the event loop), then the
+        # full job × candidate similarity matrix
+        try:
+            semantic_scores = await scoring_engine.run_blocking(
+                services.resume_semantic_scores,
+                job_vectors, [cand.resume_text or "" for cand in candidates],
+            )
+        except Exception as e:
+            print(f"[AUTODRIVE] Embedding error for candidates: {e}")
+            semantic_scores = np.zeros((len(jobs), len(candidates)), dtype=np.float32)
+
+        keep = shortlist(
+            semantic_scores,
+            top_k=config.get("cascade_top_k", 0),
+            threshold=config.get("cascade_threshold", 0.0),
+        )
+
+        # Per-pair inputs, read from ORM objects up front so scoring
+        # threads never touch the session.
+        pairs = []
+        skipped = []
+        for j, job in enumerate(jobs):
+            job_key = f"{job.title or 'Job'} (ID {job.id})"
+            jd_hash = repository.description_hash(job.description)
+            for c, cand in enumerate(candidates):
+                if (job.id, cand.id) in done_pairs:
+                    continue
+
+                # Real candidate label: name → fallback
+                label = cand.name.strip() if cand.name else f"Candidate {cand.id}"
+
+                pair = {
+                    "job_id": job.id,
+                    "job_key": job_key,
+                    "job_title": job.title or "",
+                    "job_description": job.description or "",
+                    "jd_hash": jd_hash,
+                    "candidate_id": cand.id,
+                    "candidate_name": label,
+                    "resume_text": cand.resume_text or "",
+                    "semantic": float(semantic_scores[j, c]),
+                }
+                if keep is None or (j, c) in keep:
+                    pairs.append(pair)
+                else:
+                    skipped.append(pair)
+
+        if keep is not None:
+            print(f"[AUTODRIVE] Run {run_id}: cascade shortlisted {len(pairs)} pairs, "
+                  f"{len(skipped)} not evaluated")
+
+        mode = config.get("scoring_mode", "llm")
+        prefilter_min = config.get("prefilter_min_score", AUTODRIVE_PREFILTER_MIN_SCORE)
+
+        def _rules(pair):
+            # Rules result when it settles the pair, else None (goes to the LLM)
+            if mode == "llm":
+                return None
+            rules = prescorer.prescore(
+                pair["resume_text"], pair["job_description"], pair["job_title"]
+            )
+            if mode == "rules" or rules["score"] < prefilter_min:
+                return rules
+            return None
+
+        def _score(pair):
+            rules = _rules(pair)
+            if rules is not None:
+                return rules
+            # Call your strict scoring LLM
+            return services.analyze_candidate(pair["resume_text"], pair["job_description"])
+
+        def _score_unit(unit):
+            # Several candidates of one job: rules first, one batched LLM call for the rest
+            results, llm = {}, {}
+            for pair in unit:
+                rules = _rules(pair)
+                if rules is not None:
+                    results[pair["candidate_id"]] = rules
+                else:
+                    llm[pair["candidate_id"]] = pair["resume_text"]
+            if llm:
+                results.update(
+                    services.analyze_candidates_batch(unit[0]["job_description"], llm)
+                )
+            return results
+
+        # Each work item is a list of pairs; a unit of one when not batching
+        if config.get("batch_prompting") and mode != "rules":
+            by_job: Dict[int, List[dict]] = {}
+            for pair in pairs:
+                by_job.setdefault(pair["job_id"], []).append(pair)
+            units = [
+                unit
+                for job_pairs in by_job.values()
+                for unit in services.batch_units(
+                    job_pairs, lambda p: p["resume_text"], job_pairs[0]["job_description"]
+                )
+            ]
+            score_fn = _score_unit
+            print(f"[AUTODRIVE] Run {run_id}: {len(pairs)} pairs in {len(units)} batched calls")
+        else:
+            units = [[pair] for pair in pairs]
+            score_fn = lambda unit: {unit[0]["candidate_id"]: _score(unit[0])}
+
+        def _count_flushed(n):
+            run.completed_pairs = (run.completed_pairs or 0) + n
+
+        # Application rows + checkpoints are flushed in batches (by count
+        # or time), one upsert and one commit per batch.
+        writer = repository.ApplicationWriter(db, on_flush=_count_flushed)
+
+        # Pairs cut by the cascade keep their semantic score only; their
+        # Application rows (possibly deep-scored earlier) are left alone.
+        def _checkpoint_skipped():
+            for pair in skipped:
+                checkpoint = models.AutoDriveResult(
+                    run_id=run_id,
+                    job_id=pair["job_id"],
+                    candidate_id=pair["candidate_id"],
+                    message=_result_message(pair, _not_evaluated_result()),
+                )
+                writer.add(pair["job_id"], pair["candidate_id"], None, extra=checkpoint)
+            writer.flush()
+
+        await _db(_checkpoint_skipped)
+        _notify(run_id)
+
+        # Bounded fan-out, checkpointed in completion order. Units the
+        # provider could not serve come back and are retried after a back-off.
+        pending, retry_after = units, 0.0
+        for round_no in range(AUTODRIVE_UNAVAILABLE_RETRIES + 1):
+            if round_no:
+                delay = max(retry_after, AUTODRIVE_UNAVAILABLE_BACKOFF_SECONDS)
+                print(f"[AUTODRIVE] Run {run_id}: LLM unavailable for {len(pending)} units, "
+                      f"retry {round_no}/{AUTODRIVE_UNAVAILABLE_RETRIES} in {delay:.0f}s")
+                await asyncio.sleep(delay)
+            pending, retry_after = await _score_units(run_id, pending, score_fn, writer)
+            if not pending:
+                break
+
+        await _db(writer.flush)
+        print(f"[AUTODRIVE] Run {run_id}: {writer.commits} commits")
+
+        if pending:
+            # Fails the run: scored pairs stay committed and /resume retries the rest
+            raise LLMUnavailableError(
+                f"LLM unavailable: {sum(len(unit) for unit in pending)} pairs not scored; "
+                f"resume the run to retry them"
+            )
+
+        await _db(_finish_run, db, run_id)
+        print(f"[AUTODRIVE] Run {run_id} finished")
+
+    except Exception as e:
+        print(f"[AUTODRIVE] Run {run_id} failed: {e}")
+        await _db(_finish_run, db, run_id, str(e))
+
+    finally:
+        if keep_alive is not None:
+            keep_alive.cancel()
+        await _db(db.close)
+        _notify(run_id)
+
+
+# --- 3. SUBSCRIBERS ---
+
+def run_status(run: models.AutoDriveRun) -> dict:
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "total_pairs": run.total_pairs,
+        "completed_pairs": run.completed_pairs,
+        "config": run.config or {},
+        "error": run.error_message,
+    }
+
+
+def get_run_status(db, run_id: int) -> Optional[dict]:
+    run = db.query(models.AutoDriveRun).filter(models.AutoDriveRun.id == run_id).first()
+    return run_status(run) if run else None
+
+
+def mark_for_resume(db, run_id: int) -> Optional[Tuple[dict, bool]]:
+    """Set a failed run back to queued (commits). Returns (status, requeued) or None."""
+    run = db.query(models.AutoDriveRun).filter(models.AutoDriveRun.id == run_id).first()
+    if not run:
+        return None
+    if run.status != "error":
+        return run_status(run), False
+    run.status = "queued"
+    run.error_message = None
+    db.commit()
+    return run_status(run), True
+
+
+def _poll(db, run_id: int, last_id: int):
+    """(status, new result rows) for a subscriber, or (None, []) if the run is gone."""
+    status = get_run_status(db, run_id)
+    if status is None:
+        return None, []
+    rows = (
+        db.query(models.AutoDriveResult.id, models.AutoDriveResult.message)
+        .filter(
+            models.AutoDriveResult.run_id == run_id,
+            models.AutoDriveResult.id > last_id,
+        )
+        .order_by(models.AutoDriveResult.id)
+        .all()
+    )
+    return status, [(row_id, message) for row_id, message in rows]
+
+
+async def stream_run(ws: WebSocket, run_id: int, after_id: int = 0):
+    """
+    Replay every checkpointed result of a run (after `after_id`), then
+    follow new ones until the run finishes. Reattaching with the same
+    run_id replays progress; the run itself never depends on the socket.
+    """
+    event = asyncio.Event()
+    _run_events.setdefault(run_id, set()).add(event)
+    try:
+        await _follow(ws, run_id, after_id, event)
+    finally:
+        subscribers = _run_events.get(run_id)
+        if subscribers is not None:
+            subscribers.discard(event)
+            if not subscribers:
+                del _run_events[run_id]
+
+
+async def _follow(ws: WebSocket, run_id: int, last_id: int, event: asyncio.Event):
+    while True:
+        event.clear()
+
+        # Status is read before the rows, so rows committed just before a
+        # "done" status are never missed; the poll awaits, never blocks.
+        status, rows = await run_db(_poll, run_id, last_id)
+        if status is None:
+            await ws.send_json({"type": "error", "message": f"Run {run_id} not found"})
+            return
+        finished = status["status"] in FINISHED_STATUSES
+
+        for row_id, message in rows:
+            await ws.send_json({**message, "seq": row_id})
+            last_id = row_id
+
+        if finished:
+            if status["status"] == "error":
+                await ws.send_json({"type": "error", "message": status["error"]})
+            await ws.send_json({"type": "done", **status})
+            return
+
+        try:
+            await asyncio.wait_for(event.wait(), timeout=AUTODRIVE_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,160 @@
+"""
+Benchmark: single-vector vs chunked (max-sim / mean-sim) resume retrieval.
+
+Usage (from backend/):
+    python benchmarks/bench_chunking.py             # offline embedder
+    python benchmarks/bench_chunking.py --online    # real EMBEDDING_MODEL (needs GEMINI_API_KEY)
+
+Synthetic corpus: every resume is long generic filler plus one "specialty"
+paragraph at a random position; each query is a JD for one specialty and
+the relevant resumes are the ones carrying it. Quality is recall@k / MRR,
+latency is embedding + scoring time per mode.
+
+The offline embedder is a hashed bag-of-words that, like the real model,
+only sees the first MODEL_INPUT_CHARS characters of its input. It measures
+the effect of truncation and aggregation, not absolute model quality.
+"""
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import chunking  # noqa: E402
+import similarity  # noqa: E402
+
+N_RESUMES = 300
+N_QUERIES = 20
+K = 10
+DIM = 768
+MODEL_INPUT_CHARS = 2048 * 4  # ~2k tokens
+
+SPECIALTIES = [
+    "kafka streaming pipelines exactly-once consumers schema registry",
+    "kubernetes operators helm charts cluster autoscaling",
+    "react native mobile apps offline sync push notifications",
+    "pytorch model training distributed data parallel mixed precision",
+    "terraform modules aws landing zone iam policies",
+    "postgresql query tuning partitioning logical replication",
+    "golang microservices grpc protobuf service mesh",
+    "spark batch etl airflow dags data lake parquet",
+    "selenium test automation page objects ci pipelines",
+    "elasticsearch relevance tuning analyzers ingest pipelines",
+    "rust systems programming async tokio zero-copy parsing",
+    "computer vision object detection yolo image segmentation",
+    "fraud detection gradient boosting feature stores",
+    "ios swift uikit swiftui core data",
+    "snowflake dbt analytics engineering dimensional modelling",
+    "redis caching rate limiting pub sub",
+    "nlp transformers named entity recognition text classification",
+    "azure devops pipelines arm templates app service",
+    "graphql federation apollo schema design",
+    "embedded c firmware rtos can bus",
+]
+
+FILLER = [
+    "Collaborated with cross-functional teams to deliver projects on time.",
+    "Participated in agile ceremonies including sprint planning and retrospectives.",
+    "Mentored junior colleagues and contributed to code reviews.",
+    "Improved documentation and onboarding materials for the team.",
+    "Worked closely with stakeholders to gather and refine requirements.",
+    "Maintained existing services and resolved production incidents.",
+    "Presented progress updates to management on a weekly basis.",
+    "Contributed to internal tooling and process improvements.",
+]
+
+
+def make_corpus(rng):
+    resumes, labels = [], []
+    for i in range(N_RESUMES):
+        spec = rng.randrange(len(SPECIALTIES))
+        n_lines = rng.randint(30, 600)  # ~2k to ~40k chars
+        lines = [rng.choice(FILLER) for _ in range(n_lines)]
+        pos = rng.randrange(len(lines) + 1)
+        block = ["", "Projects", f"Led work on {SPECIALTIES[spec]}.", f"Hands-on {SPECIALTIES[spec]}.", ""]
+        lines[pos:pos] = block
+        resumes.append(f"Candidate {i}\nExperience\n" + "\n".join(lines))
+        labels.append(spec)
+    queries = [
+        (s, f"We are hiring an engineer experienced in {SPECIALTIES[s]}.")
+        for s in rng.sample(range(len(SPECIALTIES)), N_QUERIES)
+    ]
+    return resumes, labels, queries
+
+
+def offline_embed(texts):
+    out = []
+    for text in texts:
+        vec = np.zeros(DIM, dtype=np.float32)
+        for tok in text[:MODEL_INPUT_CHARS].lower().split():
+            h = int.from_bytes(hashlib.blake2b(tok.encode(), digest_size=8).digest(), "big")
+            vec[h % DIM] += 1.0 if (h >> 32) & 1 else -1.0
+        out.append(vec.tolist())
+    return out
+
+
+def evaluate(scores, labels, queries):
+    recalls, rrs = [], []
+    for qi, (spec, _) in enumerate(queries):
+        relevant = {i for i, l in enumerate(labels) if l == spec}
+        ranked = [i for i, _ in similarity.top_k(scores[qi:qi + 1], len(labels))[0]]
+        hits = sum(1 for i in ranked[:K] if i in relevant)
+        recalls.append(hits / min(K, len(relevant)) if relevant else 0.0)
+        first = next((r for r, i in enumerate(ranked, 1) if i in relevant), None)
+        rrs.append(1.0 / first if first else 0.0)
+    return float(np.mean(recalls)), float(np.mean(rrs))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--online", action="store_true", help="use services.get_embeddings")
+    args = parser.parse_args()
+
+    if args.online:
+        import services
+        embed = services.get_embeddings
+    else:
+        embed = offline_embed
+
+    rng = random.Random(7)
+    resumes, labels, queries = make_corpus(rng)
+    query_vecs = embed([q for _, q in queries])
+
+    t0 = time.perf_counter()
+    single = embed(resumes)
+    t_single_embed = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    chunk_lists = [chunking.chunk_resume(r) for r in resumes]
+    flat = embed([c for chunks in chunk_lists for c in chunks])
+    chunked, pos = [], 0
+    for chunks in chunk_lists:
+        chunked.append(flat[pos:pos + len(chunks)])
+        pos += len(chunks)
+    t_chunk_embed = time.perf_counter() - t0
+
+    print(f"{N_RESUMES} resumes, {len(flat)} chunks "
+          f"({len(flat) / N_RESUMES:.1f}/resume), {N_QUERIES} queries, recall@{K}")
+    print(f"{'mode':<14}{'recall@k':>10}{'MRR':>8}{'embed s':>10}{'score ms':>10}")
+
+    t0 = time.perf_counter()
+    scores = similarity.similarity_matrix(query_vecs, single)
+    t_score = (time.perf_counter() - t0) * 1000
+    r, m = evaluate(scores, labels, queries)
+    print(f"{'single':<14}{r:>10.3f}{m:>8.3f}{t_single_embed:>10.2f}{t_score:>10.1f}")
+
+    for agg in ("max", "mean"):
+        t0 = time.perf_counter()
+        scores = similarity.chunk_similarity(query_vecs, chunked, agg)
+        t_score = (time.perf_counter() - t0) * 1000
+        r, m = evaluate(scores, labels, queries)
+        print(f"{'chunked-' + agg:<14}{r:>10.3f}{m:>8.3f}{t_chunk_embed:>10.2f}{t_score:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
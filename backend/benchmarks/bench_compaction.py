@@ -0,0 +1,111 @@
+"""
+Benchmark: prompt tokens (and optionally latency) with and without compaction.
+
+Usage (from backend/):
+    python benchmarks/bench_compaction.py            # token counts only
+    python benchmarks/bench_compaction.py --online   # also time analyze_candidate (needs GEMINI_API_KEY)
+
+Synthetic resumes mimic pypdf output: running headers/footers and page
+numbers on every page, bullet glyphs, ragged whitespace, long filler
+sections. Half the corpus is 1-2 page resumes that fit the prompt budget
+(cleaned only), half is long enough to be cut. Tokens are the same
+~4 chars/token estimate used for batching.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import compaction  # noqa: E402
+
+N_DOCS = 50
+
+JD = """Senior Backend Engineer
+
+About Us
+We are a fast-growing company on a mission to change how people work. """ + "Our culture values ownership. " * 40 + """
+
+Responsibilities
+- Design and build Python microservices on AWS
+- Own PostgreSQL schemas and Kafka pipelines
+
+Requirements
+- 5+ years of Python, Django or FastAPI
+- Docker, Kubernetes, Terraform
+
+Benefits
+""" + "- Generous perks and flexible hours\n" * 20 + """
+Equal Opportunity
+We are an equal opportunity employer. """ + "All qualified applicants will receive consideration. " * 10
+
+FILLER = [
+    "  •   Collaborated   with cross-functional teams to deliver projects on time.",
+    "  ▪  Participated in agile ceremonies including sprint planning.",
+    "●  Mentored junior colleagues and contributed to code reviews.",
+    "\tMaintained existing services and resolved production incidents.",
+]
+
+
+def make_resume(rng, i, min_pages=2, max_pages=8, lines=(20, 60)):
+    pages = []
+    for p in range(rng.randint(min_pages, max_pages)):
+        body = [rng.choice(FILLER) for _ in range(rng.randint(*lines))]
+        pages.append(f"Jane Doe {i} - Curriculum Vitae\n" + "\n".join(body) + f"\n\nPage {p + 1} of 8\n")
+    head = (f"Jane Doe {i}\njane{i}@example.com\n\nSummary\nBackend engineer.\n\n"
+            "Skills\nPython, Django, PostgreSQL, Kafka, Docker, Kubernetes, AWS\n\nExperience\n")
+    tail = "\n\nEducation\nBSc Computer Science\n\nInterests\n" + "Hiking, chess, travel. " * 30
+    return head + "\f".join(pages) + tail
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--online", action="store_true", help="time services.analyze_candidate")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    short = [make_resume(rng, i, 1, 2, (15, 30)) for i in range(N_DOCS // 2)]
+    long_ = [make_resume(rng, i, 3, 8) for i in range(N_DOCS // 2, N_DOCS)]
+    resumes = short + long_
+
+    t0 = time.perf_counter()
+    compacted = [compaction.compact_resume(r) for r in resumes]
+    t_compact = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    for r in resumes:
+        compaction.compact_resume(r)
+    t_cached = (time.perf_counter() - t0) * 1000
+
+    raw_tokens = sum(len(r) // 4 for r in resumes)
+    out_tokens = sum(len(c) // 4 for c in compacted)
+    jd_raw, jd_out = len(JD) // 4, len(compaction.compact_jd(JD)) // 4
+    print(f"{N_DOCS} resumes: {raw_tokens} -> {out_tokens} tokens "
+          f"({1 - out_tokens / raw_tokens:.1%} saved), {t_compact:.1f} ms cold, {t_cached:.1f} ms cached")
+    for label, group in (("1-2 pages", short), ("3-8 pages", long_)):
+        raw = sum(len(r) // 4 for r in group)
+        out = sum(len(compaction.compact_resume(r)) // 4 for r in group)
+        within = sum(len(r) // 4 <= compaction.RESUME_PROMPT_TOKENS for r in group)
+        print(f"  {label:<9} {len(group)} resumes ({within} within budget): "
+              f"{raw} -> {out} tokens ({1 - out / raw:.1%} saved)")
+    print(f"JD: {jd_raw} -> {jd_out} tokens ({1 - jd_out / jd_raw:.1%} saved)")
+    print(f"Contact block kept in every resume: "
+          f"{all(f'jane{i}@example.com' in c for i, c in enumerate(compacted))}")
+
+    if args.online:
+        import services
+        for label, enabled in (("raw", False), ("compacted", True)):
+            compaction.COMPACTION_ENABLED = enabled
+            times = []
+            for r in resumes[:5]:
+                t0 = time.perf_counter()
+                services.analyze_candidate(r, JD, use_cache=False)
+                times.append(time.perf_counter() - t0)
+            print(f"{label:<10} median latency {statistics.median(times):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
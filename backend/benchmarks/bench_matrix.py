@@ -0,0 +1,89 @@
+"""
+Benchmark: /bulk/matrix/ assembly, per-cell queries vs one set-based query.
+
+Usage (from backend/):
+    python benchmarks/bench_matrix.py
+    DATABASE_URL=postgresql+psycopg2://... python benchmarks/bench_matrix.py
+
+Defaults to in-memory SQLite. Against a real Postgres the per-cell
+variant is far worse, because each cell also pays a network round-trip.
+"""
+import os
+import sys
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from database import SessionLocal, engine  # noqa: E402
+import models  # noqa: E402
+import repository  # noqa: E402
+
+SIZES = [(5, 50), (10, 100), (20, 250), (50, 500)]
+FILL_RATIO = 0.6
+
+
+def seed(db, n_jobs, n_cands):
+    jobs = [models.Job(title=f"Job {i}", description="bench") for i in range(n_jobs)]
+    cands = [models.Candidate(name=f"Cand {i}", resume_text="bench") for i in range(n_cands)]
+    db.add_all(jobs + cands)
+    db.flush()
+
+    apps = [
+        models.Application(
+            job_id=j.id, candidate_id=c.id,
+            match_score=random.randint(0, 100), status="Reject", stability_flag="OK",
+        )
+        for j in jobs for c in cands if random.random() < FILL_RATIO
+    ]
+    db.add_all(apps)
+    db.commit()
+    return jobs, cands
+
+
+def per_cell(db, jobs, cands):
+    # The pre-user-008 implementation: one query per (candidate, job) cell.
+    rows = []
+    for cand in cands:
+        scores = []
+        for job in jobs:
+            app = (
+                db.query(models.Application)
+                .filter(
+                    models.Application.job_id == job.id,
+                    models.Application.candidate_id == cand.id,
+                )
+                .first()
+            )
+            scores.append(app.match_score if app else None)
+        rows.append(scores)
+    return rows
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+
+    print(f"{'jobs x cands':>14} {'cells':>8} {'per-cell ms':>12} {'set-based ms':>13} {'speedup':>8}")
+    try:
+        for n_jobs, n_cands in SIZES:
+            jobs, cands = seed(db, n_jobs, n_cands)
+            legacy = timed(per_cell, db, jobs, cands)
+            db.expire_all()
+            bulk = timed(repository.build_score_matrix, db, jobs, cands)
+            print(f"{n_jobs:>6} x {n_cands:<5} {n_jobs * n_cands:>8} "
+                  f"{legacy:>12.1f} {bulk:>13.1f} {legacy / max(bulk, 1e-6):>7.0f}x")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
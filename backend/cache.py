@@ -0,0 +1,380 @@
+import os
+import re
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from database import SessionLocal
+import models
+
+# --- CACHE CONFIG ---
+SCORE_CACHE_TTL_SECONDS = int(os.getenv("SCORE_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+SCORE_CACHE_MEMORY_ITEMS = int(os.getenv("SCORE_CACHE_MEMORY_ITEMS", 5000))
+SCORE_CACHE_MAX_ROWS = int(os.getenv("SCORE_CACHE_MAX_ROWS", 200000))
+# Writes between automatic prunes (TTL + LRU row cap), run in the background
+SCORE_CACHE_PRUNE_EVERY = int(os.getenv("SCORE_CACHE_PRUNE_EVERY", 1000))
+# last_accessed_at touches are buffered and written in one UPDATE at most
+# this often (LRU eviction only needs coarse recency)
+SCORE_CACHE_TOUCH_SECONDS = float(os.getenv("SCORE_CACHE_TOUCH_SECONDS", 60))
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", 20000))
+
+
+# --- 1. HASHING HELPERS ---
+
+def normalize_text(text: Optional[str]) -> str:
+    """Collapse whitespace and NULs so cosmetic differences hash the same."""
+    if not text:
+        return ""
+    return re.sub(r"\s+", " ", text.replace("\x00", "")).strip()
+
+
+def content_hash(*parts: Optional[str]) -> str:
+    """sha256 over the normalized parts, separated so ('ab','c') != ('a','bc')."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(normalize_text(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+# --- 2. IN-PROCESS LRU ---
+
+class LRUCache:
+    """Thread-safe LRU with optional TTL. Used in front of the persistent stores."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# --- 3. ANALYSIS RESULT CACHE ---
+
+class AnalysisCache:
+    """
+    Persistent cache for analyze_candidate() results.
+
+    Key = sha256(normalized resume, normalized JD, prompt version, model).
+    Lookups hit the in-process LRU first, then the `analysis_cache` table.
+    Rows older than the TTL are treated as misses and deleted; when the table
+    grows past SCORE_CACHE_MAX_ROWS the least recently used rows are evicted
+    (every SCORE_CACHE_PRUNE_EVERY writes, or on demand via prune()).
+    """
+
+    def __init__(
+        self, ttl_seconds: int, memory_items: int, max_rows: int,
+        prune_every: int = SCORE_CACHE_PRUNE_EVERY,
+        touch_seconds: float = SCORE_CACHE_TOUCH_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self.touch_seconds = touch_seconds
+        self.memory = LRUCache(maxsize=memory_items, ttl=ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._pruning = False
+        self._touched: set = set()
+        self._touched_at = time.monotonic()
+
+    @staticmethod
+    def make_key(resume_text: str, job_description: str, prompt_version: str, model: str) -> str:
+        return content_hash(resume_text, job_description, prompt_version, model)
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _touch(self, key: str):
+        """Buffer a last_accessed_at update; flushed in batches by flush_touches()."""
+        with self._lock:
+            self._touched.add(key)
+            due = time.monotonic() - self._touched_at >= self.touch_seconds
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self):
+        """Write buffered access times as one UPDATE."""
+        with self._lock:
+            keys, self._touched = list(self._touched), set()
+            self._touched_at = time.monotonic()
+        if not keys:
+            return
+
+        db = SessionLocal()
+        try:
+            (
+                db.query(models.AnalysisCache)
+                .filter(models.AnalysisCache.key.in_(keys))
+                .update({"last_accessed_at": datetime.now(timezone.utc)}, synchronize_session=False)
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Analysis cache touch error: {e}")
+        finally:
+            db.close()
+
+    def get(self, key: str) -> Optional[dict]:
+        cached = self.memory.get(key)
+        if cached is not None:
+            self._count(True)
+            self._touch(key)
+            return cached
+
+        db = SessionLocal()
+        try:
+            row = db.query(models.AnalysisCache).filter(models.AnalysisCache.key == key).first()
+            if row is None:
+                self._count(False)
+                return None
+
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+            created = row.created_at
+            if created is not None and created.tzinfo is None:
+                created = created.replace(tzinfo=timezone.utc)
+            if created is not None and created < cutoff:
+                db.delete(row)
+                db.commit()
+                self._count(False)
+                return None
+
+            result = row.result
+        except Exception as e:
+            db.rollback()
+            print(f"Analysis cache read error: {e}")
+            self._count(False)
+            return None
+        finally:
+            db.close()
+
+        self.memory.set(key, result)
+        self._count(True)
+        self._touch(key)
+        return result
+
+    def set(self, key: str, result: dict, model: str, prompt_version: str):
+        self.memory.set(key, result)
+
+        db = SessionLocal()
+        try:
+            row = db.query(models.AnalysisCache).filter(models.AnalysisCache.key == key).first()
+            if row is None:
+                row = models.AnalysisCache(key=key)
+                db.add(row)
+            row.result = result
+            row.model = model
+            row.prompt_version = prompt_version
+            row.created_at = datetime.now(timezone.utc)
+            row.last_accessed_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Analysis cache write error: {e}")
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            self._writes += 1
+            due = (
+                self.prune_every > 0 and self._writes % self.prune_every == 0
+                and not self._pruning
+            )
+            if due:
+                self._pruning = True
+        if due:
+            threading.Thread(target=self._auto_prune, daemon=True).start()
+
+    def _auto_prune(self):
+        try:
+            removed = self.prune()
+            if removed:
+                print(f"Analysis cache: pruned {removed} rows")
+        finally:
+            with self._lock:
+                self._pruning = False
+
+    def prune(self) -> int:
+        """Drop expired rows, then evict LRU rows beyond max_rows. Returns rows removed."""
+        # Recent accesses must count before choosing what to evict
+        self.flush_touches()
+        db = SessionLocal()
+        try:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+            removed = (
+                db.query(models.AnalysisCache)
+                .filter(models.AnalysisCache.created_at < cutoff)
+                .delete(synchronize_session=False)
+            )
+
+            total = db.query(models.AnalysisCache).count()
+            overflow = total - self.max_rows
+            if overflow > 0:
+                stale_keys = [
+                    k for (k,) in db.query(models.AnalysisCache.key)
+                    .order_by(models.AnalysisCache.last_accessed_at.asc())
+                    .limit(overflow)
+                ]
+                removed += (
+                    db.query(models.AnalysisCache)
+                    .filter(models.AnalysisCache.key.in_(stale_keys))
+                    .delete(synchronize_session=False)
+                )
+
+            db.commit()
+            return removed
+        except Exception as e:
+            db.rollback()
+            print(f"Analysis cache prune error: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "memory_items": len(self.memory),
+        }
+
+
+# --- 4. EMBEDDING CACHE ---
+
+class EmbeddingCache:
+    """
+    Persistent embedding store keyed by sha256(text, model).
+    Vectors are immutable for a given (text, model), so there is no TTL:
+    the in-process LRU bounds memory, the `embedding_cache` table keeps everything.
+    """
+
+    def __init__(self, memory_items: int):
+        self.memory = LRUCache(maxsize=memory_items)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        return content_hash(text, model)
+
+    def _count(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_many(self, keys: list) -> dict:
+        """Return {key: vector} for every key found in memory or Postgres."""
+        found = {}
+        pending = []
+        for key in keys:
+            vec = self.memory.get(key)
+            if vec is not None:
+                found[key] = vec
+            else:
+                pending.append(key)
+
+        if pending:
+            db = SessionLocal()
+            try:
+                rows = (
+                    db.query(models.EmbeddingCache.key, models.EmbeddingCache.vector)
+                    .filter(models.EmbeddingCache.key.in_(set(pending)))
+                    .all()
+                )
+                for key, vec in rows:
+                    found[key] = vec
+                    self.memory.set(key, vec)
+            except Exception as e:
+                print(f"Embedding cache read error: {e}")
+            finally:
+                db.close()
+
+        hits = sum(1 for k in keys if k in found)
+        self._count(hits, len(keys) - hits)
+        return found
+
+    def get(self, key: str) -> Optional[list]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, entries: dict, model: str):
+        """Persist {key: vector}. Existing keys are left untouched."""
+        if not entries:
+            return
+        for key, vec in entries.items():
+            self.memory.set(key, vec)
+
+        db = SessionLocal()
+        try:
+            existing = {
+                k for (k,) in db.query(models.EmbeddingCache.key)
+                .filter(models.EmbeddingCache.key.in_(list(entries)))
+            }
+            db.add_all([
+                models.EmbeddingCache(key=k, model=model, vector=v)
+                for k, v in entries.items() if k not in existing
+            ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Embedding cache write error: {e}")
+        finally:
+            db.close()
+
+    def set(self, key: str, vector: list, model: str):
+        self.set_many({key: vector}, model)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "memory_items": len(self.memory),
+        }
+
+
+embedding_cache = EmbeddingCache(memory_items=EMBEDDING_CACHE_MEMORY_ITEMS)
+
+analysis_cache = AnalysisCache(
+    ttl_seconds=SCORE_CACHE_TTL_SECONDS,
+    memory_items=SCORE_CACHE_MEMORY_ITEMS,
+    max_rows=SCORE_CACHE_MAX_ROWS,
+)
@@ -1,9 +1,9 @@
-import os
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from litellm import completion
+from providers import provider
 import models
 import json
+import skills
 
 def ask_copilot(question: str, db: Session):
     # 1. Fetch Candidate Data (Same as before)
@@ -17,6 +17,19 @@ def ask_copilot(question: str, db: Session):
 
     context_data = "\n".join([f"{r[0]} | {r[1]} | Score: {r[2]} | {r[3]}" for r in results])
 
+    # Skill questions ("candidates with Kafka and Go") are answered from the
+    # skill index rather than whatever happens to be in the top 50 above.
+    asked = skills.extract(question)
+    if asked:
+        ids = skills.candidates_with_all(db, asked, limit=50)
+        names = db.query(models.Candidate.id, models.Candidate.name).filter(
+            models.Candidate.id.in_(ids)
+        ).all() if ids else []
+        context_data += (
+            f"\n\nCANDIDATES WITH ALL OF {', '.join(asked)} ({len(ids)} found):\n"
+            + "\n".join(f"{cid} | {name}" for cid, name in names)
+        )
+
     # 2. The "Agentic" Prompt
     prompt = f"""
     You are a Recruitment Dashboard Controller.
@@ -39,11 +52,9 @@ def ask_copilot(question: str, db: Session):
     }}
     """
 
-    # 3. Call Gemini
-    response = completion(
-        model="gemini/gemini-2.5-flash",
+    # 3. Call the configured LLM provider
+    response = provider.complete(
         messages=[{"role": "user", "content": prompt}],
-        api_key=os.getenv("GEMINI_API_KEY")
     )
 
     content = response.choices[0].message.content
@@ -0,0 +1,85 @@
+import os
+import re
+from typing import List
+
+# --- RESUME CHUNKING CONFIG ---
+# Target chunk size (~4 chars per token); well under the embedding model's
+# input limit, so nothing is silently truncated.
+RESUME_CHUNK_TOKENS = int(os.getenv("RESUME_CHUNK_TOKENS", 400))
+# Chunks embedded per resume; anything beyond is folded into one final chunk
+RESUME_MAX_CHUNKS = int(os.getenv("RESUME_MAX_CHUNKS", 16))
+_CHARS_PER_TOKEN = 4
+
+# Lines that open a new resume section
+_HEADING_RE = re.compile(
+    r"^\s*(?:professional\s+|work\s+|relevant\s+|technical\s+|key\s+)?"
+    r"(summary|profile|objective|experience|employment(?:\s+history)?|work\s+history|"
+    r"skills|core\s+competencies|projects|education|certifications?|achievements|"
+    r"publications|awards|languages|interests)\s*:?\s*$",
+    re.IGNORECASE,
+)
+
+
+def split_sections(text: str) -> List[str]:
+    """Split on section headings; text before the first heading is its own section."""
+    sections, current = [], []
+    for line in (text or "").splitlines():
+        if _HEADING_RE.match(line) and any(l.strip() for l in current):
+            sections.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    if any(l.strip() for l in current):
+        sections.append("\n".join(current).strip())
+    return [s for s in sections if s]
+
+
+def _window(section: str, max_chars: int) -> List[str]:
+    """Pack paragraphs (then lines, then hard cuts) into pieces of <= max_chars."""
+    if len(section) <= max_chars:
+        return [section]
+
+    units = []
+    for para in re.split(r"\n\s*\n", section):
+        if len(para) <= max_chars:
+            units.append(para)
+            continue
+        for line in para.splitlines():
+            while len(line) > max_chars:
+                units.append(line[:max_chars])
+                line = line[max_chars:]
+            units.append(line)
+
+    pieces, current = [], ""
+    for unit in units:
+        if current and len(current) + len(unit) + 1 > max_chars:
+            pieces.append(current)
+            current = unit
+        else:
+            current = f"{current}\n{unit}" if current else unit
+    if current.strip():
+        pieces.append(current)
+    return pieces
+
+
+def chunk_resume(text: str, max_tokens: int = None, max_chunks: int = None) -> List[str]:
+    """Section-aware chunks of a resume, each within the token target."""
+    max_chars = (max_tokens or RESUME_CHUNK_TOKENS) * _CHARS_PER_TOKEN
+    max_chunks = max_chunks or RESUME_MAX_CHUNKS
+
+    pieces = []
+    for section in split_sections(text):
+        pieces.extend(p.strip() for p in _window(section, max_chars) if p.strip())
+
+    # Fold tiny pieces (name line, one-line summary) into their neighbour
+    min_chars = max_chars // 8
+    chunks = []
+    for piece in pieces:
+        if chunks and (len(chunks[-1]) < min_chars or len(piece) < min_chars) \
+                and len(chunks[-1]) + len(piece) + 1 <= max_chars:
+            chunks[-1] = f"{chunks[-1]}\n{piece}"
+        else:
+            chunks.append(piece)
+
+    if len(chunks) > max_chunks:
+        chunks = chunks[:max_chunks - 1] + ["\n".join(chunks[max_chunks - 1:])[:max_chars]]
+    return chunks
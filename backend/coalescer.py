@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import Future
+from queue import Queue, Empty
+from typing import Callable, List, Optional
+
+
+class MicroBatcher:
+    """
+    Merges concurrent single-item calls into one batched upstream call.
+
+    Callers from any thread call submit(item) and block on the returned
+    Future. A daemon worker takes the first queued item, keeps collecting
+    for up to `window_ms` (or until `max_batch` items), then hands the whole
+    batch to `batch_fn(items) -> results` (same order, same length).
+    """
+
+    def __init__(self, batch_fn: Callable[[List], List], window_ms: float = 20, max_batch: int = 100):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: Queue = Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._worker and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._worker.start()
+
+    def submit(self, item) -> Future:
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        self._ensure_worker()
+        return fut
+
+    def call(self, item, timeout: Optional[float] = None):
+        """Submit one item and wait for its result."""
+        return self.submit(item).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+                for (_, fut), res in zip(batch, results):
+                    fut.set_result(res)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
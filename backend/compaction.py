@@ -0,0 +1,251 @@
+import os
+import re
+import threading
+from collections import Counter
+from typing import List, Tuple
+
+from cache import LRUCache, content_hash
+import skills
+
+# --- COMPACTION CONFIG ---
+# Estimated-token budgets for documents placed in LLM prompts (~4 chars per
+# token). Documents under budget are only cleaned, never cut.
+RESUME_PROMPT_TOKENS = int(os.getenv("RESUME_PROMPT_TOKENS", 3000))
+JD_PROMPT_TOKENS = int(os.getenv("JD_PROMPT_TOKENS", 1500))
+COMPACTION_ENABLED = os.getenv("COMPACTION_ENABLED", "true").lower() == "true"
+COMPACTION_CACHE_ITEMS = int(os.getenv("COMPACTION_CACHE_ITEMS", 5000))
+# Bump when the rules below change: it is part of the cache key, and the
+# compacted text is what analysis results are cached against.
+COMPACTION_VERSION = "compact-v3"
+_CHARS_PER_TOKEN = 4
+TRUNCATION_MARK = "[...]"
+
+_cache = LRUCache(maxsize=COMPACTION_CACHE_ITEMS)
+_stats_lock = threading.Lock()
+_stats = {"documents": 0, "tokens_in": 0, "tokens_out": 0, "truncated": 0}
+
+
+# --- 1. CLEANING ---
+
+_PAGE_RE = re.compile(r"^\s*(?:page\s*)?-?\s*\d{1,3}\s*(?:(?:of|/)\s*\d{1,3})?\s*-?\s*$", re.IGNORECASE)
+_BULLET_RE = re.compile(r"^\s*[•▪●◦■□➢➤►▸‣⁃*]\s*")
+_BOILERPLATE_RE = re.compile(
+    r"^\s*(?:curriculum vitae|resume|r[ée]sum[ée]|references available upon request\.?|"
+    r"references:? available on request\.?)\s*$",
+    re.IGNORECASE,
+)
+
+
+# Non-empty lines from a page boundary within which a repeated line counts
+# as a running header / footer
+_BOUNDARY_WINDOW = 1
+
+
+def _running_headers(lines: List[str], boundary: List[bool]) -> set:
+    """
+    Short lines that recur (3+ times) and sit right next to a page boundary
+    (form feed or page-number line) every time they occur after the first
+    page. Repeats without that evidence, e.g. the same job title held
+    three times, are content and are kept.
+    """
+    counts = Counter(ln for ln in lines if ln and len(ln) <= 80)
+    repeated = {
+        ln for ln, n in counts.items()
+        if n >= 3 and not _BULLET_RE.match(ln) and not ln.startswith("- ")
+    }
+    if not repeated or not any(boundary):
+        return set()
+
+    # Positions among non-empty lines (boundaries included) so blank-line
+    # padding does not widen or narrow the window
+    slots = [i for i, ln in enumerate(lines) if ln or boundary[i]]
+    first_boundary = next(k for k, i in enumerate(slots) if boundary[i])
+    near = {}
+    for k, i in enumerate(slots):
+        ln = lines[i]
+        if ln not in repeated or k < first_boundary:
+            continue
+        window = slots[max(0, k - _BOUNDARY_WINDOW):k + _BOUNDARY_WINDOW + 1]
+        near.setdefault(ln, []).append(any(boundary[j] for j in window))
+    return {ln for ln, hits in near.items() if len(hits) >= 2 and all(hits)}
+
+
+def clean(text: str) -> str:
+    """Strip extraction noise: control chars, page artifacts, running headers, bullets."""
+    if not text:
+        return ""
+    text = text.replace("\x00", "").replace("\r\n", "\n").replace("\r", "\n")
+    # Keep form feeds as their own lines: they mark page boundaries
+    text = text.replace("\f", "\n\f\n")
+    text = re.sub(r"[\x01-\x08\x0b\x0e-\x1f\x7f]", "", text)
+    # Words hyphenated across a line break by the PDF layout
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+
+    raw = text.split("\n")
+    boundary = [ln == "\f" or bool(_PAGE_RE.match(ln)) for ln in raw]
+    lines = [re.sub(r"[ \t\u00a0]+", " ", ln).strip() for ln in raw]
+    headers = _running_headers(lines, boundary)
+
+    out, seen = [], set()
+    for ln, is_boundary in zip(lines, boundary):
+        if is_boundary or _BOILERPLATE_RE.match(ln):
+            continue
+        if ln in headers:
+            if ln in seen:
+                continue
+            seen.add(ln)
+        ln = _BULLET_RE.sub("- ", ln)
+        if not ln and (not out or not out[-1]):
+            continue
+        out.append(ln)
+    return "\n".join(out).strip()
+
+
+# --- 2. SECTIONS ---
+
+# (heading pattern, weight): higher weights survive truncation first
+_RESUME_SECTIONS = [
+    (r"(?:professional |work |relevant )?experience|employment(?: history)?|work history|career history", 1.0),
+    (r"(?:technical |key |core )?skills|core competencies|technologies|tech stack", 1.0),
+    (r"(?:key |personal |academic )?projects", 0.8),
+    (r"(?:professional )?summary|profile|objective|about me", 0.7),
+    (r"education|certifications?|qualifications|training|courses", 0.6),
+    (r"achievements|awards|publications|patents", 0.4),
+    (r"languages|volunteering|volunteer experience", 0.3),
+    (r"interests|hobbies|references|personal details|declaration", 0.1),
+]
+_JD_SECTIONS = [
+    (r"(?:minimum |basic |required )?(?:requirements|qualifications)|must[- ]haves?|"
+     r"what you(?:'ll)? (?:need|bring)|who you are|skills(?: required)?|required skills", 1.0),
+    (r"(?:key )?responsibilities|duties|what you(?:'ll)? do|the role|role overview|"
+     r"about the role|job description|position summary", 0.9),
+    (r"(?:preferred|desired|bonus|additional) (?:qualifications|skills)|nice[- ]to[- ]haves?", 0.7),
+    (r"about (?:us|the company|the team)|who we are|our (?:company|mission|story)|company overview", 0.2),
+    (r"benefits|perks|compensation|salary|what we offer|why join us", 0.1),
+    (r"equal (?:employment )?opportunity|eeo|diversity (?:statement|& inclusion)|how to apply|"
+     r"application process|disclaimer", 0.0),
+]
+# Text before the first heading: the resume's name / contact block (needed
+# for name and email extraction) or the JD's title line.
+_PREAMBLE_WEIGHT = 1.1
+
+
+def _heading_re(table) -> List[Tuple[re.Pattern, float]]:
+    return [
+        (re.compile(rf"^\s*(?:{pat})\s*:?\s*$", re.IGNORECASE), weight)
+        for pat, weight in table
+    ]
+
+
+_HEADINGS = {"resume": _heading_re(_RESUME_SECTIONS), "jd": _heading_re(_JD_SECTIONS)}
+
+
+def split_sections(text: str, kind: str) -> List[Tuple[str, float]]:
+    """(section_text, weight) in document order; the preamble is always first."""
+    headings = _HEADINGS[kind]
+    sections, current, weight = [], [], _PREAMBLE_WEIGHT
+    for line in text.split("\n"):
+        match = next((w for rx, w in headings if len(line) <= 60 and rx.match(line)), None)
+        if match is not None:
+            if any(current):
+                sections.append(("\n".join(current).strip(), weight))
+            current, weight = [], match
+        current.append(line)
+    if any(current):
+        sections.append(("\n".join(current).strip(), weight))
+    return sections
+
+
+# --- 3. BUDGETED COMPACTION ---
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // _CHARS_PER_TOKEN)
+
+
+def _head(section: str, max_chars: int) -> str:
+    """Longest prefix of whole lines within max_chars."""
+    kept, used = [], 0
+    for line in section.split("\n"):
+        if used + len(line) + 1 > max_chars:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    return "\n".join(kept).strip()
+
+
+def _fit(sections: List[Tuple[str, float]], max_tokens: int) -> Tuple[str, bool]:
+    """
+    Keep sections by relevance (section weight, then skill density) until the
+    budget is spent; the first section that does not fit is cut at a line
+    boundary. Output keeps document order.
+    """
+    def relevance(i):
+        text, weight = sections[i]
+        density = len(skills.extract(text)) / _tokens(text)
+        return (weight + min(density * 10, 0.2), -i)
+
+    budget = max_tokens * _CHARS_PER_TOKEN
+    kept = {}
+    for i in sorted(range(len(sections)), key=relevance, reverse=True):
+        text, weight = sections[i]
+        if len(text) + 2 <= budget:
+            kept[i] = text
+            budget -= len(text) + 2
+        elif budget >= 200:
+            head = _head(text, budget - len(TRUNCATION_MARK) - 3)
+            if head:
+                kept[i] = f"{head}\n{TRUNCATION_MARK}"
+                budget -= len(kept[i]) + 2
+    out = "\n\n".join(kept[i] for i in sorted(kept))
+    return out, len(kept) < len(sections) or TRUNCATION_MARK in out
+
+
+def compact(text: str, kind: str = "resume", max_tokens: int = None) -> str:
+    """
+    Cleaned, budget-limited version of a resume (kind="resume") or job
+    description (kind="jd") for use in prompts. Cached per document.
+    """
+    if not text or not COMPACTION_ENABLED:
+        return text or ""
+    max_tokens = max_tokens or (RESUME_PROMPT_TOKENS if kind == "resume" else JD_PROMPT_TOKENS)
+
+    key = content_hash(text, kind, str(max_tokens), COMPACTION_VERSION)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    out = clean(text)
+    sections = split_sections(out, kind)
+    if any(weight <= 0 for _, weight in sections):
+        # Pure boilerplate (EEO statements, application instructions)
+        sections = [(s, w) for s, w in sections if w > 0]
+        out = "\n\n".join(s for s, _ in sections)
+    truncated = False
+    if _tokens(out) > max_tokens:
+        out, truncated = _fit(sections, max_tokens)
+        if not out:
+            out = _head(clean(text), max_tokens * _CHARS_PER_TOKEN)
+    _cache.set(key, out)
+
+    with _stats_lock:
+        _stats["documents"] += 1
+        _stats["tokens_in"] += _tokens(text)
+        _stats["tokens_out"] += _tokens(out)
+        _stats["truncated"] += int(truncated)
+    return out
+
+
+def compact_resume(text: str, max_tokens: int = None) -> str:
+    return compact(text, "resume", max_tokens)
+
+
+def compact_jd(text: str, max_tokens: int = None) -> str:
+    return compact(text, "jd", max_tokens)
+
+
+def stats() -> dict:
+    with _stats_lock:
+        s = dict(_stats)
+    s["saved_ratio"] = round(1 - s["tokens_out"] / s["tokens_in"], 3) if s["tokens_in"] else 0.0
+    s["memory_items"] = len(_cache)
+    return s
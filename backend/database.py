@@ -1,9 +1,16 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+# Async engine for the hot FastAPI routes (needs asyncpg + greenlet)
+try:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+except ImportError:  # pragma: no cover - optional dependency
+    create_async_engine = None
+
 # Load environment variables from .env file (for local dev)
 dotenv_path = os.path.join(os.path.dirname(__file__), "..", ".env")
 load_dotenv(dotenv_path=dotenv_path, override=True)
@@ -28,9 +35,64 @@ if not DATABASE_URL:
 else:
     print("DEBUG: Using DATABASE_URL from Environment (Docker/Cloud)")
 
-engine = create_engine(DATABASE_URL)
+# --- POOL CONFIG ---
+# Per engine (the sync and async engines each hold their own pool), per
+# process: size x uvicorn workers must stay below Postgres max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+# Recycle before server / load-balancer idle timeouts close connections
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# asyncpg prepared statements cached per connection; set 0 behind
+# PgBouncer in transaction pooling mode.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500))
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "true").lower() == "true"
+
+
+def _pool_args(url: str) -> dict:
+    # SQLite (local dev / benchmarks) uses its own single-connection pools
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+engine = create_engine(DATABASE_URL, **_pool_args(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str):
+    """Same database through the asyncpg driver, or None when unsupported."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return None
+    return parsed.set(drivername="postgresql+asyncpg").update_query_dict(
+        {"prepared_statement_cache_size": str(DB_STATEMENT_CACHE_SIZE)}
+    )
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC_ENABLED and create_async_engine is not None and async_database_url(DATABASE_URL):
+    try:
+        async_engine = create_async_engine(
+            async_database_url(DATABASE_URL),
+            connect_args={"statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+            **_pool_args(DATABASE_URL),
+        )
+        # expire_on_commit=False: attributes stay readable after commit
+        # without an implicit (awaitable-only) refresh
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    except ImportError as e:
+        print(f"DEBUG: Async DB layer disabled ({e})")
+
 Base = declarative_base()
 
 # Helper function to get DB session
@@ -39,4 +101,53 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+class AsyncDB:
+    """
+    Request-scoped handle for async routes. The existing sync helpers
+    (repository, dedup, skills, ...) run through run(fn, *args) as
+    fn(session, *args): on the asyncpg engine via AsyncSession.run_sync,
+    so I/O awaits instead of blocking the event loop. Without the async
+    engine (SQLite, asyncpg missing) they run inline on a sync session.
+    """
+
+    def __init__(self, async_session=None, sync_session=None):
+        self._async = async_session
+        self._sync = sync_session
+
+    async def run(self, fn, *args, **kwargs):
+        if self._async is not None:
+            return await self._async.run_sync(fn, *args, **kwargs)
+        return fn(self._sync, *args, **kwargs)
+
+    async def commit(self):
+        if self._async is not None:
+            await self._async.commit()
+        else:
+            self._sync.commit()
+
+
+async def get_async_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield AsyncDB(async_session=session)
+        return
+    db = SessionLocal()
+    try:
+        yield AsyncDB(sync_session=db)
+    finally:
+        db.close()
+
+
+async def run_db(fn, *args, **kwargs):
+    """fn(session, *args) in its own short-lived session (polling loops, one-off lookups)."""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(fn, *args, **kwargs)
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
@@ -0,0 +1,168 @@
+import os
+import re
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+import models
+
+# --- DEDUP CONFIG ---
+# Max differing bits (of 64) for two resumes to count as the same document
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", 3))
+# Texts with fewer shingles than this are too short to fingerprint reliably
+NEAR_DUP_MIN_SHINGLES = 50
+
+SIMHASH_BITS = 64
+# 4 bands of 16 bits: by pigeonhole, two hashes within 3 bits of each other
+# agree exactly on at least one band, so band lookups find every candidate.
+SIMHASH_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+
+# --- 1. FINGERPRINTS ---
+
+def file_hash(content: bytes) -> str:
+    """Exact-duplicate key: sha256 of the uploaded bytes (checked before extraction)."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _shingles(text: str, size: int = 3) -> List[str]:
+    words = re.findall(r"[a-z0-9+#.]+", text.lower())
+    return [" ".join(words[i:i + size]) for i in range(max(0, len(words) - size + 1))]
+
+
+def _to_signed(value: int) -> int:
+    # Postgres BIGINT is signed
+    return value - (1 << SIMHASH_BITS) if value >= (1 << (SIMHASH_BITS - 1)) else value
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash over word 3-shingles, as a signed int. None for short texts."""
+    shingles = _shingles(text or "")
+    if len(shingles) < NEAR_DUP_MIN_SHINGLES:
+        return None
+
+    weights = [0] * SIMHASH_BITS
+    for sh in shingles:
+        h = int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    value = 0
+    for bit, w in enumerate(weights):
+        if w > 0:
+            value |= 1 << bit
+    return _to_signed(value)
+
+
+def hamming(a: int, b: int) -> int:
+    mask = (1 << SIMHASH_BITS) - 1
+    return bin((a & mask) ^ (b & mask)).count("1")
+
+
+def bands(h: int) -> List[int]:
+    unsigned = h & ((1 << SIMHASH_BITS) - 1)
+    mask = (1 << _BAND_BITS) - 1
+    return [(unsigned >> (i * _BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+
+# --- 2. LOOKUPS ---
+
+def find_exact(db: Session, hashes: Iterable[str]) -> Dict[str, int]:
+    """{content_hash: candidate_id} for hashes already in the DB (one query)."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    rows = (
+        db.query(models.Candidate.content_hash, models.Candidate.id)
+        .filter(models.Candidate.content_hash.in_(hashes))
+        .order_by(models.Candidate.id)
+        .all()
+    )
+    found = {}
+    for h, cid in rows:
+        found.setdefault(h, cid)
+    return found
+
+
+def find_near_duplicate(db: Session, h: Optional[int]) -> Optional[int]:
+    """
+    Id of the original candidate whose SimHash is within NEAR_DUP_MAX_DISTANCE
+    of `h`, following duplicate_of links to the first version. None if no match.
+    """
+    if h is None:
+        return None
+
+    band_filters = [
+        (models.CandidateSimhashBand.band == i) & (models.CandidateSimhashBand.value == v)
+        for i, v in enumerate(bands(h))
+    ]
+    rows = (
+        db.query(models.Candidate.id, models.Candidate.simhash, models.Candidate.duplicate_of_id)
+        .join(models.CandidateSimhashBand, models.CandidateSimhashBand.candidate_id == models.Candidate.id)
+        .filter(or_(*band_filters))
+        .distinct()
+        .all()
+    )
+
+    best = None
+    for cid, other, root in rows:
+        if other is None:
+            continue
+        dist = hamming(h, other)
+        if dist <= NEAR_DUP_MAX_DISTANCE and (best is None or dist < best[0]):
+            best = (dist, root or cid)
+    return best[1] if best else None
+
+
+# --- 3. REGISTRATION ---
+
+def fingerprint(db: Session, cand: models.Candidate, content: bytes, text: str):
+    """
+    Set content_hash / simhash / duplicate_of_id on a new candidate.
+    Call before the candidate is flushed.
+    """
+    cand.content_hash = file_hash(content)
+    cand.simhash = simhash(text)
+    cand.duplicate_of_id = find_near_duplicate(db, cand.simhash)
+
+
+def index_bands(db: Session, cands: Iterable[models.Candidate]):
+    """Add band rows for flushed candidates (ids assigned). Does not commit."""
+    db.add_all([
+        models.CandidateSimhashBand(candidate_id=c.id, band=i, value=v)
+        for c in cands if c.simhash is not None
+        for i, v in enumerate(bands(c.simhash))
+    ])
+
+
+def link_batch(cands: List[models.Candidate]) -> int:
+    """
+    Link near-duplicates within one upload batch, which find_near_duplicate
+    cannot see (their band rows are not written yet). Call after the batch
+    is flushed (ids assigned); earlier candidates are the originals.
+    Returns the number of links added. Does not commit.
+    """
+    by_band: Dict[tuple, List[models.Candidate]] = {}
+    linked = 0
+    for cand in cands:
+        if cand.simhash is None:
+            continue
+        keys = list(enumerate(bands(cand.simhash)))
+
+        if cand.duplicate_of_id is None:
+            seen = {other.id: other for key in keys for other in by_band.get(key, [])}
+            best = None
+            for other in seen.values():
+                dist = hamming(cand.simhash, other.simhash)
+                if dist <= NEAR_DUP_MAX_DISTANCE and (best is None or dist < best[0]):
+                    best = (dist, other.duplicate_of_id or other.id)
+            if best:
+                cand.duplicate_of_id = best[1]
+                linked += 1
+
+        for key in keys:
+            by_band.setdefault(key, []).append(cand)
+    return linked
@@ -0,0 +1,165 @@
+import os
+import io
+import csv
+from typing import Iterator
+
+from database import SessionLocal
+import models
+
+# Optional columnar export
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+# --- EXPORT CONFIG ---
+# Rows fetched per server-side cursor round-trip / per Parquet row group
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+CSV_HEADER = [
+    "Name", "Email", "Score", "Status", "Reason",
+    "Experience Score", "Skills Score", "Role Alignment Score",
+    "Stability", "Skills Found", "Missing Skills",
+]
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _export_query(db, job_id: int):
+    return (
+        db.query(
+            models.Candidate.name,
+            models.Candidate.email,
+            models.Application.match_score,
+            models.Application.status,
+            models.Application.reasoning,
+            models.Application.experience_score,
+            models.Application.skills_score,
+            models.Application.role_alignment_score,
+            models.Application.stability_flag,
+            models.Application.skills_found,
+            models.Application.missing_skills,
+        )
+        .join(models.Application)
+        .filter(models.Application.job_id == job_id)
+        .order_by(models.Application.match_score.desc(), models.Application.id)
+        .execution_options(stream_results=True)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+
+def _iter_rows(job_id: int):
+    """
+    Server-side cursor over the export rows. The generator owns its own
+    session: request-scoped sessions are closed before streaming begins.
+    """
+    db = SessionLocal()
+    try:
+        for row in _export_query(db, job_id):
+            yield row
+    finally:
+        db.close()
+
+
+def _join(values) -> str:
+    return "; ".join(str(v) for v in (values or []))
+
+
+def stream_csv(job_id: int) -> Iterator[str]:
+    """Yield the CSV export in chunks of EXPORT_BATCH_SIZE rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_HEADER)
+
+    pending = 0
+    for r in _iter_rows(job_id):
+        writer.writerow([
+            r.name, r.email, r.match_score, r.status, r.reasoning,
+            r.experience_score, r.skills_score, r.role_alignment_score,
+            r.stability_flag, _join(r.skills_found), _join(r.missing_skills),
+        ])
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+            pending = 0
+
+    yield buf.getvalue()
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only buffer whose contents are handed out (and cleared) on drain()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_parquet(job_id: int) -> Iterator[bytes]:
+    """Yield a Parquet file, one row group per EXPORT_BATCH_SIZE rows."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+
+    schema = pa.schema([
+        ("name", pa.string()),
+        ("email", pa.string()),
+        ("score", pa.int32()),
+        ("status", pa.string()),
+        ("reasoning", pa.string()),
+        ("experience_score", pa.int32()),
+        ("skills_score", pa.int32()),
+        ("role_alignment_score", pa.int32()),
+        ("stability_flag", pa.string()),
+        ("skills_found", pa.list_(pa.string())),
+        ("missing_skills", pa.list_(pa.string())),
+    ])
+
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch = {name: [] for name in schema.names}
+
+    def _write_batch():
+        writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+        for values in batch.values():
+            values.clear()
+
+    try:
+        for r in _iter_rows(job_id):
+            batch["name"].append(r.name)
+            batch["email"].append(r.email)
+            batch["score"].append(r.match_score)
+            batch["status"].append(r.status)
+            batch["reasoning"].append(r.reasoning)
+            batch["experience_score"].append(r.experience_score)
+            batch["skills_score"].append(r.skills_score)
+            batch["role_alignment_score"].append(r.role_alignment_score)
+            batch["stability_flag"].append(r.stability_flag)
+            batch["skills_found"].append([str(s) for s in (r.skills_found or [])])
+            batch["missing_skills"].append([str(s) for s in (r.missing_skills or [])])
+
+            if len(batch["name"]) >= EXPORT_BATCH_SIZE:
+                _write_batch()
+                yield sink.drain()
+
+        if batch["name"]:
+            _write_batch()
+    finally:
+        writer.close()
+
+    yield sink.drain()
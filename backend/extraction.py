@@ -0,0 +1,142 @@
+import os
+import asyncio
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+import services
+
+# --- EXTRACTION SERVICE CONFIG ---
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", os.cpu_count() or 2))
+# Wall-clock budget per document, enforced inside the worker (SIGALRM)
+EXTRACT_TIMEOUT_SECONDS = int(os.getenv("EXTRACT_TIMEOUT_SECONDS", 30))
+# Only the first N pages of a PDF are parsed
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", 50))
+# Address-space cap per worker process; 0 disables
+EXTRACT_MAX_MEMORY_MB = int(os.getenv("EXTRACT_MAX_MEMORY_MB", 1024))
+# Documents larger than this are rejected without parsing
+EXTRACT_MAX_FILE_MB = int(os.getenv("EXTRACT_MAX_FILE_MB", 25))
+
+# Extra time the parent waits beyond the in-worker alarm before giving up
+_PARENT_GRACE_SECONDS = 5
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+# --- 1. WORKER SIDE ---
+
+def _init_worker(max_memory_mb: int):
+    """Runs once per worker process: apply the memory cap."""
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except Exception as e:  # non-POSIX platforms
+        print(f"Extraction worker: memory cap not applied ({e})")
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _extract_in_worker(content: bytes, filename: str, max_pages: int, timeout: int) -> str:
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.alarm(timeout)
+    try:
+        return services.smart_extract(content, filename, max_pages=max_pages)
+    except (ExtractionTimeout, MemoryError) as e:
+        print(f"Extraction aborted for {filename}: {type(e).__name__}")
+        return ""
+    finally:
+        signal.alarm(0)
+
+
+# --- 2. POOL MANAGEMENT ---
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=EXTRACT_WORKERS,
+                initializer=_init_worker,
+                initargs=(EXTRACT_MAX_MEMORY_MB,),
+            )
+        return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor):
+    """Replace a pool whose worker died (e.g. killed by the OS)."""
+    global _pool
+    if broken is None:
+        return
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _too_large(content: bytes, filename: str) -> bool:
+    if len(content) > EXTRACT_MAX_FILE_MB * 1024 * 1024:
+        print(f"Extraction skipped for {filename}: larger than {EXTRACT_MAX_FILE_MB} MB")
+        return True
+    return False
+
+
+# --- 3. PUBLIC API ---
+
+def _submit(content: bytes, filename: str) -> Tuple[Optional[ProcessPoolExecutor], Future]:
+    """(pool the document went to, future); the pool is None when it was never submitted."""
+    if _too_large(content, filename):
+        fut: Future = Future()
+        fut.set_result("")
+        return None, fut
+
+    pool = _get_pool()
+    try:
+        return pool, pool.submit(
+            _extract_in_worker, content, filename, EXTRACT_MAX_PAGES, EXTRACT_TIMEOUT_SECONDS
+        )
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        pool = _get_pool()
+        return pool, pool.submit(
+            _extract_in_worker, content, filename, EXTRACT_MAX_PAGES, EXTRACT_TIMEOUT_SECONDS
+        )
+
+
+def submit(content: bytes, filename: str) -> Future:
+    """Queue one document; returns a concurrent.futures.Future[str]."""
+    return _submit(content, filename)[1]
+
+
+async def extract(content: bytes, filename: str) -> str:
+    """
+    Awaitable document-to-text. Parsing runs in a separate process with
+    a page limit, a memory cap and a timeout, so a pathological file can
+    neither block the event loop nor take the API worker down with it.
+    Never raises; returns "" on failure.
+    """
+    pool, fut = _submit(content, filename)
+    try:
+        return await asyncio.wait_for(
+            asyncio.wrap_future(fut), timeout=EXTRACT_TIMEOUT_SECONDS + _PARENT_GRACE_SECONDS
+        )
+    except BrokenProcessPool:
+        # Only the pool this document ran on; a replacement may already be serving
+        _reset_pool(pool)
+    except asyncio.TimeoutError:
+        print(f"Extraction timed out for {filename}")
+    except Exception as e:
+        print(f"Extraction failed for {filename}: {e}")
+    return ""
@@ -0,0 +1,295 @@
+import os
+import time
+import uuid
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from database import SessionLocal
+import models
+import services
+import extraction
+import dedup
+import skills
+import repository
+import vector_db
+
+# --- INGESTION CONFIG ---
+INGEST_QDRANT_BATCH = int(os.getenv("INGEST_QDRANT_BATCH", vector_db.QDRANT_UPSERT_BATCH))
+# Progress is persisted (ingestion_jobs table) so any API worker can answer
+# status polls. Counter updates within a stage are written at most this
+# often; stage changes and the final state are always written.
+INGEST_PROGRESS_SECONDS = float(os.getenv("INGEST_PROGRESS_SECONDS", 1.0))
+# Finished ingest records older than this are deleted when a new one is created
+INGEST_JOB_RETENTION_DAYS = int(os.getenv("INGEST_JOB_RETENTION_DAYS", 7))
+
+_PROGRESS_FIELDS = (
+    "status", "total", "extracted", "saved", "embedded", "indexed",
+    "duplicates", "near_duplicates", "candidate_ids", "errors",
+)
+# ingest_id -> monotonic time of the last progress write (this process)
+_last_saved: Dict[str, float] = {}
+
+
+def _as_dict(row: models.IngestionJob) -> dict:
+    return {"ingest_id": row.id, **{f: getattr(row, f) for f in _PROGRESS_FIELDS}}
+
+
+def create_ingest_job(db, total: int) -> str:
+    """Insert a queued ingest record (commits) and prune old finished ones."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=INGEST_JOB_RETENTION_DAYS)
+    db.query(models.IngestionJob).filter(
+        models.IngestionJob.status.in_(["done", "error"]),
+        models.IngestionJob.created_at < cutoff,
+    ).delete(synchronize_session=False)
+
+    ingest_id = uuid.uuid4().hex
+    db.add(models.IngestionJob(
+        id=ingest_id, status="queued", total=total, extracted=0, saved=0,
+        embedded=0, indexed=0, duplicates=0, near_duplicates=0,
+        candidate_ids=[], errors=[],
+    ))
+    db.commit()
+    return ingest_id
+
+
+def get_ingest_job(db, ingest_id: str) -> Optional[dict]:
+    row = db.query(models.IngestionJob).filter(models.IngestionJob.id == ingest_id).first()
+    return _as_dict(row) if row else None
+
+
+def _load(ingest_id: str) -> dict:
+    db = SessionLocal()
+    try:
+        return get_ingest_job(db, ingest_id)
+    finally:
+        db.close()
+
+
+def _save(job: dict, throttle: bool = False):
+    """Write the in-memory progress record to its row (own session, commits)."""
+    now = time.monotonic()
+    if throttle and now - _last_saved.get(job["ingest_id"], 0.0) < INGEST_PROGRESS_SECONDS:
+        return
+    _last_saved[job["ingest_id"]] = now
+
+    db = SessionLocal()
+    try:
+        db.query(models.IngestionJob).filter(
+            models.IngestionJob.id == job["ingest_id"]
+        ).update({f: job[f] for f in _PROGRESS_FIELDS}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Ingest progress write failed for {job['ingest_id']}: {e}")
+    finally:
+        db.close()
+
+    if job["status"] in ("done", "error"):
+        _last_saved.pop(job["ingest_id"], None)
+
+
+def _stage(job: dict, status: str):
+    job["status"] = status
+    _save(job)
+
+
+def _extract_all(job: dict, files: List[Tuple[str, bytes]]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Stage 1: parse every file in the extraction pool, preserving upload order.
+    Failed or empty extractions come back as None and are reported in errors.
+    """
+    texts: List[Optional[str]] = [None] * len(files)
+    futures = {
+        extraction.submit(content, filename): i
+        for i, (filename, content) in enumerate(files)
+    }
+    for fut in as_completed(futures):
+        i = futures[fut]
+        try:
+            text = fut.result()
+        except Exception as e:
+            job["errors"].append(f"{files[i][0]}: extraction failed ({e})")
+        else:
+            if text and text.strip():
+                texts[i] = text
+            else:
+                job["errors"].append(f"{files[i][0]}: no text extracted, not saved")
+        job["extracted"] += 1
+        _save(job, throttle=True)
+    return [(filename, text) for (filename, _), text in zip(files, texts)]
+
+
+def run_resume_ingestion(ingest_id: str, files: List[Tuple[str, bytes]]):
+    """
+    Staged pipeline for /bulk/resumes/:
+    dedup (content hash) → extract (extraction pool) → bulk insert →
+    batched embeddings → batched Qdrant upserts.
+    Exact duplicates (already stored, or repeated in this upload) reuse the
+    existing candidate and skip every later stage.
+    Progress is persisted to the ingestion_jobs row as the stages advance.
+    """
+    job = _load(ingest_id)
+    db = SessionLocal()
+
+    try:
+        # 0) Exact-duplicate short-circuit, before any parsing
+        hashes = [dedup.file_hash(content) for _, content in files]
+        existing = dedup.find_exact(db, hashes)
+
+        new_files, new_hashes, seen = [], [], set()
+        for (filename, content), h in zip(files, hashes):
+            if h in existing or h in seen:
+                continue
+            seen.add(h)
+            new_files.append((filename, content))
+            new_hashes.append(h)
+        job["duplicates"] = len(files) - len(new_files)
+
+        # 1) Extraction (new documents only)
+        _stage(job, "extracting")
+        extracted = _extract_all(job, new_files)
+
+        # Documents that failed to parse are not stored, embedded or indexed
+        docs = [
+            (filename, text, content, h)
+            for (filename, text), (_, content), h in zip(extracted, new_files, new_hashes)
+            if text is not None
+        ]
+
+        # 2) One bulk insert + single commit for all candidates
+        _stage(job, "saving")
+        cands = []
+        for filename, text, content, _ in docs:
+            cand = models.Candidate(
+                name=filename,
+                email="unknown",
+                resume_text=text,
+                resume_preview=repository.resume_preview(text),
+                file_path=f"bulk/{filename}",
+            )
+            dedup.fingerprint(db, cand, content, text)
+            cands.append(cand)
+        db.add_all(cands)
+        db.flush()  # populates ids via one multi-row INSERT ... RETURNING
+        # Near-duplicates of each other within this batch (not yet banded)
+        dedup.link_batch(cands)
+        dedup.index_bands(db, cands)
+        rows = [(c.id, c.name, text) for c, (_, text, _, _) in zip(cands, docs)]
+        skills.index_candidates(db, [(cid, text) for cid, _, text in rows])
+        job["near_duplicates"] = sum(1 for c in cands if c.duplicate_of_id)
+        db.commit()
+        job["saved"] = len(rows)
+
+        # Upload order, one id per distinct document
+        new_ids = {h: cid for (_, _, _, h), (cid, _, _) in zip(docs, rows)}
+        ids = []
+        for h in hashes:
+            cid = existing.get(h) or new_ids.get(h)
+            if cid is not None and cid not in ids:
+                ids.append(cid)
+        job["candidate_ids"] = ids
+
+        # 3) Batched embeddings (token-budgeted inside services)
+        _stage(job, "embedding")
+        texts = [text for _, _, text in rows]
+        vectors = services.get_embeddings(texts)
+        chunk_vectors = services.get_resume_chunk_embeddings(texts) if services.CHUNKED_RESUMES else None
+        job["embedded"] = len(vectors)
+
+        # 4) Batched Qdrant upserts
+        _stage(job, "indexing")
+        payloads = [
+            {"name": name, "text_preview": repository.resume_preview(text)}
+            for _, name, text in rows
+        ]
+        points = [
+            (cid, vec, payload)
+            for (cid, _, _), vec, payload in zip(rows, vectors, payloads)
+            if any(vec)
+        ]
+        def _indexed(n):
+            job["indexed"] += n
+            _save(job, throttle=True)
+
+        try:
+            vector_db.store_resume_vectors(
+                points, batch_size=INGEST_QDRANT_BATCH, on_chunk=_indexed
+            )
+        except vector_db.BatchUpsertError as e:
+            for start, err in e.failed:
+                job["errors"].append(f"Qdrant batch {start // INGEST_QDRANT_BATCH}: {err}")
+
+        if chunk_vectors is not None:
+            try:
+                vector_db.store_resume_chunks(
+                    [(cid, vecs, payload)
+                     for (cid, _, _), vecs, payload in zip(rows, chunk_vectors, payloads)],
+                    batch_size=INGEST_QDRANT_BATCH,
+                )
+            except vector_db.BatchUpsertError as e:
+                job["errors"].append(f"Qdrant chunk upsert: {e}")
+
+        _stage(job, "done")
+
+    except Exception as e:
+        db.rollback()
+        print(f"Bulk ingestion {ingest_id} failed: {e}")
+        job["errors"].append(str(e))
+        _stage(job, "error")
+
+    finally:
+        db.close()
+
+
+def run_chunk_reindex(ingest_id: str):
+    """
+    Backfill the chunked-resume collection for every stored candidate
+    (keyset pages), keeping each point's batch_id payload.
+    Progress goes to the same job record as uploads.
+    """
+    job = _load(ingest_id)
+    db = SessionLocal()
+    last_id = 0
+
+    try:
+        _stage(job, "indexing")
+        while True:
+            page = (
+                db.query(models.Candidate.id, models.Candidate.name, models.Candidate.resume_text)
+                .filter(models.Candidate.id > last_id)
+                .order_by(models.Candidate.id)
+                .limit(INGEST_QDRANT_BATCH)
+                .all()
+            )
+            if not page:
+                break
+            last_id = page[-1].id
+
+            ids = [r.id for r in page]
+            batches = vector_db.get_resume_payloads(ids)
+            chunk_vectors = services.get_resume_chunk_embeddings([r.resume_text or "" for r in page])
+            job["embedded"] += len(page)
+
+            items = []
+            for r, vecs in zip(page, chunk_vectors):
+                payload = {"name": r.name, "text_preview": repository.resume_preview(r.resume_text)}
+                if batches.get(r.id, {}).get("batch_id"):
+                    payload["batch_id"] = batches[r.id]["batch_id"]
+                items.append((r.id, vecs, payload))
+            try:
+                job["indexed"] += vector_db.store_resume_chunks(items)
+            except vector_db.BatchUpsertError as e:
+                job["indexed"] += e.written
+                job["errors"].append(f"Qdrant chunk upsert after id {ids[0]}: {e}")
+            _save(job, throttle=True)
+
+        _stage(job, "done")
+
+    except Exception as e:
+        print(f"Chunk reindex {ingest_id} failed: {e}")
+        job["errors"].append(str(e))
+        _stage(job, "error")
+
+    finally:
+        db.close()
@@ -0,0 +1,332 @@
+import os
+import time
+import random
+import threading
+from typing import Callable, Optional
+
+import litellm
+
+# --- LLM CLIENT CONFIG ---
+# Provider quotas per client (requests / estimated tokens per minute).
+# 0 disables the corresponding bucket.
+LLM_RPM = int(os.getenv("LLM_RPM", 1000))
+LLM_TPM = int(os.getenv("LLM_TPM", 1_000_000))
+EMBED_RPM = int(os.getenv("EMBED_RPM", 1500))
+EMBED_TPM = int(os.getenv("EMBED_TPM", 1_000_000))
+# Completion tokens assumed per call when charging the TPM bucket up front
+LLM_OUTPUT_TOKENS_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKENS_ESTIMATE", 600))
+# AIMD concurrency window: grows by ~1 per window of successes, halves on a 429
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", 1))
+# Retries for transient errors (429, 5xx, timeouts), full-jitter backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 5))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", 1.0))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", 60.0))
+# Circuit breaker: consecutive transient failures before failing fast, and
+# how long to stay open before letting a trial call through.
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", 8))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", 30.0))
+
+_CHARS_PER_TOKEN = 4
+
+
+class LLMUnavailableError(Exception):
+    """
+    The provider could not serve the call: retries exhausted on transient
+    errors, or the circuit breaker is open. Callers must not turn this into
+    a score; the pair is retried later.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# --- 1. BUILDING BLOCKS ---
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to one minute's worth; acquire() blocks."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0):
+        if self.capacity <= 0:
+            return
+        # A single oversized request may take the whole bucket, never more
+        amount = min(float(amount), self.capacity)
+        with self._cond:
+            while True:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                self._cond.wait((amount - self.level) / self.rate)
+
+    def refund(self, amount: float):
+        """Return over-charged units (e.g. when the real token count was lower)."""
+        if self.capacity <= 0 or amount <= 0:
+            return
+        with self._cond:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+            self._cond.notify_all()
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency window: additive increase on success, halve on throttling."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class CircuitBreaker:
+    """closed → open after `threshold` consecutive failures → half-open after `cooldown`."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            remaining = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            raise LLMUnavailableError("LLM circuit breaker is open", retry_after=remaining or 1.0)
+
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def on_neutral(self):
+        # A non-transient error says nothing about provider health
+        with self._lock:
+            self._trial_in_flight = False
+
+
+def _status_code(err: Exception) -> Optional[int]:
+    code = getattr(err, "status_code", None)
+    if code is None:
+        code = getattr(getattr(err, "response", None), "status_code", None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit(err: Exception) -> bool:
+    if isinstance(err, getattr(litellm, "RateLimitError", ())):
+        return True
+    text = str(err).lower()
+    return _status_code(err) == 429 or "resource_exhausted" in text or "rate limit" in text
+
+
+def is_transient(err: Exception) -> bool:
+    transient = tuple(
+        getattr(litellm, name) for name in (
+            "Timeout", "APIConnectionError", "ServiceUnavailableError", "InternalServerError",
+        ) if hasattr(litellm, name)
+    )
+    if is_rate_limit(err) or isinstance(err, transient) or isinstance(err, (TimeoutError, ConnectionError)):
+        return True
+    code = _status_code(err)
+    return code is not None and (code >= 500 or code == 408)
+
+
+def _retry_after(err: Exception) -> Optional[float]:
+    headers = getattr(getattr(err, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+# --- 2. CLIENT ---
+
+class LLMClient:
+    """
+    Wraps one kind of provider call (chat completions or embeddings) with
+    RPM/TPM token buckets, an AIMD concurrency window, jittered exponential
+    retry for transient errors and a circuit breaker. Thread-safe; shared by
+    every request handler, AutoDrive worker and ingestion thread.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.limiter = AdaptiveLimiter(
+            initial=max(LLM_MIN_CONCURRENCY, LLM_MAX_CONCURRENCY // 2),
+            minimum=LLM_MIN_CONCURRENCY,
+            maximum=LLM_MAX_CONCURRENCY,
+        )
+        self.breaker = CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN_SECONDS)
+        self._lock = threading.Lock()
+        self.counts = {"calls": 0, "retries": 0, "throttled": 0, "failed": 0, "rejected": 0}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def call(self, fn: Callable, *args, est_tokens: int = 0, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                self.breaker.before_call()
+            except LLMUnavailableError:
+                self._count("rejected")
+                raise
+
+            self.limiter.acquire()
+            try:
+                self.requests.acquire(1)
+                self.tokens.acquire(est_tokens)
+                self._count("calls")
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.limiter.release()
+                if not is_transient(e):
+                    self.breaker.on_neutral()
+                    raise
+                if is_rate_limit(e):
+                    # Quota pressure is the limiter's job; only outages trip the breaker
+                    self._count("throttled")
+                    self.limiter.on_throttle()
+                    self.breaker.on_neutral()
+                else:
+                    self.breaker.on_failure()
+
+                attempt += 1
+                if attempt > LLM_MAX_RETRIES:
+                    self._count("failed")
+                    raise LLMUnavailableError(
+                        f"{self.name}: gave up after {attempt} attempts: {e}",
+                        retry_after=LLM_RETRY_BASE_SECONDS,
+                    ) from e
+                # Full jitter, floored by the server's Retry-After when given
+                delay = random.uniform(
+                    0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+                )
+                delay = max(delay, _retry_after(e) or 0.0)
+                self._count("retries")
+                print(f"[LLM] {self.name} transient error ({e.__class__.__name__}), "
+                      f"retry {attempt}/{LLM_MAX_RETRIES} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            self.limiter.release()
+            self.limiter.on_success()
+            self.breaker.on_success()
+            self._refund_tokens(result, est_tokens)
+            return result
+
+    def _refund_tokens(self, result, est_tokens: int):
+        usage = getattr(result, "usage", None)
+        if usage is None and isinstance(result, dict):
+            usage = result.get("usage")
+        total = getattr(usage, "total_tokens", None)
+        if total is None and isinstance(usage, dict):
+            total = usage.get("total_tokens")
+        if total:
+            self.tokens.refund(est_tokens - total)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        return {
+            **counts,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "breaker": self.breaker.state,
+        }
+
+
+chat_client = LLMClient("chat", LLM_RPM, LLM_TPM)
+embed_client = LLMClient("embed", EMBED_RPM, EMBED_TPM)
+
+
+# --- 3. DROP-IN CALLS ---
+
+def _estimate(text: str) -> int:
+    return len(text or "") // _CHARS_PER_TOKEN
+
+
+def completion(**kwargs):
+    """litellm.completion through the shared chat client."""
+    prompt = sum(_estimate(str(m.get("content", ""))) for m in kwargs.get("messages", []))
+    return chat_client.call(
+        litellm.completion, est_tokens=prompt + LLM_OUTPUT_TOKENS_ESTIMATE, **kwargs
+    )
+
+
+def embedding(**kwargs):
+    """litellm.embedding through the shared embedding client."""
+    inputs = kwargs.get("input") or []
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    return embed_client.call(
+        litellm.embedding, est_tokens=sum(_estimate(t) for t in inputs), **kwargs
+    )
+
+
+def stats() -> dict:
+    return {"chat": chat_client.stats(), "embed": embed_client.stats()}
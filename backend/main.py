@@ -1,13 +1,14 @@
 from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import io
-import csv
+import os
+import numpy as np
 import traceback
 import json
 import time
@@ -17,7 +18,7 @@ from jose import jwt, JWTError
 from models import Deployment
 
 # Local Imports
-from database import get_db, engine
+from database import get_db, get_async_db, run_db, AsyncDB, engine
 import models
 import services
 import storage
@@ -25,12 +26,27 @@ import vector_db
 import chat_service
 import auth
 import websocket_routes
-from store import active_autodrive_sessions
+import cache
+import similarity
+import ingestion
+import autodrive
+import repository
+import migrations
+import exporter
+import extraction
+import dedup
+import prescorer
+import skills
+import rescoring
+import compaction
+import llm_client
+import scoring_engine
 
 from fastapi import BackgroundTasks
 
 # Initialize Tables
 models.Base.metadata.create_all(bind=engine)
+migrations.run_migrations(engine)
 
 app = FastAPI()
 
@@ -50,6 +66,16 @@ app.add_middleware(
 
 # app.include_router(websocket_routes.router)
 
+
+# LLM quota exhausted / provider down: a retryable 503, never a fake score
+@app.exception_handler(llm_client.LLMUnavailableError)
+async def llm_unavailable_handler(request, exc: llm_client.LLMUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+    )
+
 # --- AUTH SETUP ---
 # from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -112,9 +138,10 @@ def get_current_user(db: Session = Depends(get_db)):
 
 # --- STARTUP ---
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     storage.init_bucket()
     vector_db.init_collections()
+    await autodrive.start_workers()
 
 
 # --- JOB MANAGEMENT ---
@@ -126,13 +153,18 @@ def get_jobs(db: Session = Depends(get_db)):
 @app.post("/jobs/")
 def create_job(title: str = Form(...), description: str = Form(...),
                db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    new_job = models.Job(title=title, description=description)
+    new_job = models.Job(
+        title=title, description=description,
+        description_hash=repository.description_hash(description),
+    )
     db.add(new_job)
+    db.flush()
+    skills.index_job(db, new_job.id, description)
     db.commit()
     db.refresh(new_job)
 
     try:
-        services.get_embedding(f"{title}. {description}")
+        services.store_job_embedding(new_job.id, new_job.title, new_job.description)
     except Exception as e:
         print("Embedding warning:", e)
 
@@ -144,17 +176,86 @@ async def upload_jd(file: UploadFile = File(...), db: Session = Depends(get_db),
                     current_user: models.User = Depends(get_current_user)):
 
     content = await file.read()
-    text = services.smart_extract(content, file.filename)
+    text = await extraction.extract(content, file.filename)
     jd = services.parse_jd(text)
 
-    new_job = models.Job(title=jd["title"], description=jd["description"])
+    new_job = models.Job(
+        title=jd["title"], description=jd["description"],
+        description_hash=repository.description_hash(jd["description"]),
+    )
     db.add(new_job)
+    db.flush()
+    skills.index_job(db, new_job.id, new_job.description)
     db.commit()
     db.refresh(new_job)
 
+    try:
+        await asyncio.to_thread(
+            services.store_job_embedding, new_job.id, new_job.title, new_job.description
+        )
+    except Exception as e:
+        print("Embedding warning:", e)
+
     return {"id": new_job.id, "title": new_job.title}
 
 
+@app.put("/jobs/{job_id}")
+async def update_job(job_id: int, title: Optional[str] = Form(None),
+                     description: Optional[str] = Form(None), rescore: bool = True,
+                     db: AsyncDB = Depends(get_async_db),
+                     current_user: models.User = Depends(get_current_user)):
+    """
+    Edit a job. A description change bumps the job version and (by default)
+    queues background re-scoring of only the applications it made stale.
+    """
+    def _edit(s):
+        job = s.query(models.Job).filter(models.Job.id == job_id).first()
+        if not job:
+            return None, False
+        if title is not None:
+            job.title = title
+        changed = description is not None and rescoring.stamp_job(job, description)
+        if changed:
+            skills.index_job(s, job.id, job.description)
+        s.commit()
+        s.refresh(job)
+        return job, changed
+
+    job, changed = await db.run(_edit)
+    if not job:
+        raise HTTPException(404, "Job not found")
+
+    if changed or title is not None:
+        try:
+            await asyncio.to_thread(
+                services.store_job_embedding, job.id, job.title, job.description
+            )
+        except Exception as e:
+            print("Embedding warning:", e)
+
+    run_ids = await rescoring.rescore_job(db, job.id) if rescore else []
+    return {"id": job.id, "title": job.title, "version": job.version,
+            "changed": changed, "rescore_run_ids": run_ids}
+
+
+@app.get("/jobs/{job_id}/stale")
+def job_stale(job_id: int, db: Session = Depends(get_db)):
+    stale = rescoring.stale_applications(db, job_id)
+    return {"job_id": job_id, "stale": sum(len(ids) for ids in stale.values()),
+            "by_mode": {mode: len(ids) for mode, ids in stale.items()}}
+
+
+@app.post("/jobs/{job_id}/rescore")
+async def job_rescore(job_id: int, db: AsyncDB = Depends(get_async_db)):
+    return {"job_id": job_id, "run_ids": await rescoring.rescore_job(db, job_id)}
+
+
+@app.post("/rescore/stale")
+async def rescore_stale(db: AsyncDB = Depends(get_async_db)):
+    """Re-score every stale application, e.g. after a prompt version bump."""
+    return {"run_ids": await rescoring.rescore_all(db)}
+
+
 @app.delete("/jobs/{job_id}")
 def delete_job(job_id: int, db: Session = Depends(get_db),
                current_user: models.User = Depends(get_current_user)):
@@ -164,6 +265,9 @@ def delete_job(job_id: int, db: Session = Depends(get_db),
         raise HTTPException(404, "Job not found")
 
     db.query(models.Application).filter(models.Application.job_id == job_id).delete()
+    db.query(models.JobSkill).filter(models.JobSkill.job_id == job_id).delete()
+    # Autodrive checkpoints reference the job too (FK to jobs.id)
+    db.query(models.AutoDriveResult).filter(models.AutoDriveResult.job_id == job_id).delete()
     db.delete(job)
     db.commit()
 
@@ -175,64 +279,83 @@ def delete_job(job_id: int, db: Session = Depends(get_db),
 async def screen_candidate(
     job_id: int = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
     try:
         content = await file.read()
-        resume_text = services.smart_extract(content, file.filename)
 
-        if not resume_text:
-            raise HTTPException(400, "Could not parse document")
-
-        job = db.query(models.Job).filter(models.Job.id == job_id).first()
+        job = await db.run(lambda s: s.query(models.Job).filter(models.Job.id == job_id).first())
         if not job:
             raise HTTPException(404, "Job not found")
+        jd_hash = repository.description_hash(job.description)
+
+        # Exact re-upload: reuse the stored candidate, skip extraction/storage/embedding
+        content_hash = dedup.file_hash(content)
+        existing_id = (await db.run(dedup.find_exact, [content_hash])).get(content_hash)
+        if existing_id:
+            resume_text = await db.run(
+                lambda s: s.query(models.Candidate.resume_text)
+                .filter(models.Candidate.id == existing_id).scalar()
+            )
+            ai = await scoring_engine.run_blocking(
+                services.analyze_candidate, resume_text, job.description
+            )
+            await db.run(repository.upsert_application, job.id, existing_id, ai, jd_hash=jd_hash)
+            await db.commit()
+            return ai
 
-        ai = services.analyze_candidate(resume_text, job.description)
+        resume_text = await extraction.extract(content, file.filename)
 
-        file_obj = io.BytesIO(content)
-        path = storage.upload_file_to_lake(file_obj, file.filename)
+        if not resume_text:
+            raise HTTPException(400, "Could not parse document")
 
-        candidate = models.Candidate(
-            name=ai.get("name", file.filename),
-            email=ai.get("email", "Unknown"),
-            resume_text=resume_text,
-            file_path=path,
+        # LLM call and object storage upload stay off the event loop
+        ai = await scoring_engine.run_blocking(
+            services.analyze_candidate, resume_text, job.description
         )
-        db.add(candidate)
-        db.commit()
-        db.refresh(candidate)
-
-        application = models.Application(
-            job_id=job.id,
-            candidate_id=candidate.id,
-            match_score=ai.get("score", 0),
-            status=ai.get("status", "Reject"),
-            reasoning=ai.get("reasoning", ""),
-            experience_score=ai.get("experience_score", 0),
-            skills_score=ai.get("skills_score", 0),
-            role_alignment_score=ai.get("role_alignment_score", 0),
-            stability_flag=ai.get("stability_flag", "OK"),
-            missing_skills=ai.get("missing_skills", []),
-            skills_found=ai.get("skills_found", []),
+        path = await asyncio.to_thread(
+            storage.upload_file_to_lake, io.BytesIO(content), file.filename
         )
-        db.add(application)
-        db.commit()
+
+        def _save(s):
+            candidate = models.Candidate(
+                name=ai.get("name", file.filename),
+                email=ai.get("email", "Unknown"),
+                resume_text=resume_text,
+                resume_preview=repository.resume_preview(resume_text),
+                file_path=path,
+            )
+            dedup.fingerprint(s, candidate, content, resume_text)
+            s.add(candidate)
+            s.flush()
+            dedup.index_bands(s, [candidate])
+            skills.index_candidates(s, [(candidate.id, resume_text)])
+            repository.upsert_application(s, job.id, candidate.id, ai, jd_hash=jd_hash)
+            return candidate.id, candidate.name, candidate.email, candidate.resume_preview
+
+        cand_id, cand_name, cand_email, preview = await db.run(_save)
+        await db.commit()
 
         # Vector DB store
         try:
-            vec = services.get_embedding(resume_text)
-            vector_db.store_resume_vector(
-                candidate_id=candidate.id,
-                vector=vec,
-                metadata={"name": candidate.name, "email": candidate.email},
+            await asyncio.to_thread(
+                services.index_resume,
+                cand_id,
+                resume_text,
+                metadata={
+                    "name": cand_name,
+                    "email": cand_email,
+                    "text_preview": preview,
+                },
             )
         except Exception as e:
             print("Vector DB error:", e)
 
         return ai
 
+    except llm_client.LLMUnavailableError:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(500, str(e))
@@ -243,49 +366,93 @@ async def screen_candidate(
 async def upload_to_pool(
     file: UploadFile = File(...),
     batch_id: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncDB = Depends(get_async_db),
 ):
     content = await file.read()
-    text = services.smart_extract(content, file.filename)
-    vector = services.get_embedding(text)
-
-    candidate = models.Candidate(
-        name=file.filename,
-        email="pending@pool.com",
-        resume_text=text,
-        file_path=f"pool/{file.filename}",
-    )
-    db.add(candidate)
-    db.commit()
-    db.refresh(candidate)
 
-    vector_db.store_resume_vector(
-        candidate_id=candidate.id,
+    # Exact re-upload: just add this batch to the existing point
+    content_hash = dedup.file_hash(content)
+    existing_id = (await db.run(dedup.find_exact, [content_hash])).get(content_hash)
+    if existing_id:
+        await asyncio.to_thread(vector_db.add_resume_to_batch, existing_id, batch_id)
+        return {"id": existing_id, "duplicate": True}
+
+    text = await extraction.extract(content, file.filename)
+    vector = await asyncio.to_thread(services.get_embedding, text)
+
+    def _save(s):
+        candidate = models.Candidate(
+            name=file.filename,
+            email="pending@pool.com",
+            resume_text=text,
+            resume_preview=repository.resume_preview(text),
+            file_path=f"pool/{file.filename}",
+        )
+        dedup.fingerprint(s, candidate, content, text)
+        s.add(candidate)
+        s.flush()
+        dedup.index_bands(s, [candidate])
+        skills.index_candidates(s, [(candidate.id, text)])
+        return candidate.id, candidate.resume_preview, candidate.duplicate_of_id
+
+    cand_id, preview, duplicate_of = await db.run(_save)
+    await db.commit()
+
+    await asyncio.to_thread(
+        services.index_resume,
+        cand_id,
+        text,
+        metadata={
+            "name": file.filename,
+            "text_preview": preview,
+            "batch_id": batch_id,
+        },
         vector=vector,
-        metadata={"name": file.filename, "text_preview": text[:200], "batch_id": batch_id},
     )
 
-    return {"id": candidate.id}
+    return {"id": cand_id, "duplicate_of": duplicate_of}
 
 
 # --- PLACEMENT DRIVE (Scenario 2) ---
+# Results per job when the request does not say
+DRIVE_MATCH_LIMIT = int(os.getenv("DRIVE_MATCH_LIMIT", 10))
+DRIVE_MATCH_MAX_LIMIT = 500
+
+
 class DriveRequest(BaseModel):
     job_ids: List[int]
     batch_id: str
+    limit: Optional[int] = None
 
 
 @app.post("/drive/match/")
 def run_drive(request: DriveRequest, db: Session = Depends(get_db)):
-    results = {}
-
-    for job_id in request.job_ids:
-        job = db.query(models.Job).filter(models.Job.id == job_id).first()
-        if not job:
-            continue
+    """
+    Top matches from one resume batch for many jobs: one job query, one
+    batched embedding pass for stale job vectors, one Qdrant batch search.
+    """
+    limit = max(1, min(request.limit or DRIVE_MATCH_LIMIT, DRIVE_MATCH_MAX_LIMIT))
 
-        qv = services.get_embedding(f"{job.title}. {job.description}")
-        matches = vector_db.search_resumes_for_job(qv, 10, batch_id=request.batch_id)
+    rows = (
+        db.query(models.Job.id, models.Job.title, models.Job.description)
+        .filter(models.Job.id.in_(request.job_ids))
+        .all()
+    )
+    by_id = {r.id: r for r in rows}
+    jobs = [by_id[jid] for jid in dict.fromkeys(request.job_ids) if jid in by_id]
+    if not jobs:
+        return {}
+
+    vectors = services.get_job_embeddings([(j.id, j.title, j.description) for j in jobs])
+    searchable = [j for j in jobs if any(vectors.get(j.id) or [])]
+    hits = vector_db.search_resumes_for_jobs(
+        [vectors[j.id] for j in searchable], limit, batch_id=request.batch_id,
+        chunked=services.CHUNKED_RESUMES,
+    )
+    matches_by_job = {j.id: m for j, m in zip(searchable, hits)}
 
+    results = {}
+    for job in jobs:
         results[job.title] = [
             {
                 "id": m.id,
@@ -295,7 +462,7 @@ def run_drive(request: DriveRequest, db: Session = Depends(get_db)):
                 "score": round(m.score * 100, 1),
                 "skills": m.payload.get("skills", ""),
             }
-            for m in matches
+            for m in matches_by_job.get(job.id, [])
         ]
 
     return results
@@ -317,35 +484,20 @@ def deep_analysis(req: ScreenExistingRequest, db: Session = Depends(get_db)):
 
     ai = services.analyze_candidate(cand.resume_text, job.description)
 
-    app_row = (
-        db.query(models.Application)
-        .filter(
-            models.Application.job_id == job.id,
-            models.Application.candidate_id == cand.id,
-        )
-        .first()
+    repository.upsert_application(
+        db, job.id, cand.id, ai, jd_hash=repository.description_hash(job.description)
     )
-
-    if not app_row:
-        app_row = models.Application(job_id=job.id, candidate_id=cand.id)
-        db.add(app_row)
-
-    app_row.match_score = ai.get("score", 0)
-    app_row.status = ai.get("status", "Reject")
-    app_row.reasoning = ai.get("reasoning", "")
-    app_row.experience_score = ai.get("experience_score", 0)
-    app_row.skills_score = ai.get("skills_score", 0)
-    app_row.role_alignment_score = ai.get("role_alignment_score", 0)
-    app_row.stability_flag = ai.get("stability_flag", "OK")
-    app_row.missing_skills = ai.get("missing_skills", [])
-    app_row.skills_found = ai.get("skills_found", [])
-
     db.commit()
 
     return ai
 
 
 # --- MATCHMAKER (Scenario 3: free-text search) ---
+# "db": names/previews from Postgres (one IN query); "payload": straight
+# from the Qdrant payload, no DB round-trip (values as of indexing time).
+MATCH_SOURCE = os.getenv("MATCH_SOURCE", "db")
+
+
 class MatchRequest(BaseModel):
     job_description: str
     limit: int = 20
@@ -354,22 +506,38 @@ class MatchRequest(BaseModel):
 @app.post("/match/")
 async def semantic_match(
     job_description: str = Form(...),
-    db: Session = Depends(get_db),
+    limit: int = Form(20),
+    source: Optional[str] = Form(None),
+    db: AsyncDB = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    query_vector = services.get_embedding(job_description)
-    points = vector_db.search_resumes_for_job(query_vector, 20, batch_id=None)
+    source = source or MATCH_SOURCE
+    if source not in ("db", "payload"):
+        raise HTTPException(400, "source must be 'db' or 'payload'")
+
+    query_vector = await asyncio.to_thread(services.get_embedding, job_description)
+    points = await asyncio.to_thread(
+        vector_db.search_resumes_for_job,
+        query_vector, max(1, min(limit, 100)), batch_id=None,
+        payload_fields=["name", "text_preview"], chunked=services.CHUNKED_RESUMES,
+    )
+
+    hydrated = (
+        await db.run(repository.hydrate_candidates, [p.id for p in points])
+        if source == "db" else {}
+    )
 
     matches = []
     for p in points:
-        cand = db.query(models.Candidate).filter(models.Candidate.id == p.id).first()
+        cand = hydrated.get(p.id)
+        payload = p.payload or {}
 
         if cand:
             name = cand.name
-            preview = cand.resume_text[:200]
+            preview = cand.preview or ""
         else:
-            name = p.payload.get("name", "Unknown")
-            preview = p.payload.get("text_preview", "")
+            name = payload.get("name", "Unknown")
+            preview = payload.get("text_preview", "")
 
         matches.append(
             {
@@ -397,7 +565,7 @@ async def upload_multi_jds(
 
     for file in files:
         content = await file.read()
-        text = services.smart_extract(content, file.filename)
+        text = await extraction.extract(content, file.filename)
 
         jd_blocks = services.split_multiple_jds(text)
         for jd_text in jd_blocks:
@@ -405,14 +573,21 @@ async def upload_multi_jds(
                 continue
 
             jd = services.parse_jd(jd_text)
-            job = models.Job(title=jd["title"], description=jd["description"])
+            job = models.Job(
+                title=jd["title"], description=jd["description"],
+                description_hash=repository.description_hash(jd["description"]),
+            )
             db.add(job)
+            db.flush()
+            skills.index_job(db, job.id, job.description)
             db.commit()
             db.refresh(job)
 
-            # Optionally sync embedding
+            # Persist job vector to Qdrant for later matching
             try:
-                services.get_embedding(f"{job.title}. {job.description}")
+                await asyncio.to_thread(
+                    services.store_job_embedding, job.id, job.title, job.description
+                )
             except Exception as e:
                 print("Bulk JD embedding warning:", e)
 
@@ -424,45 +599,44 @@ async def upload_multi_jds(
 # 2) Upload all resumes (no batch filter, global pool)
 @app.post("/bulk/resumes/")
 async def upload_bulk_resumes(
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    candidate_ids: List[int] = []
+    """
+    Reads the uploads and hands them to the staged ingestion pipeline.
+    Returns immediately; poll /bulk/resumes/status/{ingest_id} for progress
+    and the final candidate_ids.
+    """
+    payload = [(file.filename, await file.read()) for file in files]
 
-    for file in files:
-        content = await file.read()
-        text = services.smart_extract(content, file.filename)
+    ingest_id = await run_db(ingestion.create_ingest_job, len(payload))
+    background_tasks.add_task(ingestion.run_resume_ingestion, ingest_id, payload)
 
-        cand = models.Candidate(
-            name=file.filename,
-            email="unknown",
-            resume_text=text,
-            file_path=f"bulk/{file.filename}",
-        )
-        db.add(cand)
-        db.commit()
-        db.refresh(cand)
+    return {"ingest_id": ingest_id, "status": "queued", "total": len(payload)}
 
-        # Optional: store in Qdrant too
-        try:
-            vec = services.get_embedding(text)
-            vector_db.store_resume_vector(
-                candidate_id=cand.id,
-                vector=vec,
-                metadata={"name": cand.name, "text_preview": text[:250]},
-            )
-        except Exception as e:
-            print("Bulk resume vector warning:", e)
 
-        candidate_ids.append(cand.id)
+@app.get("/bulk/resumes/status/{ingest_id}")
+def bulk_resumes_status(ingest_id: str, db: Session = Depends(get_db)):
+    job = ingestion.get_ingest_job(db, ingest_id)
+    if not job:
+        raise HTTPException(404, "Ingest job not found")
+    return job
+
 
-    return {"candidate_ids": candidate_ids}
+@app.post("/vectors/resume-chunks/reindex")
+def reindex_resume_chunks(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Backfill chunked resume vectors (needed once before RESUME_VECTOR_MODE=chunked)."""
+    total = db.query(func.count(models.Candidate.id)).scalar() or 0
+    ingest_id = ingestion.create_ingest_job(db, total)
+    background_tasks.add_task(ingestion.run_chunk_reindex, ingest_id)
+    return {"ingest_id": ingest_id, "status": "queued", "total": total}
 
 
 class MatrixRequest(BaseModel):
     job_ids: List[int]
     candidate_ids: List[int]
+    top_k: Optional[int] = None
 
 
 @app.post("/bulk/matrix/")
@@ -473,48 +647,48 @@ def matrix_view(
 ):
     jobs = db.query(models.Job).filter(models.Job.id.in_(request.job_ids)).all()
     cands = (
-        db.query(models.Candidate)
+        db.query(models.Candidate.id, models.Candidate.name)
         .filter(models.Candidate.id.in_(request.candidate_ids))
         .all()
     )
 
+    # Semantic scores for every cell in one matmul (vectors from Qdrant)
+    try:
+        job_vec_map = services.get_job_embeddings([(j.id, j.title, j.description) for j in jobs])
+        job_vecs = [job_vec_map.get(j.id, []) for j in jobs]
+        if services.CHUNKED_RESUMES:
+            chunk_map = vector_db.get_resume_chunk_vectors([c.id for c in cands])
+            semantic = similarity.chunk_similarity(
+                job_vecs, [chunk_map.get(c.id, []) for c in cands], services.CHUNK_AGGREGATION
+            )
+        else:
+            cand_vec_map = vector_db.get_resume_vectors([c.id for c in cands])
+            semantic = similarity.similarity_matrix(
+                job_vecs, [cand_vec_map.get(c.id, []) for c in cands]
+            )
+    except Exception as e:
+        print("Matrix semantic scoring warning:", e)
+        semantic = np.zeros((len(jobs), len(cands)), dtype=np.float32)
+
     # Build result structure
     matrix = {
         "jobs": [{"id": j.id, "title": j.title} for j in jobs],
         "candidates": []
     }
 
-    for cand in cands:
-        row = {
-            "candidate_id": cand.id,
-            "candidate_name": cand.name,
-            "scores": []
-        }
+    if request.top_k:
+        for job_entry, best in zip(matrix["jobs"], similarity.top_k(semantic, request.top_k)):
+            job_entry["top_candidates"] = [
+                {"candidate_id": cands[c].id, "semantic_score": round(score, 3)}
+                for c, score in best
+            ]
 
-        for job in jobs:
-            app = (
-                db.query(models.Application)
-                .filter(
-                    models.Application.job_id == job.id,
-                    models.Application.candidate_id == cand.id,
-                )
-                .first()
-            )
+    # Stored scores for every cell from one set-based query
+    matrix["candidates"] = repository.build_score_matrix(db, jobs, cands)
 
-            if not app:
-                row["scores"].append({
-                    "score": None,
-                    "status": "NA",
-                    "stability_flag": "OK"
-                })
-            else:
-                row["scores"].append({
-                    "score": app.match_score,
-                    "status": app.status,
-                    "stability_flag": app.stability_flag
-                })
-
-        matrix["candidates"].append(row)
+    for c_idx, row in enumerate(matrix["candidates"]):
+        for j_idx, cell in enumerate(row["scores"]):
+            cell["semantic_score"] = round(float(semantic[j_idx, c_idx]), 3)
 
     return matrix
 
@@ -553,30 +727,175 @@ def ask_copilot(request: ChatRequest, db: Session = Depends(get_db)):
             }
         }
 
-# --- EXPORT ---
-@app.get("/export/{job_id}")
-def export(job_id: int, db: Session = Depends(get_db)):
+# --- CACHE STATS ---
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "analysis": cache.analysis_cache.stats(),
+        "embeddings": cache.embedding_cache.stats(),
+        "compaction": compaction.stats(),
+    }
+
+
+@app.get("/llm/stats")
+def llm_stats():
+    return llm_client.stats()
+
+
+@app.post("/cache/prune")
+def cache_prune():
+    return {"removed": cache.analysis_cache.prune()}
+
+
+# --- RULE-BASED PRESCORER ---
+class PrescoreRequest(BaseModel):
+    job_id: int
+    candidate_id: int
+
+
+@app.post("/prescore/")
+def prescore(req: PrescoreRequest, db: Session = Depends(get_db)):
+    """Local rubric score for one pair (no LLM call)."""
+    job = db.query(models.Job).filter(models.Job.id == req.job_id).first()
+    cand = db.query(models.Candidate).filter(models.Candidate.id == req.candidate_id).first()
+    if not job or not cand:
+        raise HTTPException(404, "Job or candidate not found")
+    return prescorer.prescore(cand.resume_text or "", job.description or "", job.title or "")
+
+
+@app.get("/prescore/agreement/{job_id}")
+def prescore_agreement(job_id: int, limit: int = 500, db: Session = Depends(get_db)):
+    """
+    How closely the rules track the LLM: re-scores the job's applications
+    scored by the current LLM prompt locally and reports status agreement
+    and per-gate error. Rules-scored and errored rows carry no LLM verdict.
+    """
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(404, "Job not found")
+
     rows = (
         db.query(
-            models.Candidate.name,
-            models.Candidate.email,
+            models.Candidate.resume_text,
             models.Application.match_score,
             models.Application.status,
-            models.Application.reasoning,
+            models.Application.experience_score,
+            models.Application.skills_score,
+            models.Application.role_alignment_score,
+            models.Application.stability_flag,
         )
         .join(models.Application)
         .filter(models.Application.job_id == job_id)
+        .filter(models.Application.prompt_version == services.PROMPT_VERSION)
+        .limit(limit)
         .all()
     )
 
-    stream = io.StringIO()
-    writer = csv.writer(stream)
-    writer.writerow(["Name", "Email", "Score", "Status", "Reason"])
-
+    pairs = []
     for r in rows:
-        writer.writerow([r.name, r.email, r.match_score, r.status, r.reasoning])
+        rules = prescorer.prescore(r.resume_text or "", job.description or "", job.title or "")
+        llm = {
+            "score": r.match_score,
+            "status": r.status,
+            "experience_score": r.experience_score,
+            "skills_score": r.skills_score,
+            "role_alignment_score": r.role_alignment_score,
+            "stability_flag": r.stability_flag,
+        }
+        pairs.append((rules, llm))
+
+    return {"job_id": job_id, **prescorer.agreement_report(pairs)}
+
+
+# --- SKILL INDEX ---
+def _candidate_cards(db: Session, ids: List[int]) -> List[dict]:
+    rows = (
+        db.query(models.Candidate.id, models.Candidate.name, models.Candidate.email)
+        .filter(models.Candidate.id.in_(ids))
+        .all()
+    )
+    by_id = {r.id: r for r in rows}
+    sets = skills.skill_sets(db, ids)
+    return [
+        {"id": cid, "name": by_id[cid].name, "email": by_id[cid].email, "skills": sets.get(cid, [])}
+        for cid in ids if cid in by_id
+    ]
+
+
+@app.get("/skills/candidates")
+def candidates_by_skills(q: str, limit: int = 100, db: Session = Depends(get_db)):
+    """
+    Candidates having ALL of the comma-separated skills, e.g. ?q=Kafka,Go.
+    Synonyms are accepted (k8s, golang, postgres, ...).
+    """
+    terms = [t for t in q.split(",") if t.strip()]
+    required = [skills.matcher.normalize(t) for t in terms]
+    unknown = [t.strip() for t, s in zip(terms, required) if s is None]
+    if unknown:
+        raise HTTPException(400, f"Unknown skills: {', '.join(unknown)}")
+
+    ids = skills.candidates_with_all(db, required, limit=limit)
+    return {"skills": required, "candidates": _candidate_cards(db, ids)}
+
+
+@app.get("/skills/jobs/{job_id}/candidates")
+def candidates_for_job_skills(job_id: int, limit: int = 100, db: Session = Depends(get_db)):
+    """Candidates ranked by how many of the job's skills they have."""
+    required = skills.job_skills(db, job_id)
+    ranked = skills.rank_by_coverage(db, required, limit=limit)
+    cards = _candidate_cards(db, [cid for cid, _ in ranked])
+    for card in cards:
+        have = set(card["skills"])
+        card["skills_found"] = [s for s in required if s in have]
+        card["missing_skills"] = [s for s in required if s not in have]
+    return {"job_id": job_id, "skills": required, "candidates": cards}
+
+
+@app.post("/skills/reindex")
+def reindex_skills(db: Session = Depends(get_db)):
+    """Rebuild the skill index for every job and candidate (e.g. after a taxonomy change)."""
+    for job_id, description in db.query(models.Job.id, models.Job.description).all():
+        skills.index_job(db, job_id, description or "")
+
+    # Keyset pages: the index writes share the session with the reads
+    total, last_id = 0, 0
+    while True:
+        batch = (
+            db.query(models.Candidate.id, models.Candidate.resume_text)
+            .filter(models.Candidate.id > last_id)
+            .order_by(models.Candidate.id)
+            .limit(exporter.EXPORT_BATCH_SIZE)
+            .all()
+        )
+        if not batch:
+            break
+        skills.index_candidates(db, [(cid, text or "") for cid, text in batch])
+        total += len(batch)
+        last_id = batch[-1][0]
+    db.commit()
+    return {"candidates": total}
+
+
+# --- EXPORT ---
+@app.get("/export/{job_id}")
+def export(job_id: int, format: str = "csv"):
+    """
+    Streams the job's applications as they are read from a server-side cursor.
+    format=csv (default) or format=parquet (requires pyarrow).
+    """
+    if format == "parquet":
+        if not exporter.parquet_available():
+            raise HTTPException(400, "Parquet export requires pyarrow")
+        response = StreamingResponse(
+            exporter.stream_parquet(job_id), media_type="application/vnd.apache.parquet"
+        )
+        response.headers["Content-Disposition"] = f"attachment; filename=export_{job_id}.parquet"
+        return response
+
+    if format != "csv":
+        raise HTTPException(400, "format must be 'csv' or 'parquet'")
 
-    response = StreamingResponse(iter([stream.getvalue()]), media_type="text/csv")
+    response = StreamingResponse(exporter.stream_csv(job_id), media_type="text/csv")
     response.headers["Content-Disposition"] = "attachment; filename=export.csv"
     return response
 
@@ -586,186 +905,90 @@ def export(job_id: int, db: Session = Depends(get_db)):
 # AUTO-DRIVE WEBSOCKET STREAMING (REAL DATA)
 # ============================================
 from fastapi import WebSocket, WebSocketDisconnect
-from database import SessionLocal
 import models, services
 import asyncio
 
 
-AUTO_DRIVE_JOBS: list[int] = []
-AUTO_DRIVE_CANDIDATES: list[int] = []
-
-
 @app.post("/bulk/autodrive/start")
 async def autodrive_start(payload: dict):
     """
     Called from the frontend before opening the WebSocket.
-    Just stores which jobs and candidates to process.
+    Persists a run and queues it on the worker pool; the socket only subscribes.
     """
-    global AUTO_DRIVE_JOBS, AUTO_DRIVE_CANDIDATES
+    job_ids = payload.get("job_ids", []) or []
+    candidate_ids = payload.get("candidate_ids", []) or []
+
+    # Optional cascade: {"cascade_top_k": 20} and/or {"cascade_threshold": 0.55}
+    # Optional scoring: {"scoring_mode": "llm" | "rules" | "prefilter", "prefilter_min_score": 40}
+    # Optional {"batch_prompting": true}: several resumes per LLM call
+    config = autodrive.run_config(payload)
+
+    try:
+        run_id = await run_db(
+            lambda s: autodrive.create_run(s, job_ids, candidate_ids, config=config).id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    await autodrive.enqueue(run_id)
+
+    print(f"[SETUP] AutoDrive run {run_id} queued: {len(job_ids)} jobs, {len(candidate_ids)} candidates")
+    return {"status": "ready", "run_id": run_id}
+
 
-    AUTO_DRIVE_JOBS = payload.get("job_ids", []) or []
-    AUTO_DRIVE_CANDIDATES = payload.get("candidate_ids", []) or []
+@app.get("/bulk/autodrive/runs/{run_id}")
+async def autodrive_run_status(run_id: int, db: AsyncDB = Depends(get_async_db)):
+    run_status = await db.run(autodrive.get_run_status, run_id)
+    if run_status is None:
+        raise HTTPException(404, "Run not found")
+    return run_status
 
-    print(f"[SETUP] AutoDrive configured: {len(AUTO_DRIVE_JOBS)} jobs, {len(AUTO_DRIVE_CANDIDATES)} candidates")
-    return {"status": "ready"}
+
+@app.post("/bulk/autodrive/runs/{run_id}/resume")
+async def autodrive_resume(run_id: int, db: AsyncDB = Depends(get_async_db)):
+    """Requeue a failed run; already-checkpointed pairs are skipped."""
+    found = await db.run(autodrive.mark_for_resume, run_id)
+    if found is None:
+        raise HTTPException(404, "Run not found")
+    run_status, requeued = found
+    if requeued:
+        await autodrive.enqueue(run_id)
+    return run_status
 
 
 @app.websocket("/ws/autodrive")
 async def ws_autodrive(ws: WebSocket):
     """
-    Streams real per-candidate results:
-    - candidate_name from DB
-    - deep_score + gate scores from analyze_candidate()
-    - skills_found / missing_skills
-    - full AI reasoning
+    Subscribes to an autodrive run:
+    - ?run_id=<id> selects the run (defaults to the most recent one)
+    - ?after=<seq> skips results already received before a reconnect
+    Every checkpointed result is replayed, then new ones stream live.
     """
     print("[WS] /ws/autodrive incoming")
     await ws.accept()
-    db = SessionLocal()
 
     try:
-        # 1) Guard: make sure start endpoint was called
-        if not AUTO_DRIVE_JOBS or not AUTO_DRIVE_CANDIDATES:
-            msg = "Auto-Drive not configured. Call /bulk/autodrive/start first."
-            print("[WS] ERROR:", msg)
-            await ws.send_json({"type": "error", "message": msg})
-            await ws.close()
-            return
-
-        # 2) Load jobs & candidates from DB
-        jobs = (
-            db.query(models.Job)
-            .filter(models.Job.id.in_(AUTO_DRIVE_JOBS))
-            .all()
-        )
-        candidates = (
-            db.query(models.Candidate)
-            .filter(models.Candidate.id.in_(AUTO_DRIVE_CANDIDATES))
-            .all()
-        )
-
-        # Precompute candidate embeddings once
-        candidate_vectors = {}
-        for cand in candidates:
-            try:
-                candidate_vectors[cand.id] = services.get_embedding(cand.resume_text or "")
-            except Exception as e:
-                print(f"[WS] Embedding error for candidate {cand.id}: {e}")
-                candidate_vectors[cand.id] = []
-
-        # 3) Main streaming loop
-        sent_pairs = set()
-        for job in jobs:
-            job_key = f"{job.title or 'Job'} (ID {job.id})"
-            print("[WS] Processing job:", job_key)
+        run_id = ws.query_params.get("run_id")
+        after = int(ws.query_params.get("after") or 0)
 
-            # Job embedding
-            try:
-                job_vec = services.get_embedding(f"{job.title}. {job.description}")
-            except Exception as e:
-                print(f"[WS] Embedding error for job {job.id}: {e}")
-                job_vec = []
-
-            for cand in candidates:
-                pair = (job.id, cand.id)
-                if pair in sent_pairs:
-                    continue
-                sent_pairs.add(pair)
-
-                print(f"[WS] Processing candidate {cand.id} for job {job.id}")
-
-                # Avoid UI freeze, tiny pause
-                await asyncio.sleep(0.1)
-
-                cand_vec = candidate_vectors.get(cand.id, [])
-                try:
-                  semantic = services.cosine_similarity(job_vec, cand_vec)
-                except Exception:
-                  semantic = 0.0
-
-                try:
-                    # Call your strict scoring LLM
-                    ai = services.analyze_candidate(
-                        cand.resume_text or "",
-                        job.description or "",
-                    )
-                except Exception as e:
-                    print(f"[WS] AI error for cand {cand.id}, job {job.id}: {e}")
-                    ai = {
-                        "score": 0,
-                        "status": "Error",
-                        "reasoning": f"AI Processing Error: {e}",
-                        "experience_score": 0,
-                        "skills_score": 0,
-                        "role_alignment_score": 0,
-                        "stability_flag": "OK",
-                        "skills_found": [],
-                        "missing_skills": [],
-                    }
-
-                # Upsert Application row (same as non-streaming route)
-                try:
-                    app_row = (
-                        db.query(models.Application)
-                        .filter(
-                            models.Application.job_id == job.id,
-                            models.Application.candidate_id == cand.id,
-                        )
-                        .first()
-                    )
-
-                    if not app_row:
-                        app_row = models.Application(
-                            job_id=job.id,
-                            candidate_id=cand.id,
-                        )
-                        db.add(app_row)
-
-                    app_row.match_score = ai.get("score", 0)
-                    app_row.status = ai.get("status", "Reject")
-                    app_row.reasoning = ai.get("reasoning", "")
-                    app_row.experience_score = ai.get("experience_score", 0)
-                    app_row.skills_score = ai.get("skills_score", 0)
-                    app_row.role_alignment_score = ai.get("role_alignment_score", 0)
-                    app_row.stability_flag = ai.get("stability_flag", "OK")
-                    app_row.missing_skills = ai.get("missing_skills", [])
-                    app_row.skills_found = ai.get("skills_found", [])
-                    db.commit()
-                except Exception as e:
-                    print(f"[WS] DB save error for cand {cand.id}, job {job.id}: {e}")
-
-                # Real candidate label: name → fallback
-                label = cand.name.strip() if cand.name else f"Candidate {cand.id}"
-
-                # 4) Send full enriched result to frontend
-                await ws.send_json(
-                    {
-                        "type": "result",
-                        "job_key": job_key,
-                        "candidate": {
-                            "candidate_id": cand.id,
-                            "candidate_name": label,
-                            "semantic_score": round(float(semantic or 0.0), 3),
-                            "deep_score": ai.get("score", 0),
-                            "status": ai.get("status", "Reject"),
-                            "stability_flag": ai.get("stability_flag", "OK"),
-                            "experience_score": ai.get("experience_score", 0),
-                            "skills_score": ai.get("skills_score", 0),
-                            "role_alignment_score": ai.get("role_alignment_score", 0),
-                            "skills_found": ai.get("skills_found", []),
-                            "missing_skills": ai.get("missing_skills", []),
-                            "reasoning": ai.get("reasoning", ""),
-                        },
-                    }
-                )
-
-        # 5) Done
-        await ws.send_json({"type": "done"})
+        if run_id is None:
+            latest = await run_db(
+                lambda s: s.query(models.AutoDriveRun.id).order_by(models.AutoDriveRun.id.desc()).first()
+            )
+            if not latest:
+                msg = "Auto-Drive not configured. Call /bulk/autodrive/start first."
+                print("[WS] ERROR:", msg)
+                await ws.send_json({"type": "error", "message": msg})
+                await ws.close()
+                return
+            run_id = latest[0]
+
+        await autodrive.stream_run(ws, int(run_id), after_id=after)
         await ws.close()
         print("[WS] Streaming finished and closed")
 
     except WebSocketDisconnect:
-        print("[WS] Client disconnected")
+        print("[WS] Client disconnected (run keeps going)")
 
     except Exception as e:
         print("[WS] Fatal error:", e)
@@ -773,10 +996,3 @@ async def ws_autodrive(ws: WebSocket):
             await ws.send_json({"type": "error", "message": str(e)})
         finally:
             await ws.close()
-
-    finally:
-        db.close()
-
-
-
-
@@ -0,0 +1,78 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# ---------------------------------------------------------
+# Idempotent schema upgrades for databases created before a
+# model change. `create_all` only creates missing tables; it
+# never alters existing ones, so new indexes/columns on old
+# tables are applied here at startup.
+# ---------------------------------------------------------
+
+POSTGRES_MIGRATIONS = [
+    # user-008: one Application per (job, candidate). Collapse any
+    # historical duplicates (keep the newest) before the unique index.
+    """
+    DELETE FROM applications a
+    USING applications b
+    WHERE a.job_id = b.job_id
+      AND a.candidate_id = b.candidate_id
+      AND a.id < b.id
+      AND NOT EXISTS (
+        SELECT 1 FROM pg_indexes WHERE indexname = 'uq_application_job_candidate'
+      )
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_application_job_candidate
+    ON applications (job_id, candidate_id)
+    """,
+    # user-011: per-run cascade settings
+    "ALTER TABLE autodrive_runs ADD COLUMN IF NOT EXISTS config JSON",
+    # user-013: resume dedup fingerprints
+    "ALTER TABLE candidates ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE candidates ADD COLUMN IF NOT EXISTS simhash BIGINT",
+    "ALTER TABLE candidates ADD COLUMN IF NOT EXISTS duplicate_of_id INTEGER REFERENCES candidates(id)",
+    "CREATE INDEX IF NOT EXISTS ix_candidates_content_hash ON candidates (content_hash)",
+    # user-016: job versioning. Hash matches repository.description_hash().
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS description_hash VARCHAR(64)",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT 1",
+    "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ",
+    """
+    UPDATE jobs
+    SET description_hash = encode(sha256(convert_to(coalesce(description, ''), 'UTF8')), 'hex')
+    WHERE description_hash IS NULL
+    """,
+    "ALTER TABLE applications ADD COLUMN IF NOT EXISTS jd_hash VARCHAR(64)",
+    "ALTER TABLE applications ADD COLUMN IF NOT EXISTS prompt_version VARCHAR(32)",
+    # Jobs had no update path, so existing rows were scored against the
+    # current description. Rows without a stamp predate versioning and were
+    # scored with rubric-v1 on raw text (stale once PROMPT_VERSION moved on);
+    # rows already stamped keep their version; errors stay stale.
+    """
+    UPDATE applications a
+    SET jd_hash = j.description_hash,
+        prompt_version = COALESCE(
+            a.prompt_version,
+            CASE WHEN a.status = 'Error' THEN NULL ELSE 'rubric-v1' END
+        )
+    FROM jobs j
+    WHERE j.id = a.job_id AND a.jd_hash IS NULL
+    """,
+    # user-019: stored resume preview for search listings
+    "ALTER TABLE candidates ADD COLUMN IF NOT EXISTS resume_preview VARCHAR(200)",
+    """
+    UPDATE candidates SET resume_preview = left(resume_text, 200)
+    WHERE resume_preview IS NULL AND resume_text IS NOT NULL
+    """,
+    # user-007: runs are claimed by one worker process and kept by a heartbeat
+    "ALTER TABLE autodrive_runs ADD COLUMN IF NOT EXISTS owner VARCHAR(64)",
+    "ALTER TABLE autodrive_runs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ",
+]
+
+
+def run_migrations(engine: Engine):
+    if engine.dialect.name != "postgresql":
+        return
+
+    with engine.begin() as conn:
+        for stmt in POSTGRES_MIGRATIONS:
+            conn.execute(text(stmt))
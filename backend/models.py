@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, ForeignKey, DateTime, JSON, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -10,17 +10,65 @@ class Job(Base):
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Versioning: sha256 of description, bumped on every content change
+    description_hash = Column(String(64), nullable=True)
+    version = Column(Integer, default=1)
+    updated_at = Column(DateTime(timezone=True), nullable=True, onupdate=func.now())
+
 class Candidate(Base):
     __tablename__ = "candidates"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     email = Column(String)
     resume_text = Column(Text) # Extracted text from PDF
+    # First RESUME_PREVIEW_CHARS of resume_text, so listings never load the full text
+    resume_preview = Column(String(200), nullable=True)
     file_path = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Dedup: sha256 of uploaded bytes, SimHash of text, link to first version
+    content_hash = Column(String(64), index=True, nullable=True)
+    simhash = Column(BigInteger, nullable=True)
+    duplicate_of_id = Column(Integer, ForeignKey("candidates.id"), nullable=True)
+
+
+class CandidateSimhashBand(Base):
+    """LSH band index over Candidate.simhash for near-duplicate lookups."""
+    __tablename__ = "candidate_simhash_bands"
+    __table_args__ = (
+        Index("ix_simhash_band_value", "band", "value"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), index=True)
+    band = Column(Integer)
+    value = Column(Integer)
+
+
+class CandidateSkill(Base):
+    """Inverted index: canonical skill → candidates (see skills.py)."""
+    __tablename__ = "candidate_skills"
+    __table_args__ = (
+        Index("ix_candidate_skills_skill", "skill", "candidate_id"),
+    )
+
+    candidate_id = Column(Integer, ForeignKey("candidates.id"), primary_key=True)
+    skill = Column(String(64), primary_key=True)
+
+
+class JobSkill(Base):
+    """Canonical skills mentioned in a job description."""
+    __tablename__ = "job_skills"
+
+    job_id = Column(Integer, ForeignKey("jobs.id"), primary_key=True)
+    skill = Column(String(64), primary_key=True)
+
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # One row per (job, candidate): backs the matrix lookups and ON CONFLICT upserts
+        Index("uq_application_job_candidate", "job_id", "candidate_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     job_id = Column(Integer, ForeignKey("jobs.id"))
@@ -47,9 +95,102 @@ class Application(Base):
     missing_skills = Column(JSON, default=[])
     skills_found = Column(JSON, default=[])
 
+    # What this row was scored against; a mismatch with the job's current
+    # description_hash or the current prompt version marks it stale.
+    jd_hash = Column(String(64), nullable=True)
+    prompt_version = Column(String(32), nullable=True)
+
     created_at = Column(DateTime, server_default=func.now())
 
 
+class AutoDriveRun(Base):
+    __tablename__ = "autodrive_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_ids = Column(JSON, default=[])
+    candidate_ids = Column(JSON, default=[])
+    config = Column(JSON, default={})  # cascade_top_k / cascade_threshold
+
+    status = Column(String, default="queued", index=True)  # queued / running / done / error
+    total_pairs = Column(Integer, default=0)
+    completed_pairs = Column(Integer, default=0)
+    error_message = Column(Text, nullable=True)
+    # Worker process executing the run, kept alive by heartbeat_at; a running
+    # run whose heartbeat expired is reclaimable by another process.
+    owner = Column(String(64), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class AutoDriveResult(Base):
+    """Per-pair checkpoint for a run; also the replay log for subscribers."""
+    __tablename__ = "autodrive_results"
+    __table_args__ = (
+        UniqueConstraint("run_id", "job_id", "candidate_id", name="uq_autodrive_result_pair"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("autodrive_runs.id"), index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id"))
+    candidate_id = Column(Integer, ForeignKey("candidates.id"))
+
+    # The exact websocket "result" message streamed for this pair
+    message = Column(JSON)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IngestionJob(Base):
+    """Progress of a bulk resume upload or chunk reindex, readable from any worker."""
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String(32), primary_key=True)  # ingest_id (uuid4 hex)
+    # queued / extracting / saving / embedding / indexing / done / error
+    status = Column(String, default="queued", index=True)
+    total = Column(Integer, default=0)
+    extracted = Column(Integer, default=0)
+    saved = Column(Integer, default=0)
+    embedded = Column(Integer, default=0)
+    indexed = Column(Integer, default=0)
+    duplicates = Column(Integer, default=0)
+    near_duplicates = Column(Integer, default=0)
+    candidate_ids = Column(JSON, default=[])
+    errors = Column(JSON, default=[])
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class AnalysisCache(Base):
+    __tablename__ = "analysis_cache"
+
+    # sha256(resume, JD, prompt version, model)
+    key = Column(String(64), primary_key=True)
+    model = Column(String)
+    prompt_version = Column(String)
+    result = Column(JSON)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    last_accessed_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class EmbeddingCache(Base):
+    __tablename__ = "embedding_cache"
+
+    # sha256(text, model)
+    key = Column(String(64), primary_key=True)
+    model = Column(String)
+    vector = Column(JSON)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
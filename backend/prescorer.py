@@ -0,0 +1,275 @@
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import skills
+
+# ---------------------------------------------------------
+# Deterministic local implementation of the analyze_candidate
+# rubric (Gate 1 experience, Gate 2 must-have skills, Gate 3
+# role alignment, stability override). No network, runs in
+# microseconds-to-milliseconds per pair. Used as a fast mode
+# and as a pre-filter in front of the LLM.
+# ---------------------------------------------------------
+
+# Stored as Application.prompt_version for rule-scored rows
+RULES_VERSION = "rules-v1"
+
+SHORTLIST_THRESHOLD = 70
+MAX_GAP_MONTHS = 6
+SHORT_ROLE_MONTHS = 12
+# Completed roles shorter than SHORT_ROLE_MONTHS needed to flag job-hopping.
+# One short stint (or a degree picked up as a date range) is not enough.
+SHORT_ROLE_LIMIT = 2
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+_DATE = (
+    r"(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?\s*"
+    r"|\d{1,2}\s*[/.]\s*)?(?:19|20)\d{2}"
+)
+_RANGE_RE = re.compile(
+    rf"({_DATE})\s*(?:-|–|—|to|until)\s*({_DATE}|present|current|now|till date|today)",
+    re.IGNORECASE,
+)
+_YEAR_RE = re.compile(r"(?:19|20)\d{2}")
+_MONTH_NAME_RE = re.compile(r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)", re.IGNORECASE)
+_MONTH_NUM_RE = re.compile(r"^(\d{1,2})\s*[/.]")
+
+_EXP_CLAIM_RE = re.compile(
+    r"(\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years?|yrs?)(?:\s+of)?\s+(?:\w+\s+){0,3}?experience",
+    re.IGNORECASE,
+)
+_JD_RANGE_RE = re.compile(r"(\d{1,2})\s*(?:-|–|to)\s*(\d{1,2})\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+_JD_MIN_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_WORD_RE = re.compile(r"[a-z][a-z+#.]{2,}")
+
+_STOPWORDS = {
+    "and", "the", "for", "with", "you", "our", "are", "will", "this", "that", "have",
+    "from", "your", "who", "all", "can", "has", "not", "but", "per", "job", "role",
+    "title", "position", "description", "team", "work", "years", "year", "experience",
+    "must", "should", "ability", "strong", "including", "etc", "into", "about",
+}
+
+
+# Must-have skills come from the shared taxonomy automaton
+find_skills = skills.extract
+
+
+# --- 1. TIMELINE ---
+
+def _parse_date(raw: str, is_end: bool) -> Optional[int]:
+    """Month index (year*12 + month-1). 'present' → today."""
+    raw = raw.strip().lower()
+    if raw in ("present", "current", "now", "till date", "today"):
+        today = date.today()
+        return today.year * 12 + today.month - 1
+
+    year = _YEAR_RE.search(raw)
+    if not year:
+        return None
+    month = 1
+    name = _MONTH_NAME_RE.search(raw)
+    num = _MONTH_NUM_RE.match(raw)
+    if name:
+        month = _MONTHS[name.group(1).lower()]
+    elif num and 1 <= int(num.group(1)) <= 12:
+        month = int(num.group(1))
+    return int(year.group(0)) * 12 + month - 1
+
+
+def extract_date_ranges(text: str) -> List[Tuple[int, int, bool]]:
+    """(start_month, end_month, is_current) for every date range in the text."""
+    ranges = []
+    for m in _RANGE_RE.finditer(text or ""):
+        start = _parse_date(m.group(1), is_end=False)
+        end = _parse_date(m.group(2), is_end=True)
+        if start is None or end is None or end < start:
+            continue
+        current = not _YEAR_RE.search(m.group(2))
+        ranges.append((start, end, current))
+    return ranges
+
+
+def _merge(ranges: List[Tuple[int, int, bool]]) -> List[Tuple[int, int]]:
+    merged = []
+    for start, end, _ in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def years_of_experience(text: str) -> Optional[float]:
+    """From the merged timeline; falls back to an explicit 'N years of experience'."""
+    merged = _merge(extract_date_ranges(text))
+    if merged:
+        return round(sum(end - start for start, end in merged) / 12.0, 1)
+
+    claims = [float(m.group(1)) for m in _EXP_CLAIM_RE.finditer(text or "")]
+    return max(claims) if claims else None
+
+
+def required_years(jd_text: str) -> Optional[Tuple[float, Optional[float]]]:
+    """(min, max) years asked for by the JD; max is None for 'N+ years'."""
+    m = _JD_RANGE_RE.search(jd_text or "")
+    if m:
+        lo, hi = sorted((float(m.group(1)), float(m.group(2))))
+        return lo, hi
+    m = _JD_MIN_RE.search(jd_text or "")
+    if m:
+        return float(m.group(1)), None
+    return None
+
+
+def stability_issues(text: str) -> List[str]:
+    ranges = extract_date_ranges(text)
+    issues = []
+
+    merged = _merge(ranges)
+    for (_, prev_end), (next_start, _) in zip(merged, merged[1:]):
+        gap = next_start - prev_end
+        if gap > MAX_GAP_MONTHS:
+            issues.append(f"Career gap of {gap} months")
+
+    short = [r for r in ranges if not r[2] and r[1] - r[0] < SHORT_ROLE_MONTHS]
+    if len(short) >= SHORT_ROLE_LIMIT:
+        issues.append(f"{len(short)} roles shorter than {SHORT_ROLE_MONTHS} months")
+    return issues
+
+
+# --- 2. GATES ---
+
+def gate_experience(
+    candidate_years: Optional[float], required: Optional[Tuple[float, Optional[float]]]
+) -> int:
+    if candidate_years is None:
+        return 0
+    if required is None:
+        return 15
+    lo, hi = required
+    if candidate_years < lo:
+        diff = lo - candidate_years
+    elif hi is not None and candidate_years > hi:
+        diff = candidate_years - hi
+    else:
+        return 30
+    return 15 if diff <= 2 else 0
+
+
+def gate_skills(must_have: List[str], found: List[str]) -> int:
+    if not must_have:
+        return 0
+    matched = len(found)
+    score = 40.0 * matched / len(must_have)
+    missing = len(must_have) - matched
+    if missing:
+        score -= 10
+    if missing > len(must_have) / 2:
+        score -= 20
+    return max(0, int(round(score)))
+
+
+def _content_words(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall((text or "").lower()) if w not in _STOPWORDS]
+
+
+def gate_role_alignment(job_title: str, jd_text: str, resume_text: str) -> int:
+    resume_words = set(_content_words(resume_text))
+
+    title_words = set(_content_words(job_title))
+    title_score = 15.0 * len(title_words & resume_words) / len(title_words) if title_words else 0.0
+
+    counts: Dict[str, int] = {}
+    for w in _content_words(jd_text):
+        if len(w) >= 4:
+            counts[w] = counts.get(w, 0) + 1
+    keywords = sorted(counts, key=counts.get, reverse=True)[:30]
+    overlap = len(set(keywords) & resume_words) / len(keywords) if keywords else 0.0
+    resp_score = 15.0 * min(1.0, overlap * 1.5)
+
+    return int(round(title_score + resp_score))
+
+
+# --- 3. PUBLIC API ---
+
+def prescore(resume_text: str, job_description: str, job_title: str = "") -> dict:
+    """Same schema as services.analyze_candidate(), computed locally."""
+    candidate_years = years_of_experience(resume_text)
+    required = required_years(job_description)
+
+    must_have = find_skills(job_description)
+    resume_skills = set(find_skills(resume_text))
+    found = [s for s in must_have if s in resume_skills]
+    missing = [s for s in must_have if s not in resume_skills]
+
+    experience_score = gate_experience(candidate_years, required)
+    skills_score = gate_skills(must_have, found)
+    role_score = gate_role_alignment(job_title, job_description, resume_text)
+    score = experience_score + skills_score + role_score
+
+    issues = stability_issues(resume_text)
+    stability_flag = "RISK" if issues else "OK"
+    status = "Shortlist" if score >= SHORTLIST_THRESHOLD and not issues else "Reject"
+
+    lines = [ln.strip() for ln in (resume_text or "").splitlines() if ln.strip()]
+    email = _EMAIL_RE.search(resume_text or "")
+
+    if required is None:
+        req_txt = "unspecified"
+    elif required[1] is None:
+        req_txt = f"{required[0]:g}+"
+    else:
+        req_txt = f"{required[0]:g}-{required[1]:g}"
+    reasoning = (
+        f"[rules] Experience {candidate_years if candidate_years is not None else 'unknown'} yrs "
+        f"vs required {req_txt}; {len(found)}/{len(must_have)} must-have skills"
+        + (f"; stability: {', '.join(issues)}" if issues else "")
+    )
+
+    return {
+        "name": lines[0][:80] if lines else "Unknown",
+        "email": email.group(0) if email else "Unknown",
+        "score": score,
+        "status": status,
+        "reasoning": reasoning,
+        "experience_score": experience_score,
+        "skills_score": skills_score,
+        "role_alignment_score": role_score,
+        "stability_flag": stability_flag,
+        "skills_found": found,
+        "missing_skills": missing,
+        "mode": "rules",
+        "prompt_version": RULES_VERSION,
+    }
+
+
+def agreement_report(pairs: List[Tuple[dict, dict]]) -> dict:
+    """
+    Compare (rules_result, llm_result) pairs: status / stability agreement
+    rates and mean absolute error of the total and per-gate scores.
+    """
+    n = len(pairs)
+    if not n:
+        return {"pairs": 0}
+
+    def _mae(key):
+        return round(sum(abs((r.get(key) or 0) - (l.get(key) or 0)) for r, l in pairs) / n, 2)
+
+    return {
+        "pairs": n,
+        "status_agreement": round(sum(r["status"] == l.get("status") for r, l in pairs) / n, 3),
+        "stability_agreement": round(
+            sum(r["stability_flag"] == l.get("stability_flag") for r, l in pairs) / n, 3
+        ),
+        "score_mae": _mae("score"),
+        "experience_score_mae": _mae("experience_score"),
+        "skills_score_mae": _mae("skills_score"),
+        "role_alignment_score_mae": _mae("role_alignment_score"),
+    }
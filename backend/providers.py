@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import List
+
+import numpy as np
+
+import llm_client
+import prescorer
+
+# Optional local embedding backend
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # pragma: no cover - optional dependency
+    SentenceTransformer = None
+
+# --- PROVIDER CONFIG ---
+# Which backend serves scoring completions and embeddings:
+#   "gemini" - Google Gemini through litellm (default)
+#   "local"  - a local OpenAI-compatible / Ollama server for scoring and a
+#              CPU sentence-transformers model for embeddings (on-prem)
+#   "stub"   - deterministic, network-free: rules-based scores and hashed
+#              bag-of-words vectors (offline benchmarks, CI)
+# Model names are part of every cache key and vector content hash, so
+# switching providers never serves another provider's results. Qdrant
+# collections hold one vector space: give each provider its own
+# QDRANT_URL, or re-index after switching.
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+# Must match the embedding model's output size (and the Qdrant collections)
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 768))
+
+GEMINI_SCORING_MODEL = os.getenv("GEMINI_SCORING_MODEL", "gemini/gemini-2.5-flash")
+GEMINI_EMBEDDING_MODEL = os.getenv("GEMINI_EMBEDDING_MODEL", "gemini/text-embedding-004")
+
+# Any litellm model string served locally, e.g. "ollama/qwen2.5:7b-instruct"
+# or "openai/<name>" against a llama.cpp / vLLM server at LOCAL_LLM_API_BASE.
+LOCAL_SCORING_MODEL = os.getenv("LOCAL_SCORING_MODEL", "ollama/qwen2.5:7b-instruct")
+LOCAL_LLM_API_BASE = os.getenv("LOCAL_LLM_API_BASE", "http://localhost:11434")
+# 768-dim like text-embedding-004, so the Qdrant collections fit unchanged
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
+LOCAL_EMBED_BATCH = int(os.getenv("LOCAL_EMBED_BATCH", 32))
+
+PROVIDERS = ("gemini", "local", "stub")
+
+
+def _response(content: str):
+    """Minimal litellm-shaped completion response."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage={"total_tokens": 0},
+    )
+
+
+# --- 1. GEMINI ---
+
+class GeminiProvider:
+    name = "gemini"
+    scoring_model = GEMINI_SCORING_MODEL
+    embedding_model = GEMINI_EMBEDDING_MODEL
+
+    def complete(self, messages: List[dict], **kwargs):
+        return llm_client.completion(
+            model=self.scoring_model,
+            messages=messages,
+            api_key=os.getenv("GEMINI_API_KEY"),
+            **kwargs,
+        )
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = llm_client.embedding(
+            model=self.embedding_model,
+            input=[t.replace("\n", " ") for t in texts],
+            api_key=os.getenv("GEMINI_API_KEY"),
+        )
+        return [row['embedding'] for row in response['data']]
+
+
+# --- 2. LOCAL (ON-PREM) ---
+
+class LocalProvider:
+    name = "local"
+    scoring_model = LOCAL_SCORING_MODEL
+    embedding_model = f"local/{LOCAL_EMBEDDING_MODEL}"
+
+    def __init__(self):
+        self._model = None
+        self._lock = threading.Lock()
+
+    def complete(self, messages: List[dict], **kwargs):
+        # Same limiter / retry path as the hosted provider; a local server
+        # returns 503 when its queue is full, which is retried like a 429.
+        return llm_client.completion(
+            model=self.scoring_model,
+            messages=messages,
+            api_base=LOCAL_LLM_API_BASE,
+            **kwargs,
+        )
+
+    def _encoder(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    if SentenceTransformer is None:
+                        raise RuntimeError("sentence-transformers is not installed")
+                    model = SentenceTransformer(LOCAL_EMBEDDING_MODEL, device="cpu")
+                    dim = model.get_sentence_embedding_dimension()
+                    if dim != EMBEDDING_DIM:
+                        raise RuntimeError(
+                            f"{LOCAL_EMBEDDING_MODEL} produces {dim}-dim vectors; "
+                            f"set EMBEDDING_DIM={dim} and use fresh Qdrant collections"
+                        )
+                    self._model = model
+        return self._model
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._encoder().encode(
+            list(texts), batch_size=LOCAL_EMBED_BATCH, normalize_embeddings=True,
+        )
+        return vectors.tolist()
+
+
+# --- 3. DETERMINISTIC STUB ---
+
+_SINGLE_RE = re.compile(r'JOB DESCRIPTION:\n"""(.*?)"""\s*RESUME:\n"""(.*?)"""', re.DOTALL)
+_SHARED_JD_RE = re.compile(r'^\s*JOB DESCRIPTION:\n"""(.*?)"""', re.DOTALL)
+_SHARED_RESUME_RE = re.compile(r'^\s*RESUME:\n"""(.*?)"""', re.DOTALL)
+_ITEM_RE = re.compile(r'(RESUME|JOB DESCRIPTION) id="([^"]*)":\n"""(.*?)"""', re.DOTALL)
+_TEXT_RE = re.compile(r'TEXT:\n"""(.*?)"""', re.DOTALL)
+_TOKEN_RE = re.compile(r"[a-z0-9+#.]+")
+
+
+class StubProvider:
+    """
+    Answers the app's own prompts without a model: scoring prompts get the
+    rules-based prescorer result (same schema), everything else a neutral
+    well-formed reply. Same input, same output, no network.
+    """
+    name = "stub"
+    scoring_model = "stub/rules"
+    embedding_model = "stub/hashed-bow"
+
+    @staticmethod
+    def _score(resume: str, jd: str) -> dict:
+        result = prescorer.prescore(resume, jd, "")
+        result.pop("mode", None)
+        result.pop("prompt_version", None)
+        return result
+
+    def _reply(self, system: str, user: str):
+        single = _SINGLE_RE.search(user)
+        if single:
+            return self._score(single.group(2), single.group(1))
+
+        items = _ITEM_RE.findall(user)
+        if items:
+            shared_jd = _SHARED_JD_RE.search(user)
+            shared_resume = _SHARED_RESUME_RE.search(user)
+            results = []
+            for kind, item_id, text in items:
+                if kind == "RESUME" and shared_jd:
+                    results.append({"id": item_id, **self._score(text, shared_jd.group(1))})
+                elif kind == "JOB DESCRIPTION" and shared_resume:
+                    results.append({"id": item_id, **self._score(shared_resume.group(1), text)})
+            return {"results": results}
+
+        text = _TEXT_RE.search(user)
+        if text and "MULTIPLE JOB DESCRIPTIONS" in user:
+            return [text.group(1)]
+        if text and "JOB TITLE" in user:
+            lines = [ln.strip() for ln in text.group(1).splitlines() if ln.strip()]
+            return {"title": (lines[0] if lines else "General Role")[:80], "description": text.group(1)}
+        return {"reply": "Offline stub provider: no model available.", "action": "NONE", "value": None}
+
+    def complete(self, messages: List[dict], **kwargs):
+        system = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        user = "\n".join(m.get("content", "") for m in messages if m.get("role") != "system")
+        return _response(json.dumps(self._reply(system, user)))
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        out = []
+        for text in texts:
+            vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+            for tok in _TOKEN_RE.findall((text or "").lower()):
+                h = int.from_bytes(hashlib.blake2b(tok.encode(), digest_size=8).digest(), "big")
+                vec[h % EMBEDDING_DIM] += 1.0 if (h >> 32) & 1 else -1.0
+            norm = np.linalg.norm(vec)
+            out.append((vec / norm if norm else vec).tolist())
+        return out
+
+
+# --- 4. SELECTION ---
+
+def _build(name: str):
+    if name == "gemini":
+        return GeminiProvider()
+    if name == "local":
+        return LocalProvider()
+    if name == "stub":
+        return StubProvider()
+    raise ValueError(f"LLM_PROVIDER must be one of {', '.join(PROVIDERS)}")
+
+
+provider = _build(LLM_PROVIDER)
@@ -0,0 +1,247 @@
+import os
+import time
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import models
+
+# --- WRITE BUFFER CONFIG ---
+APP_WRITE_BATCH = int(os.getenv("APP_WRITE_BATCH", 50))
+APP_WRITE_FLUSH_SECONDS = float(os.getenv("APP_WRITE_FLUSH_SECONDS", 2.0))
+
+
+# --- APPLICATION QUERIES ---
+
+def load_application_grid(
+    db: Session, job_ids: List[int], candidate_ids: List[int]
+) -> Dict[Tuple[int, int], tuple]:
+    """
+    Fetch every Application for the given job/candidate id sets in ONE
+    query. Returns {(job_id, candidate_id): (match_score, status, stability_flag)}.
+    Served by the (job_id, candidate_id) unique index.
+    """
+    if not job_ids or not candidate_ids:
+        return {}
+
+    rows = (
+        db.query(
+            models.Application.job_id,
+            models.Application.candidate_id,
+            models.Application.match_score,
+            models.Application.status,
+            models.Application.stability_flag,
+        )
+        .filter(
+            models.Application.job_id.in_(job_ids),
+            models.Application.candidate_id.in_(candidate_ids),
+        )
+        .all()
+    )
+    return {(r.job_id, r.candidate_id): (r.match_score, r.status, r.stability_flag) for r in rows}
+
+
+def build_score_matrix(db: Session, jobs: list, cands: list) -> List[dict]:
+    """
+    Assemble matrix rows (one per candidate, one cell per job) in memory
+    from a single set-based query. `jobs`/`cands` need `.id` (cands also `.name`).
+    """
+    grid = load_application_grid(db, [j.id for j in jobs], [c.id for c in cands])
+
+    rows = []
+    for cand in cands:
+        scores = []
+        for job in jobs:
+            cell = grid.get((job.id, cand.id))
+            if cell is None:
+                scores.append({"score": None, "status": "NA", "stability_flag": "OK"})
+            else:
+                score, status, stability_flag = cell
+                scores.append({"score": score, "status": status, "stability_flag": stability_flag})
+
+        rows.append({
+            "candidate_id": cand.id,
+            "candidate_name": cand.name,
+            "scores": scores,
+        })
+    return rows
+
+
+# --- CANDIDATE PREVIEWS ---
+
+# Matches the Candidate.resume_preview column width
+RESUME_PREVIEW_CHARS = 200
+
+
+def resume_preview(text: Optional[str]) -> str:
+    return (text or "")[:RESUME_PREVIEW_CHARS]
+
+
+def preview_column():
+    """resume_preview, falling back to a DB-side substring for rows not yet backfilled."""
+    return func.coalesce(
+        models.Candidate.resume_preview,
+        func.substr(models.Candidate.resume_text, 1, RESUME_PREVIEW_CHARS),
+    ).label("preview")
+
+
+def hydrate_candidates(db: Session, ids: List[int]) -> Dict[int, tuple]:
+    """{id: (id, name, email, preview)} for many candidates in one IN query."""
+    if not ids:
+        return {}
+    rows = (
+        db.query(
+            models.Candidate.id,
+            models.Candidate.name,
+            models.Candidate.email,
+            preview_column(),
+        )
+        .filter(models.Candidate.id.in_(list(ids)))
+        .all()
+    )
+    return {r.id: r for r in rows}
+
+
+# --- JOB VERSIONS ---
+
+def description_hash(description: Optional[str]) -> str:
+    """Version key of a job description (same formula as the SQL backfill)."""
+    return hashlib.sha256((description or "").encode("utf-8")).hexdigest()
+
+
+# --- APPLICATION UPSERTS ---
+
+def application_values(
+    job_id: int, candidate_id: int, ai: dict, jd_hash: Optional[str] = None
+) -> dict:
+    """
+    Map an analyze_candidate() result onto Application columns, stamped
+    with the JD version and prompt version it was scored against.
+    Results without a prompt_version (errors) stay stale.
+    """
+    return {
+        "job_id": job_id,
+        "candidate_id": candidate_id,
+        "match_score": ai.get("score", 0),
+        "status": ai.get("status", "Reject"),
+        "reasoning": ai.get("reasoning", ""),
+        "experience_score": ai.get("experience_score", 0),
+        "skills_score": ai.get("skills_score", 0),
+        "role_alignment_score": ai.get("role_alignment_score", 0),
+        "stability_flag": ai.get("stability_flag", "OK"),
+        "missing_skills": ai.get("missing_skills", []),
+        "skills_found": ai.get("skills_found", []),
+        "jd_hash": jd_hash,
+        "prompt_version": ai.get("prompt_version"),
+    }
+
+
+def _insert_for(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Application upsert not supported on {dialect}")
+
+
+def upsert_applications(db: Session, rows: List[dict]):
+    """
+    INSERT ... ON CONFLICT (job_id, candidate_id) DO UPDATE for many rows
+    in one statement. Later rows for the same pair win. Does not commit.
+    """
+    if not rows:
+        return
+
+    # A single statement may not touch the same conflict key twice.
+    deduped = {(r["job_id"], r["candidate_id"]): r for r in rows}
+
+    insert = _insert_for(db)
+    stmt = insert(models.Application).values(list(deduped.values()))
+    update_cols = {
+        col: stmt.excluded[col]
+        for col in deduped[next(iter(deduped))]
+        if col not in ("job_id", "candidate_id")
+    }
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["job_id", "candidate_id"],
+        set_=update_cols,
+    )
+    db.execute(stmt)
+
+
+def upsert_application(
+    db: Session, job_id: int, candidate_id: int, ai: dict, jd_hash: Optional[str] = None
+):
+    """Race-free single-pair upsert. Does not commit."""
+    upsert_applications(db, [application_values(job_id, candidate_id, ai, jd_hash)])
+
+
+class ApplicationWriter:
+    """
+    Buffers scored pairs and flushes them as one upsert + one commit,
+    whenever `batch_size` rows are pending or `flush_seconds` have passed.
+
+    Optional `extra` ORM objects (e.g. autodrive checkpoints) are written
+    in the same transaction as their Application rows. `on_flush(n)` runs
+    before the commit, so callers can update counters atomically.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = APP_WRITE_BATCH,
+        flush_seconds: float = APP_WRITE_FLUSH_SECONDS,
+        on_flush: Optional[Callable[[int], None]] = None,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.on_flush = on_flush
+        self._rows: List[dict] = []
+        self._extra: list = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self.commits = 0
+
+    def add(
+        self, job_id: int, candidate_id: int, ai: Optional[dict], extra=None,
+        jd_hash: Optional[str] = None,
+    ) -> bool:
+        """
+        Queue one pair. `ai=None` records only `extra` (no Application write).
+        Returns True if this call triggered a flush.
+        """
+        if ai is not None:
+            self._rows.append(application_values(job_id, candidate_id, ai, jd_hash))
+        if extra is not None:
+            self._extra.append(extra)
+        self._pending += 1
+
+        due = time.monotonic() - self._last_flush >= self.flush_seconds
+        if self._pending >= self.batch_size or due:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        rows, extra, pending = self._rows, self._extra, self._pending
+        self._rows, self._extra, self._pending = [], [], 0
+        try:
+            upsert_applications(self.db, rows)
+            if extra:
+                self.db.add_all(extra)
+            if self.on_flush:
+                self.on_flush(pending)
+            self.db.commit()
+            self.commits += 1
+        except Exception:
+            self.db.rollback()
+            raise
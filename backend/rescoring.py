@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from database import AsyncDB
+import models
+import services
+import prescorer
+import repository
+import autodrive
+
+# ---------------------------------------------------------
+# Incremental re-scoring. An Application is stale when the
+# JD hash or prompt version it was scored with differs from
+# the current ones; only those pairs are queued, as ordinary
+# AutoDrive runs (persisted, resumable, streamable).
+# ---------------------------------------------------------
+
+# Prompt versions that count as current, per scoring mode
+CURRENT_VERSIONS = {
+    "llm": services.PROMPT_VERSION,
+    "rules": prescorer.RULES_VERSION,
+}
+
+
+def _is_stale():
+    app = models.Application
+    return or_(
+        app.jd_hash.is_(None),
+        app.jd_hash != models.Job.description_hash,
+        app.prompt_version.is_(None),
+        app.prompt_version.notin_(list(CURRENT_VERSIONS.values())),
+    )
+
+
+def stamp_job(job: models.Job, description: Optional[str]) -> bool:
+    """Set the description and its hash; bumps the version on a real change."""
+    new_hash = repository.description_hash(description)
+    changed = new_hash != repository.description_hash(job.description)
+    job.description = description
+    job.description_hash = new_hash
+    if changed:
+        job.version = (job.version or 1) + 1
+    return changed
+
+
+def stale_applications(db: Session, job_id: int) -> Dict[str, List[int]]:
+    """Candidate ids with stale rows for the job, grouped by the mode to re-score with."""
+    rows = (
+        db.query(models.Application.candidate_id, models.Application.prompt_version)
+        .join(models.Job, models.Job.id == models.Application.job_id)
+        .filter(models.Application.job_id == job_id)
+        .filter(_is_stale())
+        .order_by(models.Application.candidate_id)
+        .all()
+    )
+    grouped: Dict[str, List[int]] = {}
+    for cand_id, version in rows:
+        mode = "rules" if (version or "").startswith("rules") else "llm"
+        grouped.setdefault(mode, []).append(cand_id)
+    return grouped
+
+
+def stale_counts(db: Session) -> Dict[int, int]:
+    """{job_id: stale application count} across all jobs (one GROUP BY)."""
+    rows = (
+        db.query(models.Application.job_id, func.count(models.Application.id))
+        .join(models.Job, models.Job.id == models.Application.job_id)
+        .filter(_is_stale())
+        .group_by(models.Application.job_id)
+        .all()
+    )
+    return {job_id: n for job_id, n in rows}
+
+
+def create_rescore_runs(db: Session, job_id: int) -> List[int]:
+    """One run per scoring mode covering only the stale pairs (commits). Returns run ids."""
+    run_ids = []
+    for mode, cand_ids in stale_applications(db, job_id).items():
+        run = autodrive.create_run(
+            db, [job_id], cand_ids,
+            # Every stale pair must be re-scored: no cascade cut
+            config={"scoring_mode": mode, "cascade_top_k": 0, "cascade_threshold": 0},
+        )
+        run_ids.append(run.id)
+        print(f"[RESCORE] Job {job_id}: run {run.id} queued for {len(cand_ids)} stale {mode} rows")
+    return run_ids
+
+
+async def rescore_job(db: AsyncDB, job_id: int) -> List[int]:
+    """Create and enqueue the re-scoring runs for one job. Returns run ids."""
+    run_ids = await db.run(create_rescore_runs, job_id)
+    for run_id in run_ids:
+        await autodrive.enqueue(run_id)
+    return run_ids
+
+
+async def rescore_all(db: AsyncDB) -> Dict[int, List[int]]:
+    """Re-score every job with stale rows (e.g. after a PROMPT_VERSION bump)."""
+    return {job_id: await rescore_job(db, job_id) for job_id in await db.run(stale_counts)}
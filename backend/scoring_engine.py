@@ -0,0 +1,65 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, Tuple
+
+# --- SCORING ENGINE CONFIG ---
+# Max number of pair evaluations (LLM calls) in flight at once.
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", 8))
+
+# Blocking calls (litellm completion/embedding) run here, never on the event loop.
+_executor = ThreadPoolExecutor(
+    max_workers=SCORING_CONCURRENCY, thread_name_prefix="scoring"
+)
+
+
+async def run_blocking(fn: Callable, *args, **kwargs):
+    """Run a blocking function on the scoring thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+
+async def score_pairs(
+    items: Iterable[Any],
+    score_fn: Callable[[Any], Any],
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[Tuple[Any, Any, Optional[Exception]]]:
+    """
+    Fan out score_fn(item) over items with at most `concurrency` calls in flight.
+    Yields (item, result, error) tuples in completion order, not submission order.
+
+    The window is refilled as calls finish, so a 6,000-pair drive never queues
+    6,000 futures at once. If the consumer stops iterating (e.g. the websocket
+    disconnects), pending work that has not started yet is cancelled.
+    """
+    limit = max(1, concurrency or SCORING_CONCURRENCY)
+    source = iter(items)
+    in_flight = {}
+
+    def _submit() -> bool:
+        try:
+            item = next(source)
+        except StopIteration:
+            return False
+        task = asyncio.ensure_future(run_blocking(score_fn, item))
+        in_flight[task] = item
+        return True
+
+    try:
+        while len(in_flight) < limit and _submit():
+            pass
+
+        while in_flight:
+            done, _ = await asyncio.wait(
+                in_flight.keys(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                item = in_flight.pop(task)
+                error = task.exception()
+                result = None if error else task.result()
+                _submit()
+                yield item, result, error
+    finally:
+        for task in in_flight:
+            task.cancel()
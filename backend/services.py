@@ -1,19 +1,38 @@
 import os
 import json
-from datetime import date
 from io import BytesIO
 from pypdf import PdfReader
 from docx import Document
-from litellm import completion, embedding
+from llm_client import LLMUnavailableError
 from dotenv import load_dotenv
-from typing import List
-import math
+from typing import Dict, List, Tuple
 import re
 
+from cache import analysis_cache, embedding_cache, content_hash
+import vector_db
+from coalescer import MicroBatcher
+import similarity
+import chunking
+import compaction
+import providers
+from providers import provider
+
 # Load Environment Variables
 dotenv_path = os.path.join(os.path.dirname(__file__), "..", ".env")
 load_dotenv(dotenv_path=dotenv_path, override=True)
 
+# --- MODEL CONFIG ---
+# Backend chosen by LLM_PROVIDER (gemini / local / stub), see providers.py.
+# The model names key the analysis / embedding caches and vector hashes.
+SCORING_MODEL = provider.scoring_model
+EMBEDDING_MODEL = provider.embedding_model
+EMBEDDING_DIM = providers.EMBEDDING_DIM
+
+# Bump whenever the analyze_candidate rubric/prompt, or the compaction of
+# the text placed in it, changes so cached results from the old prompt are
+# never served. v2: resumes / JDs are compacted before prompting.
+PROMPT_VERSION = "rubric-v2"
+
 # --- 1. UNIVERSAL FILE PARSER ---
 
 def extract_text_from_docx(file_content: bytes) -> str:
@@ -28,14 +47,16 @@ def extract_text_with_gemini_vision(file_content: bytes) -> str:
     # Placeholder: Future implementation for OCR
     return "[SCANNED DOCUMENT DETECTED] - This appears to be an image-based PDF. Please use a text-based PDF."
 
-def extract_text_from_pdf(file_content: bytes) -> str:
+def extract_text_from_pdf(file_content: bytes, max_pages: int = None) -> str:
     try:
         pdf = PdfReader(BytesIO(file_content))
-        text = ""
-        for page in pdf.pages:
+        pages = pdf.pages if max_pages is None else pdf.pages[:max_pages]
+        parts = []
+        for page in pages:
             extracted = page.extract_text()
             if extracted:
-                text += extracted + "\n"
+                parts.append(extracted + "\n")
+        text = "".join(parts)
         
         if len(text.strip()) < 50:
             return extract_text_with_gemini_vision(file_content)
@@ -45,12 +66,16 @@ def extract_text_from_pdf(file_content: bytes) -> str:
         print(f"PDF Error: {e}")
         return ""
 
-def smart_extract(file_content: bytes, filename: str) -> str:
+def smart_extract(file_content: bytes, filename: str, max_pages: int = None) -> str:
+    """
+    Synchronous parser. Route handlers should use extraction.extract(),
+    which runs this in a sandboxed process pool.
+    """
     filename = filename.lower()
     text = ""
     
     if filename.endswith(".pdf"):
-        text = extract_text_from_pdf(file_content)
+        text = extract_text_from_pdf(file_content, max_pages=max_pages)
     elif filename.endswith(".docx"):
         text = extract_text_from_docx(file_content)
     elif filename.endswith(".txt"):
@@ -99,11 +124,9 @@ TEXT:
 """
 
     try:
-        response = completion(
-            model="gemini/gemini-2.5-flash",
+        response = provider.complete(
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"},
-            api_key=os.getenv("GEMINI_API_KEY")
         )
         raw = response.choices[0].message.content.strip()
         return json.loads(raw)
@@ -117,36 +140,44 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """
     Compute cosine similarity between two embedding vectors.
     Returns a value between -1.0 and 1.0 (we expect ~0..1).
+    For many pairs at once use similarity.similarity_matrix instead.
     """
     if not vec1 or not vec2 or len(vec1) != len(vec2):
         return 0.0
-
-    dot = 0.0
-    norm1 = 0.0
-    norm2 = 0.0
-
-    for a, b in zip(vec1, vec2):
-        dot += a * b
-        norm1 += a * a
-        norm2 += b * b
-
-    if norm1 == 0.0 or norm2 == 0.0:
-        return 0.0
-
-    return dot / (math.sqrt(norm1) * math.sqrt(norm2))
+    return float(similarity.similarity_matrix([vec1], [vec2])[0, 0])
 
     
 # --- 2. AI ANALYSIS (THE BRAIN) ---
-def analyze_candidate(resume_text: str, job_description: str):
-    today_str = date.today().strftime("%Y-%m-%d")
-
-    # ---------------------------------------------------------
-    # IMPORTANT: Escape JSON braces by doubling them {{ }}
-    # Except where f-variables are intentionally inserted.
-    # ---------------------------------------------------------
-
-    system_prompt = f"""
-You are a senior technical recruiter performing strict weighted scoring of a candidate
+def analyze_candidate(resume_text: str, job_description: str, use_cache: bool = True):
+    """
+    Score a resume against a JD. Both are compacted to their prompt budgets
+    first; results are cached by content hash of (compacted resume, compacted
+    JD, PROMPT_VERSION, SCORING_MODEL); error fallbacks are never cached.
+    """
+    resume_text = compaction.compact_resume(resume_text)
+    job_description = compaction.compact_jd(job_description)
+    key = analysis_cache.make_key(resume_text, job_description, PROMPT_VERSION, SCORING_MODEL)
+    if use_cache:
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            return {**cached, "prompt_version": PROMPT_VERSION}
+
+    result = _analyze_candidate_uncached(resume_text, job_description)
+    if result.pop("_error", False):
+        return result
+
+    if use_cache:
+        analysis_cache.set(key, result, model=SCORING_MODEL, prompt_version=PROMPT_VERSION)
+    # Stamped on successful results only, so error rows are re-scored later
+    return {**result, "prompt_version": PROMPT_VERSION}
+
+
+# ---------------------------------------------------------
+# Prompt pieces shared by single and batched scoring. The rubric and
+# notes are identical in both, so results are interchangeable (and share
+# the analysis cache under PROMPT_VERSION).
+# ---------------------------------------------------------
+_RUBRIC_PROMPT = """You are a senior technical recruiter performing strict weighted scoring of a candidate
 against a job description. You MUST follow the scoring rubric below without exception.
 
 =========================
@@ -186,12 +217,14 @@ IF score >= 70 → "Shortlist"
 IF score < 70 → "Reject"
 BUT if stability_flag == "RISK" → force "Reject"
 
-=========================
+"""
+
+_SINGLE_OUTPUT_PROMPT = """=========================
 OUTPUT FORMAT (STRICT JSON)
 =========================
 Respond ONLY in JSON with this EXACT schema:
 
-{{
+{
   "name": "",
   "email": "",
   "score": 0,
@@ -203,9 +236,11 @@ Respond ONLY in JSON with this EXACT schema:
   "stability_flag": "",
   "skills_found": [],
   "missing_skills": []
-}}
+}
 
-=========================
+"""
+
+_NOTES_PROMPT = """=========================
 ADDITIONAL NOTES
 =========================
 - Extract candidate name & email from resume.
@@ -215,6 +250,43 @@ ADDITIONAL NOTES
 - DO NOT hallucinate. Use only resume & JD.
 """
 
+_BATCH_OUTPUT_PROMPT = """=========================
+OUTPUT FORMAT (STRICT JSON)
+=========================
+You will receive several {items}, each introduced with an id. Score EACH one
+independently against the {shared}; never compare them with each other.
+Respond ONLY in JSON with this EXACT schema, one entry per {item}:
+
+{{
+  "results": [
+    {{
+      "id": "",
+      "name": "",
+      "email": "",
+      "score": 0,
+      "status": "",
+      "reasoning": "",
+      "experience_score": 0,
+      "skills_score": 0,
+      "role_alignment_score": 0,
+      "stability_flag": "",
+      "skills_found": [],
+      "missing_skills": []
+    }}
+  ]
+}}
+
+"""
+
+_RESULT_KEYS = (
+    "score", "status", "reasoning", "experience_score", "skills_score",
+    "role_alignment_score", "stability_flag", "skills_found", "missing_skills",
+)
+
+
+def _analyze_candidate_uncached(resume_text: str, job_description: str):
+    system_prompt = _RUBRIC_PROMPT + _SINGLE_OUTPUT_PROMPT + _NOTES_PROMPT
+
     user_prompt = f"""
 JOB DESCRIPTION:
 \"\"\"{job_description}\"\"\"
@@ -226,17 +298,15 @@ Evaluate strictly using the scoring rubric.
 """
 
     # ---------------------------------------------------------
-    # Gemini call (corrected)
+    # LLM call (provider from LLM_PROVIDER)
     # ---------------------------------------------------------
     try:
-        response = completion(
-            model="gemini/gemini-2.5-flash",
+        response = provider.complete(
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            api_key=os.getenv("GEMINI_API_KEY"),
-            response_format={"type": "json_object"}  # uses Gemini structured output
+            response_format={"type": "json_object"}  # structured output
         )
 
         content = response.choices[0].message.content.strip()
@@ -253,28 +323,185 @@ Evaluate strictly using the scoring rubric.
             else:
                 raise ValueError("No JSON found in AI output")
 
+    except LLMUnavailableError:
+        # Quota / outage: never record it as a 0-score Reject
+        raise
     except Exception as e:
         print(f"AI Error: {e}")
+        # An explicit Error, never a verdict: not cached, and the row it
+        # writes carries no prompt_version, so it stays stale for re-scoring
         return {
             "name": "Unknown",
             "email": "Unknown",
             "score": 0,
-            "status": "Reject",
+            "status": "Error",
             "reasoning": f"AI Processing Error: {str(e)}",
             "experience_score": 0,
             "skills_score": 0,
             "role_alignment_score": 0,
-            "stability_flag": "RISK",
+            "stability_flag": "OK",
             "skills_found": [],
-            "missing_skills": []
+            "missing_skills": [],
+            "_error": True
         }
 
+# ---------------------------------------------------------
+# Batched scoring: one JD against N resumes (or one resume against
+# N JDs) in a single call. The shared document is sent once, so token
+# spend and per-call overhead drop roughly N-fold. Entries that are
+# missing or malformed in the reply fall back to single-pair calls.
+# ---------------------------------------------------------
+
+# Pairs per batched call, and the estimated prompt tokens it may carry
+SCORING_BATCH_MAX_PAIRS = int(os.getenv("SCORING_BATCH_MAX_PAIRS", 8))
+SCORING_BATCH_TOKEN_BUDGET = int(os.getenv("SCORING_BATCH_TOKEN_BUDGET", 30000))
+
+
+def batch_units(items: List, text_of, shared_text: str = "") -> List[List]:
+    """Split items into batched-scoring calls that fit the token budget."""
+    budget = max(1, SCORING_BATCH_TOKEN_BUDGET - estimate_tokens(shared_text or ""))
+    return _chunk_by_token_budget(
+        items, text_of=text_of, budget=budget, max_items=SCORING_BATCH_MAX_PAIRS
+    )
+
+
+def _valid_result(entry) -> bool:
+    return (
+        isinstance(entry, dict)
+        and all(k in entry for k in _RESULT_KEYS)
+        and isinstance(entry.get("score"), (int, float))
+    )
+
+
+def _analyze_batch_uncached(shared_text: str, items: Dict[str, str], shared: str) -> Dict[str, dict]:
+    """
+    One call scoring every item in `items` ({id: text}) against `shared_text`.
+    shared="job": items are resumes; shared="resume": items are JDs.
+    Returns {id: result} for the well-formed entries only ({} on failure).
+    """
+    if shared == "job":
+        labels = ("resumes", "resume", "job description")
+        head = f'JOB DESCRIPTION:\n"""{shared_text}"""'
+        item_label = "RESUME"
+    else:
+        labels = ("job descriptions", "job description", "resume")
+        head = f'RESUME:\n"""{shared_text}"""'
+        item_label = "JOB DESCRIPTION"
+
+    system_prompt = (
+        _RUBRIC_PROMPT
+        + _BATCH_OUTPUT_PROMPT.format(items=labels[0], item=labels[1], shared=labels[2])
+        + _NOTES_PROMPT
+    )
+    body = "\n\n".join(
+        f'{item_label} id="{item_id}":\n"""{text}"""' for item_id, text in items.items()
+    )
+    user_prompt = f"""
+{head}
+
+{body}
+
+Evaluate each {labels[1]} strictly using the scoring rubric. Return exactly
+{len(items)} results, using the ids given above.
+"""
+
+    try:
+        response = provider.complete(
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            response_format={"type": "json_object"}
+        )
+        content = response.choices[0].message.content.strip()
+        try:
+            parsed = json.loads(content)
+        except json.JSONDecodeError:
+            start = content.find("{")
+            end = content.rfind("}")
+            if start == -1 or end == -1:
+                raise ValueError("No JSON found in AI output")
+            parsed = json.loads(content[start:end + 1])
+    except LLMUnavailableError:
+        # Falling back to N single calls would only add load
+        raise
+    except Exception as e:
+        print(f"AI Batch Error ({len(items)} pairs): {e}")
+        return {}
+
+    entries = parsed.get("results") if isinstance(parsed, dict) else parsed
+    out = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not _valid_result(entry):
+            continue
+        item_id = str(entry.pop("id", ""))
+        if item_id in items and item_id not in out:
+            out[item_id] = entry
+    return out
+
+
+def _analyze_many(
+    shared_text: str, items: Dict, shared: str, use_cache: bool = True
+) -> Dict:
+    """Cache lookup, batched calls for the misses, single-pair fallback."""
+    compact_item = compaction.compact_resume if shared == "job" else compaction.compact_jd
+    shared_text = (compaction.compact_jd if shared == "job" else compaction.compact_resume)(shared_text)
+    items = {item_id: compact_item(text) for item_id, text in items.items()}
+
+    def _pair(text):
+        # (resume, JD) in analyze_candidate's order, so both share cache keys
+        return (text, shared_text) if shared == "job" else (shared_text, text)
+
+    results, misses = {}, {}
+    for item_id, text in items.items():
+        resume, jd = _pair(text)
+        key = analysis_cache.make_key(resume, jd, PROMPT_VERSION, SCORING_MODEL)
+        cached = analysis_cache.get(key) if use_cache else None
+        if cached is not None:
+            results[item_id] = {**cached, "prompt_version": PROMPT_VERSION}
+        else:
+            misses[item_id] = (text, key)
+
+    for unit in batch_units(list(misses), lambda i: misses[i][0], shared_text):
+        scored = {}
+        if len(unit) > 1:
+            scored = _analyze_batch_uncached(
+                shared_text, {str(i): misses[i][0] for i in unit}, shared
+            )
+        for item_id in unit:
+            text, key = misses[item_id]
+            result = scored.get(str(item_id))
+            if result is None:
+                # Lost in the batched reply (or a batch of one): score alone
+                results[item_id] = analyze_candidate(*_pair(text), use_cache=use_cache)
+                continue
+            if use_cache:
+                analysis_cache.set(key, result, model=SCORING_MODEL, prompt_version=PROMPT_VERSION)
+            results[item_id] = {**result, "prompt_version": PROMPT_VERSION}
+    return results
+
+
+def analyze_candidates_batch(job_description: str, resumes: Dict, use_cache: bool = True) -> Dict:
+    """Score {id: resume_text} against one JD. Returns {id: analyze_candidate result}."""
+    return _analyze_many(job_description, resumes, "job", use_cache)
+
+
+def analyze_jobs_batch(resume_text: str, job_descriptions: Dict, use_cache: bool = True) -> Dict:
+    """Score one resume against {id: job_description}. Returns {id: result}."""
+    return _analyze_many(resume_text, job_descriptions, "resume", use_cache)
+
+
 # --- 3. JD PARSER ---
+
+# Stored description size when parse_jd has to cut a long document (~2000 chars)
+JD_DESCRIPTION_TOKENS = int(os.getenv("JD_DESCRIPTION_TOKENS", 500))
+
+
 def parse_jd(text: str) -> dict:
     """
     Hybrid JD parser:
     1. Rule-based extraction for clean JDs
-    2. AI fallback using Gemini for noisy/badly formatted JDs
+    2. AI fallback using the LLM for noisy/badly formatted JDs
     """
 
     # --------- RULE-BASED EXTRACTION ---------
@@ -295,7 +522,8 @@ def parse_jd(text: str) -> dict:
             if 3 <= len(title) <= 120:
                 return {
                     "title": title,
-                    "description": text[:2000]  # first 2000 chars
+                    # Requirements / responsibilities first, boilerplate dropped
+                    "description": compaction.compact_jd(text, max_tokens=JD_DESCRIPTION_TOKENS)
                 }
 
     # --------- AI FALLBACK EXTRACTION ---------
@@ -311,14 +539,12 @@ Return ONLY this JSON structure:
 }}
 
 TEXT:
-\"\"\"{text[:5000]}\"\"\"
+\"\"\"{compaction.compact_jd(text)}\"\"\"
 """
 
     try:
-        response = completion(
-            model="gemini/gemini-2.5-flash",
+        response = provider.complete(
             messages=[{"role": "user", "content": ai_prompt}],
-            api_key=os.getenv("GEMINI_API_KEY"),
             response_format={"type": "json_object"}
         )
 
@@ -340,20 +566,209 @@ TEXT:
 
         return {
             "title": guessed[:80],
-            "description": text[:2000]
+            "description": compaction.compact_jd(text, max_tokens=JD_DESCRIPTION_TOKENS)
         }
 
 # --- 4. EMBEDDINGS ---
 
+# Gemini accepts up to 100 inputs per request; we also cap the estimated
+# token total per request so a batch of long resumes is split sensibly.
+EMBED_BATCH_MAX_ITEMS = int(os.getenv("EMBED_BATCH_MAX_ITEMS", 100))
+EMBED_BATCH_TOKEN_BUDGET = int(os.getenv("EMBED_BATCH_TOKEN_BUDGET", 20000))
+EMBED_COALESCE_WINDOW_MS = float(os.getenv("EMBED_COALESCE_WINDOW_MS", 20))
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 chars per token) used for batch sizing."""
+    return max(1, len(text) // 4)
+
+
+def _chunk_by_token_budget(
+    items: List, text_of=lambda x: x, budget: int = None, max_items: int = None
+) -> List[List]:
+    """Split items into batches bounded by an item count and a token budget
+    (EMBED_BATCH_MAX_ITEMS / EMBED_BATCH_TOKEN_BUDGET unless given)."""
+    budget = budget or EMBED_BATCH_TOKEN_BUDGET
+    max_items = max_items or EMBED_BATCH_MAX_ITEMS
+    batches, current, used = [], [], 0
+    for t in items:
+        cost = estimate_tokens(text_of(t))
+        if current and (used + cost > budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(t)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _embed_batch_uncached(texts: List[str]) -> List[List[float]]:
+    """One upstream embedding call for a list of texts (order preserved)."""
+    return provider.embed(texts)
+
+
+def _embed_coalesced(texts: List[str]) -> List[List[float]]:
+    results = []
+    for batch in _chunk_by_token_budget(texts):
+        results.extend(_embed_batch_uncached(batch))
+    return results
+
+
+# Concurrent get_embedding() calls from different requests/threads are
+# merged into a single upstream call within a small time window.
+_embedding_batcher = MicroBatcher(
+    _embed_coalesced,
+    window_ms=EMBED_COALESCE_WINDOW_MS,
+    max_batch=EMBED_BATCH_MAX_ITEMS,
+)
+
+
 def get_embedding(text: str):
+    """
+    Embed text, going through the persistent embedding cache first.
+    Cache misses are coalesced with concurrent callers into one batch call.
+    Zero-vector fallbacks from failed calls are never cached.
+    """
+    text = text or ""
+    key = embedding_cache.make_key(text, EMBEDDING_MODEL)
+    cached = embedding_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        clean_text = text.replace("\n", " ")
-        response = embedding(
-            model="gemini/text-embedding-004",
-            input=[clean_text],
-            api_key=os.getenv("GEMINI_API_KEY")
-        )
-        return response['data'][0]['embedding']
+        vec = _embedding_batcher.call(text)
     except Exception as e:
         print(f"Embedding Error: {e}")
-        return [0.0] * 768
\ No newline at end of file
+        return [0.0] * EMBEDDING_DIM
+
+    embedding_cache.set(key, vec, model=EMBEDDING_MODEL)
+    return vec
+
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Batch version of get_embedding. Duplicate texts and cache hits are
+    resolved locally; the rest are sent in token-budgeted batches.
+    A failed batch yields zero vectors for its texts only.
+    """
+    texts = [t or "" for t in texts]
+    keys = [embedding_cache.make_key(t, EMBEDDING_MODEL) for t in texts]
+    found = embedding_cache.get_many(keys)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = text
+
+    fresh = {}
+    miss_keys = list(missing)
+    for batch_keys in _chunk_by_token_budget(miss_keys, text_of=missing.get):
+        try:
+            vecs = _embed_batch_uncached([missing[k] for k in batch_keys])
+            fresh.update(zip(batch_keys, vecs))
+        except Exception as e:
+            print(f"Embedding batch error ({len(batch_keys)} texts): {e}")
+
+    embedding_cache.set_many(fresh, model=EMBEDDING_MODEL)
+    found.update(fresh)
+    return [found.get(k, [0.0] * EMBEDDING_DIM) for k in keys]
+
+
+# --- CHUNKED RESUME VECTORS ---
+# "single":  one vector per resume (long CVs are truncated by the model).
+# "chunked": resumes are also stored as section chunks (multi-vector points);
+#            searches score by best chunk, matrices by CHUNK_AGGREGATION.
+RESUME_VECTOR_MODE = os.getenv("RESUME_VECTOR_MODE", "single")
+CHUNKED_RESUMES = RESUME_VECTOR_MODE == "chunked"
+# "max" (best-matching section) or "mean" (whole-profile fit)
+CHUNK_AGGREGATION = os.getenv("CHUNK_AGGREGATION", "max")
+
+
+def get_resume_chunk_embeddings(texts: List[str]) -> List[List[List[float]]]:
+    """Per resume, the vectors of its chunks; all chunks are embedded in shared batches."""
+    chunk_lists = [chunking.chunk_resume(t) for t in texts]
+    flat = get_embeddings([c for chunks in chunk_lists for c in chunks])
+
+    out, pos = [], 0
+    for chunks in chunk_lists:
+        out.append([v for v in flat[pos:pos + len(chunks)] if any(v)])
+        pos += len(chunks)
+    return out
+
+
+def resume_semantic_scores(job_vectors: List[List[float]], resume_texts: List[str]):
+    """(jobs × resumes) cosine scores in the configured resume vector mode."""
+    if CHUNKED_RESUMES:
+        chunks = get_resume_chunk_embeddings(resume_texts)
+        return similarity.chunk_similarity(job_vectors, chunks, CHUNK_AGGREGATION)
+    return similarity.similarity_matrix(job_vectors, get_embeddings(resume_texts))
+
+
+def index_resume(candidate_id: int, text: str, metadata: dict, vector: List[float] = None):
+    """Store one resume's vector (and its chunk vectors in chunked mode) in Qdrant."""
+    vector_db.store_resume_vector(
+        candidate_id=candidate_id,
+        vector=vector if vector is not None else get_embedding(text),
+        metadata=metadata,
+    )
+    if CHUNKED_RESUMES:
+        vector_db.store_resume_chunks(
+            [(candidate_id, get_resume_chunk_embeddings([text])[0], metadata)]
+        )
+
+
+def job_embedding_text(title: str, description: str) -> str:
+    return f"{title}. {description}"
+
+
+def store_job_embedding(job_id: int, title: str, description: str):
+    """Embed a job and persist it to the Qdrant `jobs` collection."""
+    text = job_embedding_text(title, description)
+    vec = get_embedding(text)
+    if not any(vec):
+        return vec
+    vector_db.store_job_vector(
+        job_id=job_id,
+        vector=vec,
+        metadata={
+            "title": title,
+            "content_hash": content_hash(text, EMBEDDING_MODEL),
+        },
+    )
+    return vec
+
+
+def get_job_embeddings(jobs: List[Tuple[int, str, str]]) -> Dict[int, List[float]]:
+    """
+    Job vectors for [(job_id, title, description)], reusing those stored in
+    Qdrant when computed from the same text and model: one Qdrant retrieve,
+    one batched embedding call for missing/stale vectors, one upsert.
+    """
+    texts = {jid: job_embedding_text(title, desc) for jid, title, desc in jobs}
+    hashes = {jid: content_hash(text, EMBEDDING_MODEL) for jid, text in texts.items()}
+
+    vectors: Dict[int, List[float]] = {}
+    try:
+        stored = vector_db.get_job_vectors(list(texts))
+        for jid, (vec, payload) in stored.items():
+            if payload.get("content_hash") == hashes.get(jid):
+                vectors[jid] = vec
+    except Exception as e:
+        print(f"Job vector lookup error: {e}")
+
+    missing = [jid for jid in texts if jid not in vectors]
+    if missing:
+        fresh = get_embeddings([texts[jid] for jid in missing])
+        titles = {jid: title for jid, title, _ in jobs}
+        to_store = []
+        for jid, vec in zip(missing, fresh):
+            vectors[jid] = vec
+            if any(vec):
+                to_store.append((jid, vec, {"title": titles[jid], "content_hash": hashes[jid]}))
+        try:
+            vector_db.store_job_vectors(to_store)
+        except Exception as e:
+            print(f"Job vector store error: {e}")
+
+    return vectors
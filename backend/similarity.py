@@ -0,0 +1,84 @@
+import numpy as np
+from typing import List, Sequence, Tuple
+
+
+# --- MATRIX-FORM COSINE SIMILARITY ---
+
+def to_matrix(vectors: Sequence[Sequence[float]], dim: int = None) -> np.ndarray:
+    """
+    Stack vectors into a C-contiguous float32 matrix with L2-normalized rows.
+    Missing/empty/wrong-sized vectors and zero vectors become zero rows,
+    so they score 0.0 against everything instead of raising.
+    """
+    if dim is None:
+        dim = next((len(v) for v in vectors if v is not None and len(v)), 0)
+
+    mat = np.zeros((len(vectors), dim), dtype=np.float32)
+    for i, v in enumerate(vectors):
+        if v is not None and len(v) == dim:
+            mat[i] = v
+
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    np.divide(mat, norms, out=mat, where=norms > 0)
+    return np.ascontiguousarray(mat)
+
+
+def score_matrix(job_mat: np.ndarray, cand_mat: np.ndarray) -> np.ndarray:
+    """Full (jobs × candidates) cosine matrix in a single BLAS matmul."""
+    if job_mat.size == 0 or cand_mat.size == 0 or job_mat.shape[1] != cand_mat.shape[1]:
+        return np.zeros((job_mat.shape[0], cand_mat.shape[0]), dtype=np.float32)
+    return job_mat @ cand_mat.T
+
+
+def top_k(scores: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+    """Per row, the k best (column index, score) pairs, best first."""
+    n_cols = scores.shape[1] if scores.ndim == 2 else 0
+    if n_cols == 0 or k <= 0:
+        return [[] for _ in range(scores.shape[0])]
+
+    k = min(k, n_cols)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    rows = np.arange(scores.shape[0])[:, None]
+    order = np.argsort(-scores[rows, idx], axis=1)
+    idx = idx[rows, order]
+    return [
+        [(int(j), float(scores[i, j])) for j in idx[i]]
+        for i in range(scores.shape[0])
+    ]
+
+
+def similarity_matrix(
+    job_vectors: Sequence[Sequence[float]], cand_vectors: Sequence[Sequence[float]]
+) -> np.ndarray:
+    """Convenience wrapper: raw vector lists in, (jobs × candidates) scores out."""
+    dim = next((len(v) for v in list(job_vectors) + list(cand_vectors) if v is not None and len(v)), 0)
+    return score_matrix(to_matrix(job_vectors, dim), to_matrix(cand_vectors, dim))
+
+
+def chunk_similarity(
+    job_vectors: Sequence[Sequence[float]],
+    cand_chunks: Sequence[Sequence[Sequence[float]]],
+    agg: str = "max",
+) -> np.ndarray:
+    """
+    (jobs × candidates) scores where each candidate is a list of chunk
+    vectors. All chunks go through one matmul; each candidate's columns are
+    then reduced by max (best-matching section) or mean.
+    Candidates without chunks score 0.0.
+    """
+    flat = [v for chunks in cand_chunks for v in (chunks or [])]
+    counts = np.array([len(chunks or []) for chunks in cand_chunks], dtype=np.int64)
+    out = np.zeros((len(job_vectors), len(cand_chunks)), dtype=np.float32)
+    if not flat or not len(job_vectors):
+        return out
+
+    chunk_scores = similarity_matrix(job_vectors, flat)
+    has_chunks = counts > 0
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[has_chunks]
+
+    if agg == "mean":
+        sums = np.add.reduceat(chunk_scores, starts, axis=1)
+        out[:, has_chunks] = sums / counts[has_chunks]
+    else:
+        out[:, has_chunks] = np.maximum.reduceat(chunk_scores, starts, axis=1)
+    return out
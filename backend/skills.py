@@ -0,0 +1,270 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+
+# --- SKILL TAXONOMY ---
+# Canonical name → synonyms / spellings. Matching is case-insensitive except
+# for the entries in CASE_SENSITIVE, which are ordinary English words too.
+SKILL_TAXONOMY: Dict[str, List[str]] = {
+    "Python": ["python3"],
+    "Java": [],
+    "JavaScript": ["js", "ecmascript"],
+    "TypeScript": [],
+    "Go": ["golang"],
+    "Rust": [],
+    "C++": ["cpp"],
+    "C#": ["csharp", "c sharp"],
+    "C": [],
+    "Ruby": [],
+    "PHP": [],
+    "Scala": [],
+    "Kotlin": [],
+    "Swift": [],
+    "R": [],
+    "SQL": [],
+    "NoSQL": [],
+    "Bash": ["shell scripting"],
+    "React": ["react.js", "reactjs"],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue": ["vue.js", "vuejs"],
+    "Node.js": ["Node", "nodejs"],
+    "Next.js": ["nextjs"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": [],
+    "Spring Boot": ["springboot"],
+    "Spring": [],
+    ".NET": ["dotnet", "asp.net"],
+    "Express": ["express.js", "expressjs"],
+    "GraphQL": [],
+    "REST": ["restful", "rest api", "rest apis"],
+    "PostgreSQL": ["postgres", "psql"],
+    "MySQL": [],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Elasticsearch": ["elastic search", "opensearch"],
+    "Cassandra": [],
+    "DynamoDB": ["dynamo db"],
+    "Kafka": ["apache kafka"],
+    "RabbitMQ": ["rabbit mq"],
+    "Spark": ["apache spark", "pyspark"],
+    "Hadoop": [],
+    "Airflow": ["apache airflow"],
+    "Snowflake": [],
+    "dbt": [],
+    "AWS": ["amazon web services"],
+    "Azure": ["microsoft azure"],
+    "GCP": ["google cloud", "google cloud platform"],
+    "Docker": [],
+    "Kubernetes": ["k8s", "eks", "gke", "aks"],
+    "Terraform": [],
+    "Ansible": [],
+    "Jenkins": [],
+    "CI/CD": ["ci cd", "continuous integration"],
+    "Git": ["github", "gitlab"],
+    "Linux": ["unix"],
+    "Microservices": ["microservice", "micro-services"],
+    "Machine Learning": ["ML"],
+    "Deep Learning": [],
+    "TensorFlow": [],
+    "PyTorch": ["torch"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "Pandas": [],
+    "NumPy": [],
+    "NLP": ["natural language processing"],
+    "LLM": ["llms", "large language models"],
+    "Computer Vision": [],
+    "Tableau": [],
+    "Power BI": ["powerbi"],
+    "Excel": [],
+    "Agile": [],
+    "Scrum": [],
+    "Jira": [],
+    "Selenium": [],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+}
+
+CASE_SENSITIVE = {"Go", "R", "C", "REST", "Express", "Spring", "Swift", "Excel", "Node", "ML"}
+
+# Characters that continue a token: a match must not be flanked by these
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789+#")
+_LEFT_CHARS = _WORD_CHARS | {"."}
+
+
+# --- 1. AHO–CORASICK AUTOMATON ---
+
+class SkillMatcher:
+    """
+    Aho–Corasick automaton over every skill spelling: one linear pass over
+    the text finds all occurrences, independent of taxonomy size.
+    """
+
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # per state: [(pattern_length, canonical, case_sensitive_spelling|None)]
+        self._out: List[List[Tuple[int, str, Optional[str]]]] = [[]]
+        self.canonical: Dict[str, str] = {}
+
+        for name, synonyms in taxonomy.items():
+            for spelling in [name] + list(synonyms):
+                self.canonical[spelling.lower()] = name
+                exact = spelling if spelling in CASE_SENSITIVE else None
+                self._add(spelling.lower(), name, exact)
+        self._build()
+
+    def _add(self, word: str, name: str, exact: Optional[str]):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(word), name, exact))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """(start, end, canonical) for every whole-token occurrence."""
+        lower = text.lower()
+        n = len(lower)
+        found = []
+        state = 0
+        for i, ch in enumerate(lower):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, name, exact in self._out[state]:
+                start, end = i - length + 1, i + 1
+                if start > 0 and lower[start - 1] in _LEFT_CHARS:
+                    continue
+                if end < n and lower[end] in _WORD_CHARS:
+                    continue
+                if exact is not None and text[start:end] != exact:
+                    continue
+                found.append((start, end, name))
+        return found
+
+    def find(self, text: str) -> List[str]:
+        """Canonical skills in order of first appearance (longest match wins)."""
+        if not text:
+            return []
+        taken_until = -1
+        seen: List[str] = []
+        for start, end, name in sorted(self._matches(text), key=lambda m: (m[0], -m[1])):
+            if start < taken_until:
+                continue
+            taken_until = end
+            if name not in seen:
+                seen.append(name)
+        return seen
+
+    def normalize(self, term: str) -> Optional[str]:
+        """Canonical name for a user-supplied skill / synonym, or None."""
+        return self.canonical.get((term or "").strip().lower())
+
+
+matcher = SkillMatcher(SKILL_TAXONOMY)
+
+
+def extract(text: str) -> List[str]:
+    return matcher.find(text)
+
+
+# --- 2. PERSISTED SKILL SETS ---
+
+def index_candidates(db: Session, items: Iterable[Tuple[int, str]]):
+    """Replace the skill rows of (candidate_id, resume_text) pairs. Does not commit."""
+    items = list(items)
+    if not items:
+        return
+    ids = [cid for cid, _ in items]
+    db.query(models.CandidateSkill).filter(
+        models.CandidateSkill.candidate_id.in_(ids)
+    ).delete(synchronize_session=False)
+    db.add_all([
+        models.CandidateSkill(candidate_id=cid, skill=skill)
+        for cid, text in items
+        for skill in extract(text)
+    ])
+
+
+def index_job(db: Session, job_id: int, description: str):
+    """Replace the skill rows of one job. Does not commit."""
+    db.query(models.JobSkill).filter(models.JobSkill.job_id == job_id).delete(synchronize_session=False)
+    db.add_all([models.JobSkill(job_id=job_id, skill=s) for s in extract(description)])
+
+
+def job_skills(db: Session, job_id: int) -> List[str]:
+    return [
+        s for (s,) in db.query(models.JobSkill.skill).filter(models.JobSkill.job_id == job_id).all()
+    ]
+
+
+# --- 3. QUERIES ---
+
+def candidates_with_all(db: Session, required: Sequence[str], limit: int = 100) -> List[int]:
+    """Ids of candidates having every skill in `required` (canonical names)."""
+    required = sorted(set(required))
+    if not required:
+        return []
+    rows = (
+        db.query(models.CandidateSkill.candidate_id)
+        .filter(models.CandidateSkill.skill.in_(required))
+        .group_by(models.CandidateSkill.candidate_id)
+        .having(func.count(models.CandidateSkill.skill) == len(required))
+        .order_by(models.CandidateSkill.candidate_id)
+        .limit(limit)
+        .all()
+    )
+    return [cid for (cid,) in rows]
+
+
+def rank_by_coverage(db: Session, required: Sequence[str], limit: int = 100) -> List[Tuple[int, int]]:
+    """(candidate_id, matched_count) for candidates having any of `required`, best first."""
+    required = sorted(set(required))
+    if not required:
+        return []
+    matched = func.count(models.CandidateSkill.skill)
+    return (
+        db.query(models.CandidateSkill.candidate_id, matched)
+        .filter(models.CandidateSkill.skill.in_(required))
+        .group_by(models.CandidateSkill.candidate_id)
+        .order_by(matched.desc(), models.CandidateSkill.candidate_id)
+        .limit(limit)
+        .all()
+    )
+
+
+def skill_sets(db: Session, candidate_ids: Sequence[int]) -> Dict[int, List[str]]:
+    out: Dict[int, List[str]] = {cid: [] for cid in candidate_ids}
+    if not candidate_ids:
+        return out
+    rows = (
+        db.query(models.CandidateSkill.candidate_id, models.CandidateSkill.skill)
+        .filter(models.CandidateSkill.candidate_id.in_(list(candidate_ids)))
+        .all()
+    )
+    for cid, skill in rows:
+        out.setdefault(cid, []).append(skill)
+    return out
@@ -1,4 +0,0 @@
-from typing import Dict, Any
-
-# Global In-Memory Store
-active_autodrive_sessions: Dict[str, Dict[str, Any]] = {}
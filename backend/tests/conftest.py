@@ -0,0 +1,51 @@
+"""
+Shared fixtures. Run from backend/:  python -m pytest tests
+
+Tests run against an in-memory SQLite database and the network-free stub
+LLM provider; nothing here needs Postgres, Qdrant or an API key. Modules
+that import the full app stack (services, autodrive, llm_client) need
+requirements.txt installed; their tests are skipped without it.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["LLM_PROVIDER"] = "stub"
+
+import database  # noqa: E402
+import models  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh schema, dropped after the test."""
+    models.Base.metadata.create_all(database.engine)
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        models.Base.metadata.drop_all(database.engine)
+
+
+@pytest.fixture
+def make_job(db):
+    def _make(title="Backend Engineer", description="Python, Django, PostgreSQL"):
+        job = models.Job(title=title, description=description)
+        db.add(job)
+        db.commit()
+        return job
+    return _make
+
+
+@pytest.fixture
+def make_candidate(db):
+    def _make(name="Jane Doe", resume_text="Python developer"):
+        cand = models.Candidate(name=name, email="unknown", resume_text=resume_text)
+        db.add(cand)
+        db.commit()
+        return cand
+    return _make
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# autodrive pulls in services (pypdf, litellm) and fastapi
+for _dep in ("fastapi", "litellm", "pypdf", "docx"):
+    pytest.importorskip(_dep)
+
+import autodrive  # noqa: E402
+import models  # noqa: E402
+import repository  # noqa: E402
+import services  # noqa: E402
+from llm_client import LLMUnavailableError  # noqa: E402
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """A fake LLM: records the resumes it scored; resumes in `down` hit an outage."""
+    fake = SimpleNamespace(calls=[], down=set())
+
+    def analyze(resume_text, job_description):
+        fake.calls.append(resume_text)
+        if resume_text in fake.down:
+            raise LLMUnavailableError("quota exhausted", retry_after=0)
+        return {"score": 80, "status": "Shortlist", "prompt_version": services.PROMPT_VERSION}
+
+    async def inline(fn, *args, **kwargs):
+        # In-memory SQLite is per thread: keep the run's session on this one
+        return fn(*args, **kwargs)
+
+    monkeypatch.setattr(services, "analyze_candidate", analyze)
+    monkeypatch.setattr(services, "get_job_embeddings", lambda jobs: {})
+    monkeypatch.setattr(
+        services, "resume_semantic_scores",
+        lambda job_vectors, texts: np.zeros((len(job_vectors), len(texts)), dtype=np.float32),
+    )
+    monkeypatch.setattr(autodrive, "_db", inline)
+    monkeypatch.setattr(autodrive, "AUTODRIVE_UNAVAILABLE_RETRIES", 1)
+    monkeypatch.setattr(autodrive, "AUTODRIVE_UNAVAILABLE_BACKOFF_SECONDS", 0)
+    return fake
+
+
+def _execute(db, run_id):
+    asyncio.run(autodrive.execute_run(run_id))
+    db.expire_all()
+    return db.get(models.AutoDriveRun, run_id)
+
+
+def _checkpointed(db, run_id):
+    rows = db.query(models.AutoDriveResult.candidate_id).filter(
+        models.AutoDriveResult.run_id == run_id
+    )
+    return {cand_id for (cand_id,) in rows}
+
+
+def test_execute_run_skips_checkpointed_pairs(db, make_job, make_candidate, llm):
+    job = make_job()
+    done, todo = make_candidate("Done", "done resume"), make_candidate("Todo", "todo resume")
+    run = autodrive.create_run(db, [job.id], [done.id, todo.id])
+    db.add(models.AutoDriveResult(run_id=run.id, job_id=job.id, candidate_id=done.id, message={}))
+    db.commit()
+
+    run = _execute(db, run.id)
+
+    assert llm.calls == ["todo resume"]
+    assert (run.status, run.completed_pairs) == ("done", 1)
+    assert _checkpointed(db, run.id) == {done.id, todo.id}
+
+
+def test_an_llm_outage_fails_the_run_without_writing_the_pair(db, make_job, make_candidate, llm):
+    job = make_job()
+    ok, down = make_candidate("Ok", "ok resume"), make_candidate("Down", "down resume")
+    repository.upsert_application(
+        db, job.id, down.id, {"score": 90, "status": "Shortlist", "prompt_version": "rubric-v1"}
+    )
+    db.commit()
+    llm.down.add("down resume")
+
+    run = _execute(db, autodrive.create_run(db, [job.id], [ok.id, down.id]).id)
+
+    assert run.status == "error" and "LLM unavailable" in run.error_message
+    # Retried once after the back-off, then left for /resume
+    assert llm.calls.count("down resume") == 2
+    assert _checkpointed(db, run.id) == {ok.id}
+    kept = db.query(models.Application).filter(models.Application.candidate_id == down.id).one()
+    assert (kept.match_score, kept.status) == (90, "Shortlist")
+
+    # Resuming scores only the pair the outage left behind
+    llm.down.clear()
+    llm.calls.clear()
+    assert autodrive.mark_for_resume(db, run.id)[1] is True
+    run = _execute(db, run.id)
+    assert run.status == "done"
+    assert llm.calls == ["down resume"]
+    assert _checkpointed(db, run.id) == {ok.id, down.id}
+
+
+def test_a_run_owned_by_a_live_worker_is_not_executed(db, make_job, make_candidate, llm):
+    job = make_job()
+    cand = make_candidate()
+    run = autodrive.create_run(db, [job.id], [cand.id])
+    run.status, run.owner, run.heartbeat_at = "running", "other-host:1:abc", autodrive._utcnow()
+    db.commit()
+
+    assert autodrive._unfinished_runs(db) == []
+    assert _execute(db, run.id).owner == "other-host:1:abc"
+    assert llm.calls == []
+
+
+def test_a_run_with_an_expired_heartbeat_is_reclaimed(db, make_job, make_candidate, llm):
+    job = make_job()
+    cand = make_candidate()
+    run = autodrive.create_run(db, [job.id], [cand.id])
+    expired = timedelta(seconds=autodrive.AUTODRIVE_HEARTBEAT_TIMEOUT_SECONDS + 1)
+    run.status, run.owner = "running", "other-host:1:abc"
+    run.heartbeat_at = autodrive._utcnow() - expired
+    db.commit()
+
+    assert autodrive._unfinished_runs(db) == [run.id]
+    run = _execute(db, run.id)
+    assert (run.status, run.owner) == ("done", autodrive.WORKER_ID)
+    assert len(llm.calls) == 1
+
+
+def test_only_one_claim_succeeds(db, make_job, make_candidate):
+    run = autodrive.create_run(db, [make_job().id], [make_candidate().id])
+    assert autodrive._claim_run(db, run.id) is True
+    assert autodrive._claim_run(db, run.id) is False
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from coalescer import MicroBatcher
+
+
+def _call_concurrently(batcher, items):
+    results = {}
+    barrier = threading.Barrier(len(items))
+
+    def _call(item):
+        barrier.wait()
+        results[item] = batcher.call(item, timeout=5)
+
+    threads = [threading.Thread(target=_call, args=(item,)) for item in items]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_calls_are_merged_into_one_batch():
+    batches = []
+
+    def batch_fn(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(batch_fn, window_ms=200)
+    results = _call_concurrently(batcher, list(range(5)))
+
+    assert results == {n: n * 2 for n in range(5)}
+    assert len(batches) == 1
+    assert sorted(batches[0]) == list(range(5))
+
+
+def test_batches_are_capped_at_max_batch():
+    batches = []
+
+    def batch_fn(items):
+        batches.append(len(items))
+        return list(items)
+
+    batcher = MicroBatcher(batch_fn, window_ms=200, max_batch=2)
+    assert _call_concurrently(batcher, list(range(5))) == {n: n for n in range(5)}
+    assert max(batches) <= 2
+    assert sum(batches) == 5
+
+
+def test_a_failed_batch_fails_every_caller():
+    def batch_fn(items):
+        raise RuntimeError("upstream down")
+
+    batcher = MicroBatcher(batch_fn, window_ms=1)
+    with pytest.raises(RuntimeError, match="upstream down"):
+        batcher.call("a", timeout=5)
+
+
+def test_a_short_result_list_is_an_error():
+    batcher = MicroBatcher(lambda items: [], window_ms=1)
+    with pytest.raises(ValueError, match="0 results for 1 items"):
+        batcher.call("a", timeout=5)
@@ -0,0 +1,89 @@
+import compaction
+
+
+def _paged(pages):
+    """Pages joined by form feeds, each with a running header and a page footer."""
+    return "\f".join(
+        f"Jane Doe - Curriculum Vitae\n{body}\nPage {i + 1} of {len(pages)}"
+        for i, body in enumerate(pages)
+    )
+
+
+def test_clean_keeps_repeated_job_titles():
+    text = (
+        "Jane Doe\nExperience\n"
+        "Software Engineer\nAcme, 2019 - 2024\n"
+        "Software Engineer\nGlobex, 2016 - 2019\n"
+        "Software Engineer\nInitech, 2012 - 2016\n"
+    )
+    assert compaction.clean(text).count("Software Engineer") == 3
+
+
+def test_clean_keeps_repeats_that_are_not_next_to_page_boundaries():
+    pages = [f"Software Engineer\nProject {i}\nmore details {i}\nand more {i}" for i in range(3)]
+    out = compaction.clean(_paged(pages))
+    assert out.count("Software Engineer") == 3
+
+
+def test_clean_strips_running_headers_and_page_numbers():
+    out = compaction.clean(_paged(["First page body", "Second page body", "Third page body"]))
+    assert out.count("Jane Doe - Curriculum Vitae") == 1
+    assert "Page " not in out
+    assert "\f" not in out
+    for body in ("First page body", "Second page body", "Third page body"):
+        assert body in out
+
+
+def test_clean_normalizes_bullets_whitespace_and_hyphenation():
+    out = compaction.clean("Skills\n  •   Python   and\tDjango\n▪ Kafka\nmicro-\nservices\n\n\n\nEnd")
+    assert "- Python and Django" in out
+    assert "- Kafka" in out
+    assert "microservices" in out
+    assert "\n\n\n" not in out
+
+
+def test_clean_is_idempotent():
+    once = compaction.clean(_paged(["• One", "• Two", "• Three"]))
+    assert compaction.clean(once) == once
+
+
+def test_compact_cleans_documents_within_budget_without_cutting():
+    text = (
+        "Curriculum Vitae\nJane\x00 Doe\x07\n\nExperience\n"
+        "Software Engineer    at Acme\n  •  Python\nSoftware Engineer\nSoftware Engineer\n"
+        "Page 1 of 2\fInterests\nChess\nPage 2 of 2"
+    )
+    out = compaction.compact(text, "resume", max_tokens=1000)
+    for noise in ("\x00", "\x07", "\f", "Page 1", "Curriculum Vitae", "    "):
+        assert noise not in out
+    assert out.count("Software Engineer") == 3
+    assert "- Python" in out
+    # Nothing is cut under budget, low-weight sections included
+    assert "Interests\nChess" in out
+    assert compaction.TRUNCATION_MARK not in out
+
+
+def test_compact_drops_boilerplate_sections_even_within_budget():
+    jd = "Backend Engineer\n\nRequirements\nPython\n\nEqual Opportunity\nWe are an equal opportunity employer."
+    out = compaction.compact(jd, "jd", max_tokens=1000)
+    assert "Requirements\nPython" in out
+    assert "equal opportunity employer" not in out
+
+
+def test_compact_fits_the_budget_and_keeps_the_contact_block():
+    resume = (
+        "Jane Doe\njane@example.com\n\n"
+        "Experience\n" + "Built Python services on AWS.\n" * 40 + "\n"
+        "Interests\n" + "Hiking and chess.\n" * 200
+    )
+    out = compaction.compact(resume, "resume", max_tokens=300)
+    assert len(out) // 4 <= 300
+    assert "jane@example.com" in out
+    assert "Built Python services on AWS." in out
+    assert "Hiking and chess." not in out
+
+
+def test_compact_is_disabled_by_the_flag(monkeypatch):
+    monkeypatch.setattr(compaction, "COMPACTION_ENABLED", False)
+    text = "Interests\n" + "Hiking.\n" * 500
+    assert compaction.compact(text, "resume", max_tokens=10) == text
@@ -0,0 +1,102 @@
+import models
+import dedup
+
+_WORDS = (
+    "Senior backend engineer with eight years of experience building Python services on AWS "
+    "designing PostgreSQL schemas running Kafka pipelines mentoring engineers and leading "
+    "migrations to Kubernetes while improving reliability observability and delivery speed"
+).split()
+RESUME = " ".join(_WORDS * 3)
+# Same resume with a trailing contact line: a near duplicate
+RESUME_EDITED = RESUME + " Contact: jane@example.com"
+OTHER = " ".join(f"token{i}" for i in range(120))
+
+
+def _candidate(db, text, name="cand"):
+    cand = models.Candidate(name=name, email="unknown", resume_text=text)
+    dedup.fingerprint(db, cand, text.encode(), text)
+    return cand
+
+
+def test_simhash_skips_short_texts():
+    assert dedup.simhash("Python developer") is None
+    assert dedup.simhash("") is None
+
+
+def test_simhash_is_stable_and_close_for_small_edits():
+    assert dedup.simhash(RESUME) == dedup.simhash(RESUME)
+    assert dedup.hamming(dedup.simhash(RESUME), dedup.simhash(RESUME_EDITED)) <= dedup.NEAR_DUP_MAX_DISTANCE
+    assert dedup.hamming(dedup.simhash(RESUME), dedup.simhash(OTHER)) > dedup.NEAR_DUP_MAX_DISTANCE
+
+
+def test_hashes_within_max_distance_share_a_band():
+    h = dedup.simhash(RESUME)
+    # Flip one bit in each of three different bands
+    flipped = h ^ (1 << 3) ^ (1 << 20) ^ (1 << 40)
+    assert dedup.hamming(h, flipped) == 3
+    assert any(a == b for a, b in zip(dedup.bands(h), dedup.bands(flipped)))
+
+
+def test_find_exact_returns_the_first_stored_candidate(db):
+    first, second = _candidate(db, RESUME), _candidate(db, RESUME)
+    db.add_all([first, second])
+    db.commit()
+
+    found = dedup.find_exact(db, [dedup.file_hash(RESUME.encode()), "missing"])
+    assert found == {dedup.file_hash(RESUME.encode()): first.id}
+
+
+def test_near_duplicate_of_a_stored_candidate_links_to_the_original(db):
+    original = _candidate(db, RESUME)
+    db.add(original)
+    db.flush()
+    dedup.index_bands(db, [original])
+    db.commit()
+
+    edited = _candidate(db, RESUME_EDITED)
+    unrelated = _candidate(db, OTHER)
+    assert edited.duplicate_of_id == original.id
+    assert unrelated.duplicate_of_id is None
+
+
+def test_near_duplicate_links_follow_to_the_first_version(db):
+    original = _candidate(db, RESUME)
+    db.add(original)
+    db.flush()
+    dedup.index_bands(db, [original])
+    copy = _candidate(db, RESUME_EDITED)
+    db.add(copy)
+    db.flush()
+    dedup.index_bands(db, [copy])
+    db.commit()
+
+    again = _candidate(db, RESUME_EDITED + " Updated")
+    assert again.duplicate_of_id == original.id
+
+
+def test_link_batch_finds_near_duplicates_within_one_upload(db):
+    # Nothing is banded yet: the DB lookup alone cannot see the first upload
+    cands = [_candidate(db, RESUME), _candidate(db, OTHER), _candidate(db, RESUME_EDITED)]
+    assert all(c.duplicate_of_id is None for c in cands)
+    db.add_all(cands)
+    db.flush()
+
+    assert dedup.link_batch(cands) == 1
+    assert cands[0].duplicate_of_id is None
+    assert cands[1].duplicate_of_id is None
+    assert cands[2].duplicate_of_id == cands[0].id
+
+
+def test_link_batch_keeps_links_to_stored_originals(db):
+    stored = _candidate(db, RESUME)
+    db.add(stored)
+    db.flush()
+    dedup.index_bands(db, [stored])
+    db.commit()
+
+    batch = [_candidate(db, RESUME_EDITED), _candidate(db, RESUME_EDITED + " again")]
+    db.add_all(batch)
+    db.flush()
+    dedup.link_batch(batch)
+
+    assert [c.duplicate_of_id for c in batch] == [stored.id, stored.id]
@@ -0,0 +1,183 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("litellm")
+
+import llm_client  # noqa: E402
+from llm_client import AdaptiveLimiter, CircuitBreaker, LLMUnavailableError, TokenBucket  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces llm_client's clock; advance it with clock.now += seconds. sleep() is instant."""
+    fake = SimpleNamespace(now=1000.0, slept=[])
+    fake.monotonic = lambda: fake.now
+    fake.sleep = fake.slept.append
+    monkeypatch.setattr(llm_client, "time", fake)
+    return fake
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+# --- TOKEN BUCKET ---
+
+def test_token_bucket_refills_at_the_per_minute_rate(clock):
+    bucket = TokenBucket(60)
+    bucket.acquire(60)
+    assert bucket.level == 0
+
+    clock.now += 2
+    bucket.acquire(2)
+    assert bucket.level == 0
+
+    # Never more than one minute's worth
+    clock.now += 600
+    bucket._refill()
+    assert bucket.level == 60
+
+
+def test_token_bucket_caps_oversized_requests_and_refunds(clock):
+    bucket = TokenBucket(100)
+    bucket.acquire(5000)
+    assert bucket.level == 0
+    bucket.refund(30)
+    assert bucket.level == 30
+    bucket.refund(500)
+    assert bucket.level == 100
+
+
+def test_a_zero_rate_bucket_is_disabled(clock):
+    bucket = TokenBucket(0)
+    bucket.acquire(10**6)
+    bucket.refund(10)
+    assert bucket.level == 0
+
+
+# --- AIMD LIMITER ---
+
+def test_limiter_halves_on_throttle_and_grows_additively():
+    limiter = AdaptiveLimiter(initial=8, minimum=1, maximum=10)
+    limiter.on_throttle()
+    assert limiter.limit == 4
+    for _ in range(4):
+        limiter.on_success()
+    assert 4.9 < limiter.limit < 5.0
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.limit == 1
+    for _ in range(200):
+        limiter.on_success()
+    assert limiter.limit == 10
+
+
+def test_limiter_blocks_beyond_the_window():
+    limiter = AdaptiveLimiter(initial=1, minimum=1, maximum=1)
+    limiter.acquire()
+    entered = threading.Event()
+
+    def _second():
+        limiter.acquire()
+        entered.set()
+
+    t = threading.Thread(target=_second, daemon=True)
+    t.start()
+    assert not entered.wait(0.05)
+    limiter.release()
+    assert entered.wait(1)
+    t.join()
+
+
+# --- CIRCUIT BREAKER ---
+
+def test_breaker_opens_after_the_threshold_and_fails_fast(clock):
+    breaker = CircuitBreaker(threshold=2, cooldown=30)
+    breaker.on_failure()
+    assert breaker.state == "closed"
+    breaker.on_failure()
+    assert breaker.state == "open"
+
+    clock.now += 10
+    with pytest.raises(LLMUnavailableError) as exc:
+        breaker.before_call()
+    assert exc.value.retry_after == 20
+
+
+def test_half_open_breaker_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.on_failure()
+    clock.now += 30
+    assert breaker.state == "half_open"
+
+    breaker.before_call()
+    with pytest.raises(LLMUnavailableError):
+        breaker.before_call()
+
+    # A failed trial reopens for a full cooldown
+    breaker.on_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    breaker.before_call()
+    breaker.on_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_a_neutral_trial_frees_the_half_open_slot(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.on_failure()
+    clock.now += 30
+    breaker.before_call()
+    breaker.on_neutral()
+    assert breaker.state == "half_open"
+    breaker.before_call()
+
+
+# --- CLIENT ---
+
+@pytest.fixture
+def client(clock, monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 2)
+    return llm_client.LLMClient("test", rpm=0, tpm=0)
+
+
+def _failing(errors, result="ok"):
+    errors = list(errors)
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return fn
+
+
+def test_client_retries_transient_errors(client):
+    assert client.call(_failing([_HTTPError(503), TimeoutError()])) == "ok"
+    assert client.counts["retries"] == 2
+    assert client.breaker.state == "closed"
+
+
+def test_client_raises_non_transient_errors_at_once(client):
+    with pytest.raises(_HTTPError):
+        client.call(_failing([_HTTPError(400)]))
+    assert client.counts["retries"] == 0
+
+
+def test_rate_limits_shrink_the_window_without_tripping_the_breaker(client):
+    start = client.limiter.limit
+    assert client.call(_failing([_HTTPError(429)])) == "ok"
+    assert client.counts["throttled"] == 1
+    assert client.limiter.limit < start
+    assert client.breaker.failures == 0
+
+
+def test_client_gives_up_with_llm_unavailable(client):
+    with pytest.raises(LLMUnavailableError, match="gave up after 3 attempts"):
+        client.call(_failing([_HTTPError(503)] * 3))
+    assert client.counts["failed"] == 1
@@ -0,0 +1,95 @@
+import prescorer
+
+
+def test_years_of_experience_merges_overlapping_roles():
+    resume = "Acme, Jan 2015 - Dec 2017\nGlobex, Jan 2017 - Jan 2019"
+    assert prescorer.years_of_experience(resume) == 4.0
+
+
+def test_years_of_experience_falls_back_to_a_stated_claim():
+    assert prescorer.years_of_experience("7 years of backend experience") == 7.0
+    assert prescorer.years_of_experience("Python developer") is None
+
+
+def test_required_years():
+    assert prescorer.required_years("3-5 years building APIs") == (3.0, 5.0)
+    assert prescorer.required_years("5+ years of Python") == (5.0, None)
+    assert prescorer.required_years("Python, Django") is None
+
+
+def test_gate_experience():
+    assert prescorer.gate_experience(None, (3.0, None)) == 0
+    assert prescorer.gate_experience(5.0, None) == 15
+    assert prescorer.gate_experience(5.0, (3.0, None)) == 30
+    assert prescorer.gate_experience(4.0, (3.0, 5.0)) == 30
+    # Within 2 years of the range on either side
+    assert prescorer.gate_experience(2.0, (3.0, None)) == 15
+    assert prescorer.gate_experience(6.0, (3.0, 5.0)) == 15
+    assert prescorer.gate_experience(0.5, (3.0, None)) == 0
+    assert prescorer.gate_experience(9.0, (3.0, 5.0)) == 0
+
+
+def test_gate_skills():
+    must_have = ["Python", "Django", "PostgreSQL"]
+    assert prescorer.gate_skills([], []) == 0
+    assert prescorer.gate_skills(must_have, must_have) == 40
+    assert prescorer.gate_skills(must_have, ["Python", "Django"]) == 17
+    # More than half missing
+    assert prescorer.gate_skills(must_have, ["Python"]) == 0
+    assert prescorer.gate_skills(must_have + ["AWS"], ["Python", "Django"]) == 10
+
+
+def test_gate_role_alignment_rewards_title_and_keyword_overlap():
+    jd = "Design backend services. Backend services in Python, deployed with Docker."
+    aligned = prescorer.gate_role_alignment("Backend Engineer", jd, "Backend engineer: designed services, Docker")
+    unrelated = prescorer.gate_role_alignment("Backend Engineer", jd, "Pastry chef and baker")
+    assert 0 < aligned <= 30
+    assert unrelated == 0
+
+
+def test_stability_issues():
+    assert prescorer.stability_issues("Jan 2010 - Jan 2012\nJan 2014 - Jan 2016") == [
+        "Career gap of 24 months"
+    ]
+    assert prescorer.stability_issues("Jan 2018 - Jun 2018\nJul 2018 - Dec 2018") == [
+        "2 roles shorter than 12 months"
+    ]
+    # One short stint is not job-hopping; a current role is never short
+    assert prescorer.stability_issues("Jan 2015 - Jun 2015\nJul 2015 - present") == []
+
+
+def test_prescore_totals_the_gates():
+    resume = "Jane Doe\njane@example.com\nBackend Engineer, Jan 2018 - present\nPython, Django, PostgreSQL"
+    result = prescorer.prescore(resume, "5+ years. Python, Django, PostgreSQL, Kafka", "Backend Engineer")
+
+    assert result["score"] == (
+        result["experience_score"] + result["skills_score"] + result["role_alignment_score"]
+    )
+    assert (result["name"], result["email"]) == ("Jane Doe", "jane@example.com")
+    assert result["skills_found"] == ["Python", "Django", "PostgreSQL"]
+    assert result["missing_skills"] == ["Kafka"]
+    assert result["prompt_version"] == prescorer.RULES_VERSION
+
+
+def test_stability_risk_overrides_a_shortlist_score():
+    resume = (
+        "Backend Engineer\nPython, Django, PostgreSQL\n"
+        "Acme, Jan 2010 - Jan 2013\nGlobex, Jan 2015 - Jan 2018"
+    )
+    result = prescorer.prescore(resume, "3-10 years. Python, Django, PostgreSQL", "Backend Engineer")
+    assert result["experience_score"] == 30 and result["skills_score"] == 40
+    assert (result["status"], result["stability_flag"]) == ("Reject", "RISK")
+
+
+def test_agreement_report():
+    rules = {"status": "Shortlist", "stability_flag": "OK", "score": 80, "skills_score": 40}
+    llm_same = {"status": "Shortlist", "stability_flag": "OK", "score": 70, "skills_score": 40}
+    llm_diff = {"status": "Reject", "stability_flag": "RISK", "score": 40, "skills_score": 20}
+
+    report = prescorer.agreement_report([(rules, llm_same), (rules, llm_diff)])
+    assert report["pairs"] == 2
+    assert report["status_agreement"] == 0.5
+    assert report["stability_agreement"] == 0.5
+    assert report["score_mae"] == 25.0
+    assert report["skills_score_mae"] == 10.0
+    assert prescorer.agreement_report([]) == {"pairs": 0}
@@ -0,0 +1,87 @@
+import models
+import repository
+
+
+def _ai(score, status="Shortlist", **extra):
+    return {"score": score, "status": status, "reasoning": f"score {score}", **extra}
+
+
+def _apps(db):
+    return db.query(models.Application).order_by(models.Application.id).all()
+
+
+def test_upsert_inserts_then_updates_the_same_pair(db, make_job, make_candidate):
+    job, cand = make_job(), make_candidate()
+
+    repository.upsert_application(db, job.id, cand.id, _ai(40, "Reject"))
+    db.commit()
+    repository.upsert_application(
+        db, job.id, cand.id, _ai(85, prompt_version="rubric-v2"), jd_hash="abc"
+    )
+    db.commit()
+
+    apps = _apps(db)
+    assert len(apps) == 1
+    assert (apps[0].match_score, apps[0].status) == (85, "Shortlist")
+    assert (apps[0].jd_hash, apps[0].prompt_version) == ("abc", "rubric-v2")
+
+
+def test_upsert_many_keeps_the_last_row_per_pair(db, make_job, make_candidate):
+    job, a, b = make_job(), make_candidate("A"), make_candidate("B")
+
+    repository.upsert_applications(db, [
+        repository.application_values(job.id, a.id, _ai(10)),
+        repository.application_values(job.id, b.id, _ai(20)),
+        repository.application_values(job.id, a.id, _ai(30)),
+    ])
+    db.commit()
+
+    scores = {app.candidate_id: app.match_score for app in _apps(db)}
+    assert scores == {a.id: 30, b.id: 20}
+
+
+def test_upsert_of_nothing_is_a_no_op(db):
+    repository.upsert_applications(db, [])
+    db.commit()
+    assert _apps(db) == []
+
+
+def test_writer_flushes_by_count_with_extras_and_counter(db, make_job, make_candidate):
+    job = make_job()
+    cands = [make_candidate(f"C{i}") for i in range(3)]
+    flushed = []
+    writer = repository.ApplicationWriter(
+        db, batch_size=2, flush_seconds=3600, on_flush=flushed.append
+    )
+
+    def checkpoint(cand):
+        return models.AutoDriveResult(run_id=None, job_id=job.id, candidate_id=cand.id, message={})
+
+    assert writer.add(job.id, cands[0].id, _ai(50), extra=checkpoint(cands[0])) is False
+    assert _apps(db) == []
+    assert writer.add(job.id, cands[1].id, _ai(60), extra=checkpoint(cands[1])) is True
+    assert len(_apps(db)) == 2
+    assert db.query(models.AutoDriveResult).count() == 2
+
+    # ai=None records only the extra object
+    writer.add(job.id, cands[2].id, None, extra=checkpoint(cands[2]))
+    writer.flush()
+
+    assert flushed == [2, 1]
+    assert writer.commits == 2
+    assert len(_apps(db)) == 2
+    assert db.query(models.AutoDriveResult).count() == 3
+
+
+def test_writer_flush_without_pending_rows_does_not_commit(db):
+    writer = repository.ApplicationWriter(db, batch_size=10, flush_seconds=3600)
+    writer.flush()
+    assert writer.commits == 0
+
+
+def test_writer_flushes_when_the_interval_has_passed(db, make_job, make_candidate):
+    job, cand = make_job(), make_candidate()
+    writer = repository.ApplicationWriter(db, batch_size=100, flush_seconds=0)
+
+    assert writer.add(job.id, cand.id, _ai(70)) is True
+    assert len(_apps(db)) == 1
@@ -0,0 +1,95 @@
+import pytest
+
+# rescoring pulls in services / autodrive (pypdf, litellm, fastapi)
+for _dep in ("fastapi", "litellm", "pypdf", "docx"):
+    pytest.importorskip(_dep)
+
+import models  # noqa: E402
+import prescorer  # noqa: E402
+import repository  # noqa: E402
+import rescoring  # noqa: E402
+import services  # noqa: E402
+
+
+def _score(db, job, cand, prompt_version, jd_hash=None, status="Shortlist"):
+    repository.upsert_application(
+        db, job.id, cand.id,
+        {"score": 70, "status": status, "prompt_version": prompt_version},
+        jd_hash=jd_hash if jd_hash is not None else job.description_hash,
+    )
+    db.commit()
+
+
+def _versioned_job(db, make_job, description="Python, Django, PostgreSQL"):
+    job = make_job(description=description)
+    rescoring.stamp_job(job, description)
+    db.commit()
+    return job
+
+
+def test_stamp_job_bumps_the_version_only_on_a_real_change(db, make_job):
+    job = _versioned_job(db, make_job)
+    job.version = 1
+
+    assert rescoring.stamp_job(job, "Python, Django, PostgreSQL") is False
+    assert job.version == 1
+    assert rescoring.stamp_job(job, "Go, Kafka") is True
+    assert job.version == 2
+    assert job.description_hash == repository.description_hash("Go, Kafka")
+
+
+def test_current_rows_are_not_stale(db, make_job, make_candidate):
+    job = _versioned_job(db, make_job)
+    llm, rules = make_candidate("LLM"), make_candidate("Rules")
+    _score(db, job, llm, services.PROMPT_VERSION)
+    _score(db, job, rules, prescorer.RULES_VERSION)
+
+    assert rescoring.stale_applications(db, job.id) == {}
+    assert rescoring.stale_counts(db) == {}
+
+
+def test_old_prompt_versions_and_errors_are_stale(db, make_job, make_candidate):
+    job = _versioned_job(db, make_job)
+    old, errored, fresh = make_candidate("Old"), make_candidate("Error"), make_candidate("Fresh")
+    _score(db, job, old, "rubric-v1")
+    _score(db, job, errored, None, status="Error")
+    _score(db, job, fresh, services.PROMPT_VERSION)
+
+    assert rescoring.stale_applications(db, job.id) == {"llm": [old.id, errored.id]}
+    assert rescoring.stale_counts(db) == {job.id: 2}
+
+
+def test_a_description_change_makes_every_row_stale(db, make_job, make_candidate):
+    job = _versioned_job(db, make_job)
+    llm, rules = make_candidate("LLM"), make_candidate("Rules")
+    _score(db, job, llm, services.PROMPT_VERSION)
+    _score(db, job, rules, prescorer.RULES_VERSION)
+
+    rescoring.stamp_job(job, "Go, Kafka, Kubernetes")
+    db.commit()
+
+    # Grouped by the mode each row was originally scored with
+    assert rescoring.stale_applications(db, job.id) == {"llm": [llm.id], "rules": [rules.id]}
+
+
+def test_rows_without_a_jd_hash_are_stale(db, make_job, make_candidate):
+    job = _versioned_job(db, make_job)
+    cand = make_candidate()
+    _score(db, job, cand, services.PROMPT_VERSION, jd_hash="")
+    db.query(models.Application).update({"jd_hash": None})
+    db.commit()
+
+    assert rescoring.stale_applications(db, job.id) == {"llm": [cand.id]}
+
+
+def test_create_rescore_runs_covers_only_stale_pairs(db, make_job, make_candidate):
+    job = _versioned_job(db, make_job)
+    stale, fresh = make_candidate("Stale"), make_candidate("Fresh")
+    _score(db, job, stale, "rubric-v1")
+    _score(db, job, fresh, services.PROMPT_VERSION)
+
+    (run_id,) = rescoring.create_rescore_runs(db, job.id)
+    run = db.get(models.AutoDriveRun, run_id)
+    assert (run.job_ids, run.candidate_ids) == ([job.id], [stale.id])
+    assert run.config["scoring_mode"] == "llm"
+    assert (run.config["cascade_top_k"], run.config["cascade_threshold"]) == (0, 0.0)
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+import scoring_engine
+
+
+def _collect(items, score_fn, concurrency):
+    async def _run():
+        return [r async for r in scoring_engine.score_pairs(items, score_fn, concurrency)]
+    return asyncio.run(_run())
+
+
+def test_score_pairs_yields_every_result_and_error():
+    def score(n):
+        if n == 3:
+            raise ValueError("bad pair")
+        return n * 10
+
+    out = {item: (result, err) for item, result, err in _collect(range(6), score, 2)}
+    assert sorted(out) == list(range(6))
+    assert out[2] == (20, None)
+    result, err = out[3]
+    assert result is None and isinstance(err, ValueError)
+
+
+def test_score_pairs_keeps_at_most_the_window_in_flight():
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def score(n):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.01)
+        with lock:
+            state["running"] -= 1
+        return n
+
+    assert len(_collect(range(20), score, 3)) == 20
+    assert state["peak"] == 3
+
+
+def test_score_pairs_pulls_items_lazily_and_stops_when_the_consumer_does():
+    pulled, started = [], []
+
+    def items():
+        for n in range(100):
+            pulled.append(n)
+            yield n
+
+    def score(n):
+        started.append(n)
+        time.sleep(0.01)
+        return n
+
+    async def _first():
+        gen = scoring_engine.score_pairs(items(), score, concurrency=2)
+        async for item, _, _ in gen:
+            break
+        await gen.aclose()
+        return item
+
+    asyncio.run(_first())
+    time.sleep(0.05)
+    # The initial window plus one refill; nothing else was ever submitted
+    assert len(pulled) <= 3
+    assert len(started) <= 3
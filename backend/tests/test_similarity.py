@@ -0,0 +1,50 @@
+import numpy as np
+
+import similarity
+
+
+def test_similarity_matrix_is_cosine():
+    scores = similarity.similarity_matrix([[1, 0], [1, 1]], [[2, 0], [0, 3], [1, 1]])
+    assert scores.shape == (2, 3)
+    assert np.allclose(scores[0], [1.0, 0.0, 0.7071], atol=1e-4)
+    assert np.allclose(scores[1], [0.7071, 0.7071, 1.0], atol=1e-4)
+
+
+def test_missing_and_zero_vectors_score_zero():
+    scores = similarity.similarity_matrix([[1, 0]], [[], None, [0, 0], [1, 0, 0], [1, 0]])
+    assert scores.tolist() == [[0.0, 0.0, 0.0, 0.0, 1.0]]
+
+
+def test_top_k_returns_the_best_columns_best_first():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7], [0.8, 0.2, 0.6, 0.4]], dtype=np.float32)
+    best = similarity.top_k(scores, 2)
+    assert [[c for c, _ in row] for row in best] == [[1, 3], [0, 2]]
+    assert best[0][0][1] == np.float32(0.9)
+
+
+def test_top_k_caps_k_at_the_number_of_columns():
+    scores = np.array([[0.3, 0.1, 0.2]], dtype=np.float32)
+    assert [c for c, _ in similarity.top_k(scores, 10)[0]] == [0, 2, 1]
+
+
+def test_top_k_degenerate_inputs():
+    assert similarity.top_k(np.zeros((2, 3)), 0) == [[], []]
+    assert similarity.top_k(np.zeros((2, 0)), 5) == [[], []]
+
+
+def test_chunk_similarity_reduces_each_candidate_by_max_or_mean():
+    jobs = [[1, 0], [0, 1]]
+    cands = [[[1, 0], [0, 1]], [[1, 1]], [[1, 0], [1, 0], [0, 1]]]
+
+    best = similarity.chunk_similarity(jobs, cands, "max")
+    assert np.allclose(best, [[1.0, 0.7071, 1.0], [1.0, 0.7071, 1.0]], atol=1e-4)
+
+    mean = similarity.chunk_similarity(jobs, cands, "mean")
+    assert np.allclose(mean, [[0.5, 0.7071, 2 / 3], [0.5, 0.7071, 1 / 3]], atol=1e-4)
+
+
+def test_candidates_without_chunks_score_zero():
+    scores = similarity.chunk_similarity([[1, 0]], [[], [[1, 0]], None])
+    assert scores.tolist() == [[0.0, 1.0, 0.0]]
+    assert similarity.chunk_similarity([[1, 0]], [[], None]).tolist() == [[0.0, 0.0]]
+    assert similarity.chunk_similarity([], [[[1, 0]]]).shape == (0, 1)
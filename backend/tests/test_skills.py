@@ -0,0 +1,66 @@
+import skills
+
+
+def test_extract_returns_canonical_names_in_order_of_appearance():
+    text = "Built services in python3 and golang, deployed on k8s with Postgres."
+    assert skills.extract(text) == ["Python", "Go", "Kubernetes", "PostgreSQL"]
+
+
+def test_extract_reports_each_skill_once():
+    assert skills.extract("Python, python, PYTHON and python3") == ["Python"]
+
+
+def test_extract_matches_whole_tokens_only():
+    assert skills.extract("JavaScript developer") == ["JavaScript"]
+    assert skills.extract("Expert in C++ and C#") == ["C++", "C#"]
+    assert skills.extract("Pythonic code") == []
+
+
+def test_extract_prefers_the_longest_overlapping_match():
+    assert skills.extract("Spring Boot microservices") == ["Spring Boot", "Microservices"]
+    assert skills.extract("Apache Kafka streams") == ["Kafka"]
+
+
+def test_extract_handles_dotted_names():
+    assert skills.extract("Node.js, .NET and Next.js") == ["Node.js", ".NET", "Next.js"]
+
+
+def test_case_sensitive_skills_need_their_exact_spelling():
+    assert skills.extract("Happy to go the extra mile on the rest") == []
+    assert skills.extract("Services in Go behind a REST API") == ["Go", "REST"]
+
+
+def test_normalize_maps_synonyms_to_canonical_names():
+    assert skills.matcher.normalize("  K8S ") == "Kubernetes"
+    assert skills.matcher.normalize("sklearn") == "scikit-learn"
+    assert skills.matcher.normalize("cobol") is None
+
+
+def test_custom_taxonomy_builds_its_own_automaton():
+    matcher = skills.SkillMatcher({"he": [], "she": [], "hers": [], "his": []})
+    # Overlapping patterns reached through failure links
+    assert matcher.find("ushers") == []
+    assert matcher.find("she said his was hers") == ["she", "his", "hers"]
+
+
+def test_persisted_skill_queries(db, make_candidate):
+    full = make_candidate("Full", "Python, Django and PostgreSQL on AWS")
+    partial = make_candidate("Partial", "Python and Flask")
+    other = make_candidate("Other", "Excel and Tableau")
+    skills.index_candidates(db, [(c.id, c.resume_text) for c in (full, partial, other)])
+    db.commit()
+
+    required = ["Python", "Django", "PostgreSQL"]
+    assert skills.candidates_with_all(db, required) == [full.id]
+    assert [tuple(r) for r in skills.rank_by_coverage(db, required)] == [(full.id, 3), (partial.id, 1)]
+    assert sorted(skills.skill_sets(db, [partial.id])[partial.id]) == ["Flask", "Python"]
+
+
+def test_index_candidates_replaces_previous_rows(db, make_candidate):
+    cand = make_candidate("Jane", "Python")
+    skills.index_candidates(db, [(cand.id, "Python")])
+    db.commit()
+    skills.index_candidates(db, [(cand.id, "Rust and Go")])
+    db.commit()
+
+    assert sorted(skills.skill_sets(db, [cand.id])[cand.id]) == ["Go", "Rust"]
@@ -1,6 +1,9 @@
 from qdrant_client import QdrantClient, models
+from concurrent.futures import ThreadPoolExecutor
 import os
 
+from providers import EMBEDDING_DIM
+
 # --- SMART CONNECTION LOGIC ---
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
@@ -9,22 +12,131 @@ print(f"DEBUG: Connecting to Qdrant at {QDRANT_HOST}:{QDRANT_PORT}")
 
 client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
 
+# --- WRITE CONFIG ---
+# Points per upsert request, and how many requests are in flight at once
+QDRANT_UPSERT_BATCH = int(os.getenv("QDRANT_UPSERT_BATCH", 256))
+QDRANT_UPSERT_PARALLEL = int(os.getenv("QDRANT_UPSERT_PARALLEL", 4))
+# wait=true blocks each request until the points are applied, so reads
+# right after a write see it. Bulk writes can set QDRANT_BULK_WAIT=false to
+# be acknowledged on receipt (points become searchable moments later).
+QDRANT_WAIT = os.getenv("QDRANT_WAIT", "true").lower() == "true"
+QDRANT_BULK_WAIT = os.getenv("QDRANT_BULK_WAIT", "true").lower() == "true"
+# weak / medium / strong (see Qdrant write ordering)
+QDRANT_WRITE_ORDERING = os.getenv("QDRANT_WRITE_ORDERING", "weak").lower()
+
+# Vector size of every collection: the embedding provider's output size
+# (fixed when a collection is created)
+VECTOR_SIZE = EMBEDDING_DIM
+
+# Payload fields used in filters get an index, or filtered search scans
+PAYLOAD_INDEXES = {
+    "resumes": {"batch_id": models.PayloadSchemaType.KEYWORD},
+    "resume_chunks": {"batch_id": models.PayloadSchemaType.KEYWORD},
+    "jobs": {},
+}
+
+# One point per resume holding all its section-chunk vectors; MAX_SIM makes
+# a single-vector query score each resume by its best-matching chunk.
+CHUNK_COLLECTION = "resume_chunks"
+
+
+class BatchUpsertError(Exception):
+    """Some chunks of a batch upsert failed; the rest were written."""
+
+    def __init__(self, failed: list, written: int):
+        self.failed = failed  # [(first point index, exception)]
+        self.written = written
+        super().__init__(f"{len(failed)} upsert chunk(s) failed: {failed[0][1]}")
+
+
+def _ordering():
+    return models.WriteOrdering(QDRANT_WRITE_ORDERING)
+
+
+def _ensure_payload_indexes(collection: str):
+    existing = client.get_collection(collection).payload_schema or {}
+    for field, schema in PAYLOAD_INDEXES.get(collection, {}).items():
+        if field not in existing:
+            client.create_payload_index(
+                collection_name=collection,
+                field_name=field,
+                field_schema=schema,
+                wait=True,
+            )
+
 def init_collections():
-    """Create collections if they don't exist"""
+    """Create collections (and their payload indexes) if they don't exist"""
     # 1. Collection for Resumes
     if not client.collection_exists("resumes"):
         client.create_collection(
             collection_name="resumes",
-            vectors_config=models.VectorParams(size=768, distance=models.Distance.COSINE),
+            vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE),
         )
 
     # 2. Collection for Jobs (Optional)
     if not client.collection_exists("jobs"):
         client.create_collection(
             collection_name="jobs",
-            vectors_config=models.VectorParams(size=768, distance=models.Distance.COSINE),
+            vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE),
         )
 
+    # 3. Chunked resumes (multi-vector points)
+    if not client.collection_exists(CHUNK_COLLECTION):
+        client.create_collection(
+            collection_name=CHUNK_COLLECTION,
+            vectors_config=models.VectorParams(
+                size=VECTOR_SIZE,
+                distance=models.Distance.COSINE,
+                multivector_config=models.MultiVectorConfig(
+                    comparator=models.MultiVectorComparator.MAX_SIM
+                ),
+            ),
+        )
+
+    for collection in PAYLOAD_INDEXES:
+        _ensure_payload_indexes(collection)
+
+def upsert_points(collection: str, points: list, batch_size: int = None,
+                  parallel: int = None, wait: bool = None, on_chunk=None) -> int:
+    """
+    Upsert PointStructs in chunks of `batch_size`, up to `parallel` requests
+    in flight. `on_chunk(n)` is called after each successful chunk.
+    Returns the number written; raises BatchUpsertError if any chunk failed.
+    """
+    if not points:
+        return 0
+    batch_size = batch_size or QDRANT_UPSERT_BATCH
+    parallel = max(1, parallel or QDRANT_UPSERT_PARALLEL)
+    wait = QDRANT_BULK_WAIT if wait is None else wait
+
+    def _send(start):
+        chunk = points[start:start + batch_size]
+        client.upsert(
+            collection_name=collection,
+            points=chunk,
+            wait=wait,
+            ordering=_ordering(),
+        )
+        return len(chunk)
+
+    starts = list(range(0, len(points), batch_size))
+    written, failed = 0, []
+    with ThreadPoolExecutor(max_workers=min(parallel, len(starts))) as pool:
+        futures = [(start, pool.submit(_send, start)) for start in starts]
+        for start, fut in futures:
+            try:
+                n = fut.result()
+            except Exception as e:
+                failed.append((start, e))
+                continue
+            written += n
+            if on_chunk:
+                on_chunk(n)
+
+    if failed:
+        raise BatchUpsertError(failed, written)
+    return written
+
 def store_resume_vector(candidate_id: int, vector: list, metadata: dict):
     client.upsert(
         collection_name="resumes",
@@ -34,27 +146,177 @@ def store_resume_vector(candidate_id: int, vector: list, metadata: dict):
                 vector=vector,
                 payload=metadata
             )
-        ]
+        ],
+        wait=QDRANT_WAIT,
+        ordering=_ordering(),
     )
 
-def search_resumes_for_job(job_vector: list, limit: int = 5, batch_id: str = None):
-    query_filter = None
-    if batch_id:
-        query_filter = models.Filter(
-            must=[
-                models.FieldCondition(
-                    key="batch_id",
-                    match=models.MatchValue(value=batch_id)
-                )
-            ]
+def store_resume_vectors(items: list, **kwargs) -> int:
+    """
+    Bulk upsert. items = [(candidate_id, vector, metadata), ...];
+    kwargs as for upsert_points (batch_size, parallel, wait, on_chunk).
+    """
+    points = [
+        models.PointStruct(id=cid, vector=vec, payload=meta)
+        for cid, vec, meta in items
+    ]
+    return upsert_points("resumes", points, **kwargs)
+
+def store_resume_chunks(items: list, **kwargs) -> int:
+    """
+    Bulk upsert of chunked resumes. items = [(candidate_id, [chunk vectors], metadata), ...];
+    resumes without chunk vectors are skipped.
+    """
+    points = [
+        models.PointStruct(id=cid, vector=vecs, payload=meta)
+        for cid, vecs, meta in items
+        if vecs
+    ]
+    return upsert_points(CHUNK_COLLECTION, points, **kwargs)
+
+def add_resume_to_batch(candidate_id: int, batch_id: str):
+    """
+    Tag an existing resume point with another batch. `batch_id` becomes a
+    list; MatchValue filters match any element, so searches keep working.
+    """
+    for collection in ("resumes", CHUNK_COLLECTION):
+        points = client.retrieve(collection_name=collection, ids=[candidate_id], with_payload=True)
+        if not points:
+            continue
+        current = (points[0].payload or {}).get("batch_id")
+        batches = current if isinstance(current, list) else ([current] if current else [])
+        if batch_id not in batches:
+            batches.append(batch_id)
+        client.set_payload(
+            collection_name=collection,
+            payload={"batch_id": batches},
+            points=[candidate_id],
+            wait=QDRANT_WAIT,
+            ordering=_ordering(),
         )
 
-    results = client.query_points(
+def store_job_vector(job_id: int, vector: list, metadata: dict):
+    client.upsert(
+        collection_name="jobs",
+        points=[
+            models.PointStruct(
+                id=job_id,
+                vector=vector,
+                payload=metadata
+            )
+        ],
+        wait=QDRANT_WAIT,
+        ordering=_ordering(),
+    )
+
+def get_job_vectors(job_ids: list) -> dict:
+    """Fetch stored job points. Returns {job_id: (vector, payload)}."""
+    if not job_ids:
+        return {}
+    points = client.retrieve(
+        collection_name="jobs",
+        ids=list(job_ids),
+        with_vectors=True,
+        with_payload=True
+    )
+    return {p.id: (p.vector, p.payload or {}) for p in points}
+
+def get_resume_vectors(candidate_ids: list) -> dict:
+    """Fetch stored resume vectors. Returns {candidate_id: vector}."""
+    if not candidate_ids:
+        return {}
+    points = client.retrieve(
+        collection_name="resumes",
+        ids=list(candidate_ids),
+        with_vectors=True,
+        with_payload=False
+    )
+    return {p.id: p.vector for p in points}
+
+def get_resume_payloads(candidate_ids: list) -> dict:
+    """Fetch resume payloads without vectors. Returns {candidate_id: payload}."""
+    if not candidate_ids:
+        return {}
+    points = client.retrieve(
         collection_name="resumes",
-        query=job_vector,
+        ids=list(candidate_ids),
+        with_vectors=False,
+        with_payload=True
+    )
+    return {p.id: p.payload or {} for p in points}
+
+def get_resume_chunk_vectors(candidate_ids: list) -> dict:
+    """Fetch stored chunk vectors. Returns {candidate_id: [vector, ...]}."""
+    if not candidate_ids:
+        return {}
+    points = client.retrieve(
+        collection_name=CHUNK_COLLECTION,
+        ids=list(candidate_ids),
+        with_vectors=True,
+        with_payload=False
+    )
+    return {p.id: p.vector for p in points}
+
+def store_job_vectors(items: list, **kwargs) -> int:
+    """Bulk upsert of job points. items = [(job_id, vector, metadata), ...]"""
+    points = [
+        models.PointStruct(id=jid, vector=vec, payload=meta)
+        for jid, vec, meta in items
+    ]
+    return upsert_points("jobs", points, **kwargs)
+
+def _batch_filter(batch_id: str = None):
+    if not batch_id:
+        return None
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key="batch_id",
+                match=models.MatchValue(value=batch_id)
+            )
+        ]
+    )
+
+def _resume_target(vector: list, chunked: bool):
+    """Collection and query for a resume search (multi-vector query when chunked)."""
+    if chunked:
+        return CHUNK_COLLECTION, [vector]
+    return "resumes", vector
+
+def search_resumes_for_jobs(job_vectors: list, limit: int = 10, batch_id: str = None,
+                            chunked: bool = False) -> list:
+    """
+    One query_batch_points round-trip for many query vectors.
+    Returns a list of hit lists, aligned with `job_vectors`.
+    """
+    if not job_vectors:
+        return []
+    query_filter = _batch_filter(batch_id)
+    targets = [_resume_target(vec, chunked) for vec in job_vectors]
+    responses = client.query_batch_points(
+        collection_name=targets[0][0],
+        requests=[
+            models.QueryRequest(query=query, filter=query_filter, limit=limit, with_payload=True)
+            for _, query in targets
+        ],
+    )
+    return [r.points for r in responses]
+
+def search_resumes_for_job(job_vector: list, limit: int = 5, batch_id: str = None,
+                           payload_fields: list = None, chunked: bool = False):
+    """
+    `payload_fields` limits the returned payload to those keys (default: all).
+    `chunked` searches the multi-vector collection (best-chunk score).
+    """
+    query_filter = _batch_filter(batch_id)
+    collection, query = _resume_target(job_vector, chunked)
+
+    results = client.query_points(
+        collection_name=collection,
+        query=query,
         limit=limit,
-        query_filter=query_filter, 
-        with_payload=True 
+        query_filter=query_filter,
+        with_payload=payload_fields or True
     )
     
     return results.points
\ No newline at end of file
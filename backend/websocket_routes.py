@@ -1,38 +1,40 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import json
 from pydantic import BaseModel
 
-from database import get_db
+from database import get_db, get_async_db, run_db, AsyncDB
 import models
-import services
 import chat_service
+import autodrive
 
 router = APIRouter()
 
-# -----------------------------
-# Global In-Memory State
-# -----------------------------
-CURRENT_AUTODRIVE_CONFIG = {
-    "job_ids": [],
-    "candidate_ids": []
-}
-
 class AutoDriveStartRequest(BaseModel):
     job_ids: List[int]
     candidate_ids: List[int]
+    cascade_top_k: Optional[int] = None
+    cascade_threshold: Optional[float] = None
+    scoring_mode: Optional[str] = None
+    prefilter_min_score: Optional[int] = None
+    batch_prompting: Optional[bool] = None
 
 # -----------------------------
 # HTTP POST: Start AutoDrive
 # -----------------------------
 @router.post("/bulk/autodrive/start")
-def start_autodrive(req: AutoDriveStartRequest):
-    global CURRENT_AUTODRIVE_CONFIG
-    CURRENT_AUTODRIVE_CONFIG["job_ids"] = req.job_ids
-    CURRENT_AUTODRIVE_CONFIG["candidate_ids"] = req.candidate_ids
-    print(f"AutoDrive Configured: {len(req.job_ids)} jobs, {len(req.candidate_ids)} candidates")
-    return {"ok": True}
+async def start_autodrive(req: AutoDriveStartRequest, db: AsyncDB = Depends(get_async_db)):
+    config = autodrive.run_config(req)
+    try:
+        run_id = await db.run(
+            lambda s: autodrive.create_run(s, req.job_ids, req.candidate_ids, config=config).id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await autodrive.enqueue(run_id)
+    print(f"AutoDrive run {run_id} queued: {len(req.job_ids)} jobs, {len(req.candidate_ids)} candidates")
+    return {"ok": True, "run_id": run_id}
 
 
 # -----------------------------
@@ -45,9 +47,6 @@ def _safe_float(x):
         return 0.0
 
 
-# -----------------------------
-# WebSocket: AutoDrive Streaming
-# -----------------------------
 # -----------------------------
 # WebSocket: AutoDrive Streaming
 # -----------------------------
@@ -62,26 +61,19 @@ async def ws_autodrive(websocket: WebSocket):
         await websocket.close()
         return
 
-    # Decode user ID from token
+    # Decode user from token
     try:
-        from store import active_autodrive_sessions
         import auth
         from jose import jwt
-        
+
         payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
-        user_id = str(payload.get("sub"))
-        
-        # We need to map email (sub) to user ID or use email as key
-        # For simplicity, let's assume the session key is the user ID 
-        # But wait, main.py uses user.id (int) converted to str as key.
-        # We need to fetch the user to get the ID.
-        
-        db = next(get_db())
-        user = db.query(models.User).filter(models.User.email == user_id).first()
-        if not user:
+        email = str(payload.get("sub"))
+
+        user_id = await run_db(
+            lambda s: s.query(models.User.id).filter(models.User.email == email).scalar()
+        )
+        if not user_id:
              raise Exception("User not found")
-        
-        session_key = str(user.id)
 
     except Exception as e:
         print(f"WS Auth Error: {e}")
@@ -89,98 +81,22 @@ async def ws_autodrive(websocket: WebSocket):
         await websocket.close()
         return
 
-    # Does user have an active session?
-    if session_key not in active_autodrive_sessions:
-        await websocket.send_json({"type": "error", "msg": "No active autodrive session"})
+    run_id = websocket.query_params.get("run_id")
+    if not run_id:
+        await websocket.send_json({"type": "error", "msg": "Missing run_id"})
         await websocket.close()
         return
 
-    session = active_autodrive_sessions[session_key]
-    job_ids = session["job_ids"]
-    cand_ids = session["candidate_ids"]
-
-    # Optional: Cleanup session immediately or keep it? 
-    # Let's keep it for now or delete if single-use.
-    del active_autodrive_sessions[session_key]
-
+    # The run executes on the autodrive worker pool; this socket only
+    # replays checkpointed results and follows new ones.
     try:
-        jobs = db.query(models.Job).filter(models.Job.id.in_(job_ids)).all()
-        candidates = db.query(models.Candidate).filter(models.Candidate.id.in_(cand_ids)).all()
-
-        # Precompute candidate embeddings
-        cand_vecs = {}
-        for c in candidates:
-            try:
-                cand_vecs[c.id] = services.get_embedding(c.resume_text)
-            except Exception:
-                cand_vecs[c.id] = []
-        
-        # STREAMING LOOP
-        import asyncio
-        for job in jobs:
-            job_key = f"{job.title} (ID {job.id})"
-            try:
-                job_vec = services.get_embedding(f"{job.title}. {job.description}")
-            except:
-                job_vec = []
-
-            for cand in candidates:
-                await asyncio.sleep(0.15)  # smooth streaming intervals
-
-                # Semantic Score
-                semantic = services.cosine_similarity(job_vec, cand_vecs.get(cand.id, [])) or 0.0
-
-                # Deep analysis
-                ai = services.analyze_candidate(cand.resume_text, job.description)
-
-                # Upsert DB application row
-                app_row = (
-                    db.query(models.Application)
-                    .filter(
-                        models.Application.job_id == job.id,
-                        models.Application.candidate_id == cand.id,
-                    )
-                    .first()
-                )
-
-                if not app_row:
-                    app_row = models.Application(job_id=job.id, candidate_id=cand.id)
-                    db.add(app_row)
-
-                app_row.match_score = ai.get("score", 0)
-                app_row.status = ai.get("status", "Reject")
-                app_row.reasoning = ai.get("reasoning", "")
-                app_row.experience_score = ai.get("experience_score", 0)
-                app_row.skills_score = ai.get("skills_score", 0)
-                app_row.role_alignment_score = ai.get("role_alignment_score", 0)
-                app_row.stability_flag = ai.get("stability_flag", "OK")
-                app_row.missing_skills = ai.get("missing_skills", [])
-                app_row.skills_found = ai.get("skills_found", [])
-
-                db.commit()
-
-                # STREAM JSON PACKET TO UI
-                await websocket.send_json({
-                    "type": "result",
-                    "job_key": job_key,
-                    "candidate": {
-                        "candidate_id": cand.id,
-                        "candidate_name": cand.name,
-                        "deep_score": ai.get("score", 0),
-                        "semantic_score": round(float(semantic), 3),
-                        "status": ai.get("status", "Reject"),
-                        "experience_score": ai.get("experience_score", 0),
-                        "skills_score": ai.get("skills_score", 0),
-                        "role_alignment_score": ai.get("role_alignment_score", 0),
-                        "skills_found": ai.get("skills_found", []),
-                        "missing_skills": ai.get("missing_skills", []),
-                        "reasoning": ai.get("reasoning", ""),
-                    },
-                })
-
-        await websocket.send_json({"type": "done"})
+        after = int(websocket.query_params.get("after") or 0)
+        await autodrive.stream_run(websocket, int(run_id), after_id=after)
         await websocket.close()
 
+    except WebSocketDisconnect:
+        print(f"WS autodrive subscriber for run {run_id} disconnected")
+
     except Exception as e:
         print("WS autodrive error:", e)
         try:
@@ -286,7 +286,16 @@ const BulkAutoDrive = () => {
       resumeFiles.forEach((f) => fd.append("files", f));
 
       const res = await api.post("/bulk/resumes/", fd);
-      setCandidateIds(res.data.candidate_ids || []);
+
+      // Ingestion runs in the background; poll until it finishes.
+      const ingestId = res.data.ingest_id;
+      let job = res.data;
+      while (job.status !== "done" && job.status !== "error") {
+        await new Promise((r) => setTimeout(r, 1000));
+        job = (await api.get(`/bulk/resumes/status/${ingestId}`)).data;
+      }
+      if (job.status === "error") throw new Error(job.errors?.join("; "));
+      setCandidateIds(job.candidate_ids || []);
     } catch (err) {
       console.error(err);
       setError("Failed to upload resumes.");
@@ -305,11 +314,13 @@ const BulkAutoDrive = () => {
     setResults({});
     setLoadingAutoDrive(true);
 
+    let runId;
     try {
-      await api.post("/bulk/autodrive/start", {
+      const res = await api.post("/bulk/autodrive/start", {
         job_ids: jobIds,
         candidate_ids: candidateIds,
       });
+      runId = res.data.run_id;
     } catch (err) {
       setError("Failed to start AutoDrive.");
       setLoadingAutoDrive(false);
@@ -317,7 +328,9 @@ const BulkAutoDrive = () => {
     }
 
     const token = localStorage.getItem("token");
-    const socket = new WebSocket(`ws://${window.location.hostname}:8000/ws/autodrive?token=${token}`);
+    const socket = new WebSocket(
+      `ws://${window.location.hostname}:8000/ws/autodrive?token=${token}&run_id=${runId}`
+    );
 
 
     socket.onopen = () => console.log("WebSocket connected");
@@ -344,7 +357,7 @@ const BulkAutoDrive = () => {
       }
 
       if (data.type === "error") {
-        setError(data.msg);
+        setError(data.msg || data.message);
       }
     };
   };